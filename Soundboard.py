@@ -1,29 +1,47 @@
+from startup_profile import startup_profiler   # Zuerst importieren: Zeitmessung beginnt beim Import
 import sys   # Importiere sys, um das Kommandozeilenargument zu verarbeiten
-import pygame
 import signal
 import gi    # Importiere gi, um die GTK-Bibliothek zu verwenden
 import json
 import os    # Importiere os für Pfadoperationen
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk
-from urllib.parse import unquote
+from gi.repository import Gtk, Gdk, GLib
 from config_manager import ConfigManager
-from Soundbutton import Soundbutton
+from lazy_grid import LazyGrid, ButtonSlot
+from sound_cache import sound_cache
+from sound_loader import sound_loader
+from audio_mixer import mixer_starter, latency_meter
+from playback_engine import playback_engine
+from style_manager import style_manager
+from config_writer import config_writer
+from autosave import AutosaveService
+from bulk_import import BulkImporter, classify_paths
 
 ############################################################################################################
 class Soundboard(Gtk.Window):
-    def __init__(self, config_file=None):
+    def __init__(self, config_file=None, measure_latency=False):
         Gtk.Window.__init__(self, title="Soundboard")
-        pygame.mixer.init()                  # Pygame für Audio initialisieren
         
         # Wenn keine Konfigurationsdatei angegeben wurde, verwende einen leeren String
         if config_file is None:
             config_file = ""
         self.config = ConfigManager(parent=self, config_file=config_file)
+        startup_profiler.mark("Konfiguration laden")
+        self.autosave = AutosaveService(self.config, self.config.data['Window']['autosave_slots'], self.config.data['Window']['autosave_interval_s'])
+        if not self.config.has_changes:          # Nicht, wenn bereits das Journal nachgespielt wurde
+            self.autosave.offer_recovery()       # Neuere Sicherung vor dem Aufbau der Buttons anbieten
+        startup_profiler.mark("Wiederherstellung prüfen")
+        mixer_starter.configure(self.config.data['Window'])  # Mixer startet erst nach dem ersten Zeichnen oder beim ersten Abspielen
+        latency_meter.enabled = measure_latency or self.config.data['Window']['measure_latency']
+        playback_engine.configure(self.config.data['Window']['mixer_max_channels'], self.config.data['Window']['voice_stealing'],
+                                  self.config.data['Window'].get('stream_threshold_mb', 0))
+        playback_engine.scheduler = GLib.timeout_add   # Engine prüft laufende Sounds im GTK-Timer
+        sound_cache.set_budget_mb(self.config.data['Window']['sound_cache_mb'])  # Speicherbudget für dekodierte Sounds
+        sound_loader.num_workers = self.config.data['Window']['preload_workers'] # Anzahl der Hintergrund-Lader
+        sound_loader.hold()                     # Vorladen erst nach dem ersten Zeichnen, sonst startet ein Lader den Mixer
         self.set_default_size(self.config.data['Window']['window_width'], self.config.data['Window']['window_height'])
         self.set_size_request(-1, -1)        # Keine Mindestgröße setzen
         self.default_button = None           # Default-Button
-        self.count_sounds = 0                # Zähler für die Anzahl der laufenden Sounds
         self.update_window_title()           # Aktualisiere den Fenstertitel
         
         # Aktiviere Drag & Drop für das Fenster
@@ -37,7 +55,18 @@ class Soundboard(Gtk.Window):
         self.scrolled_window.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
         self.scrolled_window.set_hexpand(True)
         self.scrolled_window.set_vexpand(True)
-        self.add(self.scrolled_window)       # Füge ScrolledWindow zum Hauptfenster hinzu
+        self.vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self.add(self.vbox)
+        self.progress_bar = Gtk.ProgressBar()   # Fortschritt beim Import vieler Dateien, sonst ausgeblendet
+        self.progress_bar.set_show_text(True)
+        self.progress_bar.set_no_show_all(True)
+        self.vbox.pack_start(self.progress_bar, False, False, 0)
+        self.search_entry = Gtk.SearchEntry()   # Suche nach Text, Tags und Dateinamen (Strg+F), sonst ausgeblendet
+        self.search_entry.set_no_show_all(True)
+        self.search_entry.connect("search-changed", self.on_search_changed)
+        self.search_entry.connect("stop-search", self.on_stop_search)    # Escape: Suche beenden
+        self.vbox.pack_start(self.search_entry, False, False, 0)
+        self.vbox.pack_start(self.scrolled_window, True, True, 0) # ScrolledWindow unter Fortschrittsbalken und Suche
         
         # Erstelle FlowBox mit optimierter Konfiguration
         self.flowbox = Gtk.FlowBox()                            # FlowBox konfigurieren für automatische Anordnung
@@ -63,14 +92,20 @@ class Soundboard(Gtk.Window):
         self.flowbox.drag_dest_add_text_targets()
         self.flowbox.connect('drag-data-received', self.on_background_drag_data_received)
         self.scrolled_window.add(self.flowbox)
+        self.grid = LazyGrid(self, self.flowbox, self.scrolled_window) # Buttons nur im sichtbaren Bereich erzeugen
+        self.bulk_importer = BulkImporter(self, self.progress_bar)    # Import vieler Dateien per Drag & Drop
+        startup_profiler.mark("Fenster aufbauen")
 
-        # Erstelle Buttons aus der gefilterten Buttonliste (ohne Default-Button)
+        # Erstelle Platzhalter aus der gefilterten Buttonliste (ohne Default-Button)
         for button in self.config.buttonlist:
             if button.get('position') != 0:  # solange es nicht der Default-Button ist
-                button = Soundbutton(parent=self, default_button=self.config.data['buttons'][0], button_config=button)
-                self.flowbox.add(button)                             # FlowBox kümmert sich um die Positionierung
+                self.flowbox.add(self.grid.create_slot(button))      # FlowBox kümmert sich um die Positionierung
             else:
                 self.default_button = button
+        startup_profiler.mark("Platzhalter erzeugen")
+        # Die ersten Buttons sofort erzeugen, damit das Fenster nicht leer erscheint
+        self.grid.materialize_initial(self.config.data['Window']['window_width'], self.config.data['Window']['window_height'])
+        startup_profiler.mark("Sichtbare Buttons erzeugen")
 
         self.connect("key-press-event",    self.on_key_press)        # Signalhandler für Tastatureingaben
         self.connect("button-press-event", self.on_background_click) # Für Klicks auf Fensterhintergrund
@@ -78,7 +113,20 @@ class Soundboard(Gtk.Window):
         self.connect("destroy",            self.on_destroy)          # Signalhandler für Fenster-Schließen
         signal.signal(signal.SIGINT, self.on_sigint)                 # Signal-Handler für SIGINT (Strg+C) registrieren
         self.connect("realize", self.on_realize)                     # Abonniere das Signal für Änderungen des Themas
+        self.autosave.start()                                        # Periodische Sicherung ungespeicherter Änderungen
+        GLib.idle_add(self.on_first_idle)                            # Läuft erst, nachdem das Fenster gezeichnet wurde
         self.show_all()
+        startup_profiler.mark("Fenster anzeigen")
+
+    ########################################################################################################
+    def on_first_idle(self):
+        """Erster Leerlauf nach dem Zeichnen: jetzt den Mixer starten, ohne das Fenster zu verzögern"""
+        startup_profiler.mark("Erstes Zeichnen")
+        mixer_starter.ensure()                                       # Vorher wurde nichts geladen, der Mixer läuft noch nicht
+        startup_profiler.mark("Mixer starten")
+        sound_loader.release()                                       # Gesammelte Vorlade-Aufträge jetzt bearbeiten
+        startup_profiler.report()
+        return False
 
     ########################################################################################################
     def on_realize(self, widget):
@@ -104,6 +152,11 @@ class Soundboard(Gtk.Window):
         item1.connect("activate", self.on_add_button)
         menu.append(item1)
         
+        # Menüeintrag "Ordner importieren": je Audiodatei im Ordner (rekursiv) ein Button
+        item_import = Gtk.MenuItem(label="Ordner importieren")
+        item_import.connect("activate", self.on_import_folder)
+        menu.append(item_import)
+        
         # Menüeintrag "Speichern" nur anzeigen, wenn ein Konfigurationsname bekannt ist
         if self.config.has_unsaved_changes():
             item2 = Gtk.MenuItem(label="Speichern")
@@ -116,7 +169,7 @@ class Soundboard(Gtk.Window):
         menu.append(item3)
         
         # Menüeintrag "Stop all Sounds" nur anzeigen, wenn Sounds laufen
-        if self.count_sounds > 0:
+        if playback_engine.active_count() > 0:
             item4 = Gtk.MenuItem(label="Stop all Sounds")
             item4.connect("activate", self.stop_all_sounds)
             menu.append(item4)
@@ -144,12 +197,34 @@ class Soundboard(Gtk.Window):
             new_button_config['image_file'] = image_file
         print(f"new_button_config: {new_button_config}")
         # Erstelle den neuen Button und füge ihn zur FlowBox hinzu
-        new_button = Soundbutton(parent=self, default_button=self.config.data['buttons'][0], button_config=new_button_config)
-        self.flowbox.add(new_button) 
+        slot = self.grid.create_slot(new_button_config)
+        self.flowbox.add(slot) 
+        slot.materialize()                              # Neue Buttons sofort erzeugen
         self.flowbox.show_all()                         # Aktualisiere die Anzeige
         if widget:                                      # Nur wenn ein Widget übergeben wurde (Menüpunkt)
             widget.get_parent().popdown()               # Menü schließen
         self.config.mark_changed()  # Markiere Änderungen
+        self.refresh_search()                           # Neuer Button passt in der Regel nicht zur laufenden Suche
+
+    ########################################################################################################
+    def on_import_folder(self, widget=None):
+        """Öffnet einen Ordnerauswahldialog und importiert alle Audiodateien darin"""
+        dialog = Gtk.FileChooserDialog(
+            title="Ordner importieren",
+            parent=self,
+            action=Gtk.FileChooserAction.SELECT_FOLDER
+        )
+        dialog.add_buttons(
+            Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+            Gtk.STOCK_OPEN, Gtk.ResponseType.OK
+        )
+        if os.path.isdir(self.config.defaults.soundpfad_prefix):
+            dialog.set_current_folder(os.path.abspath(self.config.defaults.soundpfad_prefix))
+        response = dialog.run()
+        folder = dialog.get_filename()
+        dialog.destroy()
+        if response == Gtk.ResponseType.OK and folder:
+            self.bulk_importer.import_files([], [], [folder])
 
     ########################################################################################################
     def on_key_press(self, widget, event):
@@ -175,6 +250,12 @@ class Soundboard(Gtk.Window):
             self.on_add_button(None)                           # Button hinzufügen (None als Widget-Parameter)
             return True                                        # keine Weitergabe an andere Handler
         
+        if ctrl and keyname == 'f':                            # Strg+F: Suche öffnen
+            self.config.search_buttons("")                     # Index schon beim Öffnen aufbauen, nicht beim ersten Zeichen
+            self.search_entry.show()
+            self.search_entry.grab_focus()
+            return True                                        # keine Weitergabe an andere Handler
+
         if ctrl and keyname == 'q':                            # Strg+Q: Fenster schließen
             self.config.save_config(self)                      # Konfiguration speichern
             self.destroy()                                     # Fenster schließen
@@ -192,57 +273,75 @@ class Soundboard(Gtk.Window):
         
         return False                                           # Weitergabe an andere Handler
     
+    ########################################################################################################
+    def on_search_changed(self, entry):
+        """Filtert die Buttons beim Tippen über den Suchindex der Konfiguration"""
+        self.grid.apply_filter(self.config.search_buttons(entry.get_text()))
+
+    ########################################################################################################
+    def on_stop_search(self, entry):
+        """Beendet die Suche und zeigt wieder alle Buttons"""
+        entry.set_text("")
+        entry.hide()
+        self.grid.apply_filter(None)
+
+    ########################################################################################################
+    def refresh_search(self):
+        """Wendet eine laufende Suche nach Änderungen an Buttons oder Reihenfolge erneut an"""
+        if self.search_entry.get_text():
+            self.on_search_changed(self.search_entry)
+
     ########################################################################################################
     def on_window_configure(self, widget, event):
         """Handler für Größenänderungen des Fensters"""
         self.config.data['Window']['window_width'] = event.width    # Breite setzen
         self.config.data['Window']['window_height'] = event.height  # Höhe setzen
-        self.flowbox.queue_resize()                          # FlowBox neu anpassen
-        self.flowbox.queue_draw()                            # FlowBox neu zeichnen        
-        return True  # keine Weitergabe an andere Handler
+        # Kein eigenes queue_resize()/queue_draw(): Die Standardbehandlung von GTK ordnet die FlowBox
+        # einmal pro Frame neu an, egal wie viele configure-Events beim Ziehen eintreffen
+        return False  # Weitergabe an die Standardbehandlung von GTK
     
     #########################################################################################################
     def on_theme_changed(self, settings, gparam):
         # Dies wird aufgerufen, wenn sich das GTK-Theme ändert
         theme_name = Gtk.Settings.get_default().get_property("gtk-theme-name")
         print(f"Thema wurde geändert zu: {theme_name}")
+        style_manager.invalidate_theme()        # Theme-Farben einmal neu ermitteln statt pro Button
         
-        for child in self.flowbox.get_children():
-            if isinstance(child.get_child(), Soundbutton):  # Sicherstellen, dass es sich um einen Button handelt
-                child.get_child().apply_colors_and_css()
-                child.get_child().queue_draw()
+        for button in self.grid.buttons():              # Noch nicht erzeugte Buttons holen sich die Farben später selbst
+            button.apply_colors_and_css()
+            button.queue_draw()
         self.flowbox.show_all()
 
     ########################################################################################################
     def stop_all_sounds(self, widget=None):
         """Stoppt alle Sounds"""
-        for child in self.flowbox.get_children():
-            if isinstance(child.get_child(), Soundbutton):  # Sicherstellen, dass es sich um einen Button handelt
-                child.get_child().deactivate_button()
+        for button in self.grid.buttons():              # Nur erzeugte Buttons können spielen
+            button.deactivate_button()
 
     #########################################################################################################
     def move_button(self, current_position, new_position):
         """Verschiebt den Button die neue Position"""
-        button_to_move = self.flowbox.get_children()[current_position-1]        # Hole das Button-Widget
+        new_position = self.config.move_button(current_position, new_position) # Konfiguration anpassen (nur betroffener Bereich)
+        button_to_move = self.flowbox.get_child_at_index(current_position-1)   # Hole das Button-Widget
+        if button_to_move is None or new_position == current_position:
+            return
         self.flowbox.remove(button_to_move)         # Entferne den Button von der FlowBox
         self.flowbox.insert(button_to_move, new_position-1)  # Füge den Button an der neuen Position ein
-
-        for i, child in enumerate(self.flowbox.get_children()):
-            if isinstance(child.get_child(), Soundbutton):  # Sicherstellen, dass es sich um einen Button handelt
-                child.get_child().button_config['position'] = i+1
-        buttonlist = sorted(self.config.data['buttons'], key=lambda x: x.get('position', 0))
-        self.config.data['buttons'] = buttonlist
         self.flowbox.show_all()
         self.config.mark_changed()  # Markiere Änderungen
+        self.refresh_search()       # Positionen der gefilterten Buttons haben sich geändert
 
     #########################################################################################################
     def remove_button(self, button):
         """Entfernt einen Button aus der FlowBox"""
         if hasattr(self, 'flowbox'):
-            self.flowbox.remove(button)
+            slot = button.get_parent()               # Platzhalter des Buttons
+            self.grid.forget(slot)
+            self.flowbox.remove(slot.get_parent())   # FlowBoxChild samt Platzhalter entfernen
             self.flowbox.show_all()
             button.delete_button()       
             self.config.mark_changed()  # Markiere Änderungen
+            self.refresh_search()       # Positionen der gefilterten Buttons haben sich geändert
             return True
         return False
 
@@ -256,6 +355,7 @@ class Soundboard(Gtk.Window):
     ########################################################################################################
     def on_destroy(self, widget, data=None):
         """Behandelt das Schließen des Fensters"""
+        self.config.finish_saves()              # Laufende Speichervorgänge abschließen, z.B. nach Strg+Q
         # Prüfen, ob es ungespeicherte Änderungen gibt
         if self.config.has_unsaved_changes():
             # Prüfen, ob die Konfiguration schreibgeschützt ist oder eine neue Konfiguration ist
@@ -282,10 +382,14 @@ class Soundboard(Gtk.Window):
                 if response == Gtk.ResponseType.YES:
                     # Speichern unter neuem Namen
                     self.config.save_config_as_dialog(self)
+                    self.config.finish_saves()          # Fehler beim Schreiben noch melden
+                    self.autosave.close(clean=not self.config.has_unsaved_changes())
                     self.cleanup_resources()
                     Gtk.main_quit()
                 else:  # NO
                     # Änderungen verwerfen
+                    self.config.journal.discard()    # Verworfene Änderungen beim nächsten Start nicht nachspielen
+                    self.autosave.close(clean=True)  # Auch keine Sicherung mehr anbieten
                     self.cleanup_resources()
                     Gtk.main_quit()
             else:
@@ -309,29 +413,41 @@ class Soundboard(Gtk.Window):
                 if response == Gtk.ResponseType.YES:
                     # Speichern in der aktuellen Datei
                     self.config.save_config(self)
+                    self.config.finish_saves()          # Fehler beim Schreiben noch melden
+                    self.autosave.close(clean=not self.config.has_unsaved_changes())
                     self.cleanup_resources()
                     Gtk.main_quit()
                 elif response == Gtk.ResponseType.ACCEPT:
                     # Speichern unter neuem Namen
                     self.config.save_config_as_dialog(self)
+                    self.config.finish_saves()          # Fehler beim Schreiben noch melden
+                    self.autosave.close(clean=not self.config.has_unsaved_changes())
                     self.cleanup_resources()
                     Gtk.main_quit()
                 else:  # NO
                     # Änderungen verwerfen
+                    self.config.journal.discard()    # Verworfene Änderungen beim nächsten Start nicht nachspielen
+                    self.autosave.close(clean=True)  # Auch keine Sicherung mehr anbieten
                     self.cleanup_resources()
                     Gtk.main_quit()
         else:
             # Keine Änderungen, direkt beenden
+            self.autosave.close(clean=True)         # Sauber beendet, beim nächsten Start nichts anbieten
             self.cleanup_resources()
             Gtk.main_quit()
 
     ########################################################################################################
     def cleanup_resources(self):
         """Gibt alle Ressourcen frei"""
-        for button in self.flowbox.get_children():
-            if isinstance(button.get_child(), Soundbutton):    # Sicherstellen, dass es sich um einen Button handelt
-                button.get_child().delete_button()             # Löscht den Button
-        pygame.mixer.quit()
+        self.autosave.stop()                                   # Keine weiteren Sicherungen planen
+        for button in self.grid.buttons():
+            button.delete_button()                             # Löscht den Button
+        self.grid.clear_pool()                                 # Aufgehobene Buttons ebenfalls
+        sound_loader.shutdown()                                # Hintergrund-Lader anhalten
+        latency_meter.report()                                 # Ergebnis der Latenzmessung ausgeben
+        sound_cache.clear()                                    # Dekodierte Sounds vor dem Beenden des Mixers freigeben
+        mixer_starter.quit()
+        config_writer.flush()                                  # Wartende Speichervorgänge noch abschließen
 
     ########################################################################################################
     def on_sigint(self, signum, frame):
@@ -339,58 +455,15 @@ class Soundboard(Gtk.Window):
         print("Strg+C gedrückt, beende Programm...")
         
         # Prüfe, ob es ungespeicherte Änderungen gibt
-        if self.config.has_unsaved_changes():
+        if self.config.has_unsaved_changes() and not self.config.journal.active():
             print("Ungespeicherte Änderungen gefunden, erstelle Autosave...")
-            self.create_autosave()
+            self.autosave.save_now()          # Wird von cleanup_resources noch geschrieben
         
         # Ressourcen freigeben und Programm beenden
         self.cleanup_resources()
         Gtk.main_quit()  # Beende die GTK-Hauptschleife
         sys.exit(0)  # Stelle sicher, dass das Programm beendet wird
 
-    ########################################################################################################    
-    def create_autosave(self):
-        """Erstellt eine automatische Sicherungskopie der Konfiguration"""
-        import os
-        import glob
-        
-        # Bestimme den Basisnamen für die Autosave-Datei
-        if self.config.config_file and self.config.config_file != "":
-            # Wenn eine Konfigurationsdatei existiert, verwende ihren Namen als Basis
-            base_name = os.path.splitext(os.path.basename(self.config.config_file))[0]
-            base_dir = os.path.dirname(self.config.config_file)
-        else:
-            # Wenn keine Konfigurationsdatei existiert, verwende "unnamed_soundboard"
-            base_name = "unnamed_soundboard"
-            base_dir = os.getcwd()  # Aktuelles Verzeichnis
-        
-        # Suche nach existierenden Autosave-Dateien
-        pattern = os.path.join(base_dir, f"{base_name}_autosave_*.json")
-        existing_autosaves = glob.glob(pattern)
-        
-        # Bestimme die höchste Nummer
-        max_num = 0
-        for autosave in existing_autosaves:
-            try:
-                # Extrahiere die Nummer aus dem Dateinamen
-                num_str = os.path.basename(autosave).split("_autosave_")[1].split(".json")[0]
-                num = int(num_str)
-                if num > max_num:
-                    max_num = num
-            except (ValueError, IndexError):
-                # Ignoriere Dateien, die nicht dem erwarteten Format entsprechen
-                pass
-        
-        # Erstelle den neuen Dateinamen mit der nächsthöheren Nummer
-        new_num = max_num + 1
-        autosave_file = os.path.join(base_dir, f"{base_name}_autosave_{new_num}.json")
-        
-        # Speichere die Konfiguration
-        with open(autosave_file, 'w') as f:
-            json.dump(self.config.data, f, indent=4)
-        
-        print(f"Autosave erstellt: {autosave_file}")
-
     ########################################################################################################
     def update_window_title(self):
         """Aktualisiert den Fenstertitel basierend auf dem Konfigurationsnamen und dem Status der ungespeicherten Änderungen"""
@@ -418,19 +491,50 @@ class Soundboard(Gtk.Window):
 
     ########################################################################################################
     def update_buttons(self):
-        """Aktualisiert die Anzeige der Buttons"""
-        # Entferne alle existierenden Buttons
+        """Gleicht die FlowBox mit der Buttonliste ab, nur geänderte Buttons werden eingefügt, entfernt oder verschoben"""
+        wanted = [button for button in self.config.buttonlist if button.get('position') != 0]  # Ohne Default-Button
+        wanted_index = {id(button): i for i, button in enumerate(wanted)}
+        
+        # Platzhalter, deren Konfiguration nicht mehr existiert, entfernen; die übrigen bleiben samt Sound erhalten
+        existing = {}
         for child in self.flowbox.get_children():
-            self.flowbox.remove(child)
+            slot = child.get_child()
+            if isinstance(slot, ButtonSlot) and id(slot.button_config) in wanted_index:
+                existing[id(slot.button_config)] = child
+            else:
+                if isinstance(slot, ButtonSlot) and slot.button is not None:
+                    slot.button.delete_button()
+                self.grid.forget(slot)
+                self.flowbox.remove(child)
         
-        # Füge die Buttons neu hinzu
-        for button in self.config.buttonlist:
-            if button.get('position') != 0:  # solange es nicht der Default-Button ist
-                button = Soundbutton(parent=self, default_button=self.config.data['buttons'][0], button_config=button)
-                self.flowbox.add(button)
+        # Reihenfolge herstellen und neue Platzhalter einfügen
+        i = 0
+        while i < len(wanted):
+            target = wanted[i]
+            current = self.flowbox.get_child_at_index(i)
+            if current is not None and current.get_child().button_config is target:
+                i += 1
+                continue
+            if current is not None:
+                # Wurde nur der aktuelle Button nach hinten verschoben, diesen einen Button versetzen
+                following = self.flowbox.get_child_at_index(i + 1)
+                if following is not None and following.get_child().button_config is target \
+                        and wanted_index[id(current.get_child().button_config)] > i:
+                    self.flowbox.remove(current)
+                    self.flowbox.insert(current, wanted_index[id(current.get_child().button_config)])
+                    continue
+            child = existing.get(id(target))
+            if child is None:
+                self.flowbox.insert(self.grid.create_slot(target), i)   # Neuer Button
+            else:
+                self.flowbox.remove(child)                               # Verschobener Button
+                self.flowbox.insert(child, i)
+            i += 1
         
         # Aktualisiere die Anzeige
         self.flowbox.show_all()
+        self.grid.schedule_update()
+        self.refresh_search()
 
     ############################################################################################################
     def on_background_drag_data_received(self, widget, drag_context, x, y, data, info, time):
@@ -439,40 +543,18 @@ class Soundboard(Gtk.Window):
         uris = data.get_uris()
         if uris:
             print("Elementanzahl: ", len(uris))
-            print(f"uris: {uris}")
-            sound_files = []
-            image_files = []
-            for uri in uris:
-                path = unquote(uri.replace("file://", "").strip())    # Datei-URI -> Pfad dekodieren
-                path = os.path.abspath(path)                          # Sicherheitshalber echte Pfade auflösen
-
-                if path.endswith(('.jpg', '.png')):                   # Bilddatei erkannt
-                    print("Bilddatei:", path)
-                    image_files.append(path)
-
-                elif path.endswith(('.mp3', '.wav')):                 # Audio-Datei erkannt
-                    print("Audio-Datei:", path)
-                    sound_files.append(path)
-                else:
-                    print("Nicht unterstützter Dateityp:", path)
-            # Spezielles Vorgehen, wenn genau ein Sound und ein Bild übergeben wurden        
-            if len(sound_files) == 1 and len(image_files) == 1:
-                self.config.add_portable_button(sound_files[0], image_files[0])
-                self.on_add_button(None, sound_files[0], image_files[0])
-                print(f"Button mit Sound- und Bilddatei: {sound_files[0]} und {image_files[0]} erstellt")
-
-            elif len(sound_files) == 0 and len(image_files) == 0:
+            from urllib.parse import unquote                          # Nur für Drag & Drop gebraucht
+            # Datei-URI -> Pfad dekodieren und sicherheitshalber echte Pfade auflösen
+            paths = [os.path.abspath(unquote(uri.replace("file://", "").strip())) for uri in uris]
+            sound_files, image_files, folders, unsupported = classify_paths(paths)
+            for path in unsupported:
+                print("Nicht unterstützter Dateityp:", path)
+            if len(sound_files) == 0 and len(image_files) == 0 and len(folders) == 0:
                 print("Keine unterstützten Dateien empfangen")
-
             else:
-                for sound_file in sound_files:
-                    self.config.add_portable_button(sound_file)
-                    self.on_add_button(None, sound_file, None)
-                    print(f"Button mit Sounddatei: {sound_file} erstellt")
-                for image_file in image_files:
-                    self.config.add_portable_button(image_file)
-                    self.on_add_button(None, None, image_file)
-                    print(f"Button mit Bilddatei: {image_file} erstellt")
+                # Ordner rekursiv durchsuchen und Dateien im Hintergrund prüfen, ein Einfügen für alle,
+                # Platzhalter portionsweise; genau ein Sound und ein Bild ergeben einen Button mit beidem
+                self.bulk_importer.import_files(sound_files, image_files, folders)
 
         else:
             #print("Keine URIs empfangen")
@@ -537,7 +619,8 @@ class Soundboard(Gtk.Window):
                     
                     if source_board == current_board:
                         # Internes Drag & Drop: Button an berechnete Position verschieben
-                        source_position = portable_config['position']
+                        source_button = self.config.get_button(portable_config.get('id'))  # Position über die stabile ID
+                        source_position = source_button['position'] if source_button else portable_config['position']
                         if source_position != target_position:
                             # Wenn der Button von einer niedrigeren Position nach hinten verschoben wird,
                             # müssen wir die Zielposition um 1 reduzieren
@@ -573,10 +656,14 @@ class Soundboard(Gtk.Window):
                 Gtk.drag_finish(drag_context, False, False, time)
 
  ############################################################################################################
-if len(sys.argv) > 1:
-    app = Soundboard(config_file=sys.argv[1])
+args  = [arg for arg in sys.argv[1:] if not arg.startswith('--')] # Konfigurationsdatei
+flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]     # Optionen wie --measure-latency
+startup_profiler.enabled = '--profile-startup' in flags             # Dauer der Startphasen ausgeben
+startup_profiler.mark("Module importieren")
+if len(args) > 0:
+    app = Soundboard(config_file=args[0], measure_latency='--measure-latency' in flags)
 else:
-    app = Soundboard()
+    app = Soundboard(measure_latency='--measure-latency' in flags)
 app.show_all()
 Gtk.main() # Starte die GTK-Hauptschleife
 sys.exit(0) # Stelle sicher, dass das Programm beendet wird
\ No newline at end of file
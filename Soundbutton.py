@@ -1,14 +1,26 @@
 import gi    # Importiere gi, um die GTK-Bibliothek zu verwenden
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, GLib, Gdk, GdkPixbuf
-import pygame
+import math
 import os
 import json
-import time
-from urllib.parse import unquote
+from sound_loader import sound_loader
+from playback_engine import playback_engine
+from metadata_index import metadata_index, format_duration
+from audio_mixer import latency_meter
+from style_manager import style_manager
+from thumbnail_cache import thumbnail_cache
+from button_model import ButtonModel, BoardDefaults
 
 #############################################################################################################
 class Soundbutton(Gtk.EventBox):
+    ALIGN_MAP = {                                   # text_align -> Ausrichtung des Textes
+        "left":   Gtk.Justification.LEFT,
+        "center": Gtk.Justification.CENTER,
+        "fill":   Gtk.Justification.FILL,
+        "right":  Gtk.Justification.RIGHT
+    }
+
     def __init__(self, parent=None, default_button=None, button_config=None, position=None):
         super().__init__()
         self.parent = parent # kann None sein, da wir dann das Kontextmenu abschalten
@@ -23,31 +35,34 @@ class Soundbutton(Gtk.EventBox):
         else:
             self.button_config    = self.create_minimal_button(position)
         
+        # Aufgelöste Werte (Button-Konfiguration + Default-Button), werden nur bei Änderungen neu berechnet
+        if parent is not None and getattr(parent, 'config', None) is not None:
+            defaults = parent.config.defaults
+        else:
+            defaults = BoardDefaults(self.default_button)
+        self.model                = ButtonModel(self.button_config, defaults)
+        
         self.sound                = None
-        self.channel              = None
-        self.timer_id             = None
         self.is_pressed           = False
         self.last_click_time      = 0       # Für Cooldown
         self.drag_started         = False   # Für Drag-and-Drop
         self.click_position       = None    # Für Drag-and-Drop
         self.changed_volume       = False   # Für Slider-Klick
-        self.fade_time_ms         = 0       # Für Fortschrittsanzeige
         self.sound_loaded         = False   # Flag für geladenen Sound
+        self.loading              = False   # Sound wird gerade im Hintergrund geladen
+        self.preload_path         = None    # Pfad des laufenden Hintergrund-Ladeauftrags
+        self.color_provider       = None    # Geteilter CSS-Provider für Farben und Größen
+        self.image_provider       = None    # Geteilter CSS-Provider für das Hintergrundbild
 
         #self.current_length       = 0       # Für Fortschrittsanzeige
         #self.start_time           = None    # Für Fortschrittsanzeige
 
-        if 'fade_time_ms' in self.button_config:
-            self.fade_time_ms = self.button_config['fade_time_ms']
-            print(f"set fade_time_ms to {self.fade_time_ms}")
-        elif 'fade_time_ms' in self.default_button:
-            self.fade_time_ms = self.default_button['fade_time_ms']
-            print(f"set fade_time_ms from default to {self.fade_time_ms}")
-
         self.set_size_request(150, 75)
         self.set_hexpand(False)             # EventBox horizontal NICHT ausdehnen
         self.set_vexpand(False)             # EventBox vertikal NICHT ausdehnen	
         self.connect("button-press-event", self.on_eventbox_click)
+        self.set_has_tooltip(True)
+        self.connect("query-tooltip", self.on_query_tooltip)   # Metadaten erst beim Überfahren nachschlagen
         
         # Drag-and-Drop-Funktionalität hinzufügen
         self.add_events(Gdk.EventMask.BUTTON_PRESS_MASK |
@@ -77,34 +92,12 @@ class Soundbutton(Gtk.EventBox):
         hbox.set_vexpand(True)
         self.add(hbox)
 
-        # Füge Text hinzu
-        self.text_label = Gtk.Label(label=button_config['text'])
+        # Füge Text hinzu (Text, Position und Ausrichtung setzt show_config)
+        self.text_label = Gtk.Label()
         self.text_label.set_hexpand(True)
         self.text_label.set_halign(Gtk.Align.START)  # Box-Ausrichtung: links
         self.text_label.set_valign(Gtk.Align.START)  # Box-Ausrichtung: oben
         self.text_label.set_line_wrap(True)          # Zeilenumbruch aktivieren
-        self.text_label.set_justify(Gtk.Justification.CENTER)  # Text in sich zentrieren
-                   
-        # Setze Text-Position basierend auf Konfiguration
-        if 'use_custom_text_position' in button_config and button_config['use_custom_text_position']:
-            self.text_label.set_margin_start(button_config['text_x'])
-            self.text_label.set_margin_top(button_config['text_y'])
-        else:
-            self.text_label.set_margin_start(self.default_button['text_x'])
-            self.text_label.set_margin_top(self.default_button['text_y'])
-
-        # Setze Text-Ausrichtung
-        align_map = {
-            "left":   Gtk.Justification.LEFT,
-            "center": Gtk.Justification.CENTER,
-            "fill":   Gtk.Justification.FILL,
-            "right":  Gtk.Justification.RIGHT
-        }
-        
-        if 'text_align' in button_config:
-            self.text_label.set_justify(align_map.get(button_config['text_align'], Gtk.Justification.CENTER))
-        else:
-            self.text_label.set_justify(align_map.get(self.default_button['text_align'], Gtk.Justification.CENTER))
 
         hbox.pack_start(self.text_label, True, True, 0)
 
@@ -120,9 +113,6 @@ class Soundbutton(Gtk.EventBox):
         #self.status_icon.set_text("🔊")
         #self.status_icon.set_text("")
 
-       # Initialisiere das Status-Icon basierend auf den Button-Eigenschaften
-        self.update_status_icon()
-
         # Erstelle einen Slider (Gtk.Scale)
         self.volume = Gtk.Scale.new_with_range(Gtk.Orientation.VERTICAL, 0, 100, 1)
         self.volume.set_hexpand(False)       # Slider horizontal NICHT ausdehnen
@@ -135,73 +125,81 @@ class Soundbutton(Gtk.EventBox):
         self.volume.set_margin_end(3)        # Rechter Rand
         self.volume.set_halign(Gtk.Align.END)# Am rechten Rand ausrichten
         
-        # Setze den initialen Lautstärkewert
-        if 'volume' in button_config:
-            self.volume.set_value(button_config['volume'])
-        else:
-            self.volume.set_value(self.default_button['volume'])
-            self.button_config['volume'] = self.default_button['volume'] # Speichere den neuen Wert in der Konfiguration
-
-        # Verbinde den Slider mit der Lautstärkeregelung
-        self.volume.connect("value-changed", self.on_volume_changed)
-
-        # Lade den Sound beim Initialisieren
-        if 'audio_file' in button_config and button_config['audio_file']:
-            if self.button_config.get('preload', False):
-                self.load_sound()
+        # Verbinde den Slider mit der Lautstärkeregelung (den Wert setzt show_config)
+        self.volume_handler = self.volume.connect("value-changed", self.on_volume_changed)
 
         hbox.pack_start(self.volume, False, False, 0)  # Füge den Slider zur horizontalen Box hinzu
 
         # EventBox CSS-Klasse setzen
         self.get_style_context().add_class("sound-button")
         
-        # Basis-CSS für alle Buttons
+        # Text, Status, Lautstärke, Farben und Bild aus der Konfiguration übernehmen
+        self.show_config()
+
+    #########################################################################################################
+    def show_config(self):
+        """Überträgt die Werte der Button-Konfiguration auf die Widgets (beim Erzeugen und beim Wiederverwenden)"""
+        self.text_label.set_text(self.model.text)
+        self.text_label.set_margin_start(self.model.text_x)     # Text-Position
+        self.text_label.set_margin_top(self.model.text_y)
+        self.text_label.set_justify(self.ALIGN_MAP.get(self.model.text_align, Gtk.Justification.CENTER))
+
+        # Initialisiere das Status-Icon basierend auf den Button-Eigenschaften
+        self.update_status_icon()
+
+        # Setze den Lautstärkewert, ohne dass on_volume_changed eine Änderung meldet
+        self.volume.handler_block(self.volume_handler)
+        self.volume.set_value(self.model.volume)
+        self.volume.handler_unblock(self.volume_handler)
+        if 'volume' not in self.button_config:
+            self.button_config['volume'] = self.model.volume # Speichere den Default-Wert in der Konfiguration
+
+        # Lade den Sound im Hintergrund
+        if self.model.audio_file and self.model.preload:
+            self.request_preload()
+
+        # Basis-CSS und individuelle Farben setzen, dann das Hintergrundbild
         self.apply_colors_and_css()
-        
-        # Individuelle Farben setzen, wenn konfiguriert
-        if button_config.get('use_custom_bg_color', False) or button_config.get('use_custom_text_color', False):
-            self.apply_colors_and_css()
-        
-        # Setze Hintergrundbild basierend auf Konfiguration
-        #if 'image_file' in button_config and button_config['image_file']:
-        #    self.apply_custom_image()
-        #elif self.default_button['use_custom_image'] and self.default_button['image_file']:
-        #    self.apply_default_image()
         self.apply_image()
 
+    #########################################################################################################
+    def bind(self, button_config):
+        """Verwendet einen freigegebenen Button für eine andere Button-Konfiguration wieder (siehe LazyGrid).
+        Widgets, Signale und CSS-Provider bleiben erhalten, nur die Werte werden neu gesetzt."""
+        self.cancel_preload()
+        self.button_config   = button_config
+        self.model           = ButtonModel(button_config, self.model.defaults)
+        self.sound           = None
+        self.sound_loaded    = False
+        self.is_pressed      = False
+        self.drag_started    = False
+        self.click_position  = None
+        self.changed_volume  = False
+        style_context = self.get_style_context()
+        style_context.remove_class("sound-button-active")
+        style_context.add_class("sound-button")
+        self.show_config()
+
     #########################################################################################################
     def apply_colors_and_css(self):
         """Wendet die Farben und die Basis-CSS-Einstellungen auf den Button an"""
         # Hole die globalen Einstellungen
-        button_width = self.default_button['button_width']
-        button_height = self.default_button['button_height']
-        button_radius = self.default_button['button_radius']
-        button_spacing = self.default_button['button_spacing']
-        text_size = self.default_button['text_size']
+        defaults = self.model.defaults
+        button_width = defaults.button_width
+        button_height = defaults.button_height
+        button_radius = defaults.button_radius
+        button_spacing = defaults.button_spacing
+        text_size = defaults.text_size
         
         # Bestimme die Text-Farbe
-        if self.button_config.get('use_custom_text_color', False) and 'text_color' in self.button_config and self.button_config['text_color']:
-            text_color = self.button_config['text_color']
-        elif self.default_button['use_custom_text_color']:
-            text_color = self.default_button['text_color']
-        else: # Wenn keine individuelle Textfarbe eingestellt ist, wird die Theme-Textfarbe verwendet
-            temp_button = Gtk.Button()
-            style = temp_button.get_style_context()
-            erg, tc = style.lookup_color("theme_text_color")
+        text_color = self.model.text_color
+        if text_color is None: # Wenn keine individuelle Textfarbe eingestellt ist, wird die Theme-Textfarbe verwendet
+            tc = style_manager.get_theme_color("theme_text_color")
             text_color = f"#{int(tc.red * 255):02x}{int(tc.green * 255):02x}{int(tc.blue * 255):02x}"
 
         # Bestimme die Hintergrundfarbe
-        if self.button_config.get('use_custom_bg_color', False) and 'background_color' in self.button_config and self.button_config['background_color']:
-            bg_color = self.button_config['background_color']
-            # Berechne die abgeleiteten Farben
-            r = int(bg_color[1:3], 16)
-            g = int(bg_color[3:5], 16)
-            b = int(bg_color[5:7], 16)
-            highlight_color = f"#{int(min(255, r*1.3)):02x}{int(min(255, g*1.3)):02x}{int(min(255, b*1.3)):02x}"
-            pressed_color = f"#{int(r*0.9):02x}{int(g*0.9):02x}{int(b*0.9):02x}"
-            shadow_color = f"#{int(r*0.7):02x}{int(g*0.7):02x}{int(b*0.7):02x}"
-        elif self.default_button['use_custom_bg_color'] and 'background_color' in self.default_button and self.default_button['background_color']:
-            bg_color = self.default_button['background_color']
+        bg_color = self.model.bg_color
+        if bg_color is not None:
             # Berechne die abgeleiteten Farben
             r = int(bg_color[1:3], 16)
             g = int(bg_color[3:5], 16)
@@ -210,16 +208,16 @@ class Soundbutton(Gtk.EventBox):
             pressed_color = f"#{int(r*0.9):02x}{int(g*0.9):02x}{int(b*0.9):02x}"
             shadow_color = f"#{int(r*0.7):02x}{int(g*0.7):02x}{int(b*0.7):02x}"
         else: # Wenn keine individuelle Hintergrundfarbe eingestellt ist, wird die Theme-Hintergrundfarbe verwendet
-            temp_button = Gtk.Button()
-            style = temp_button.get_style_context()
-            erg, c = style.lookup_color("theme_bg_color")
+            c = style_manager.get_theme_color("theme_bg_color")
             highlight_color = f"#{int(min(255, c.red*255*1.3)):02x}{int(min(255, c.green*255*1.3)):02x}{int(min(255, c.blue*255*1.3)):02x}"
             bg_color        = f"#{int(c.red*255*1.0):02x}{int(c.green*255*1.0):02x}{int(c.blue*255*1.0):02x}"
             pressed_color   = f"#{int(c.red*255*0.9):02x}{int(c.green*255*0.9):02x}{int(c.blue*255*0.9):02x}"
             shadow_color    = f"#{int(c.red*255*0.7):02x}{int(c.green*255*0.7):02x}{int(c.blue*255*0.7):02x}"
         
         # Basis-CSS für alle Buttons
-        css = f"""
+        css_values = (bg_color, text_color, highlight_color, pressed_color, shadow_color,
+                      button_width, button_height, button_radius, button_spacing, text_size)
+        build_css = lambda: f"""
         .sound-button {{
             background-color: {bg_color};
             color: {text_color};
@@ -257,10 +255,8 @@ class Soundbutton(Gtk.EventBox):
         """
         #    font-size: {text_size+10}px;
         
-        # CSS Provider erstellen und anwenden
-        css_provider = Gtk.CssProvider()
-        css_provider.load_from_data(css.encode())
-        self.get_style_context().add_provider(css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+        # Geteilten CSS Provider holen und den bisherigen ersetzen
+        self.color_provider = style_manager.apply(self.get_style_context(), self.color_provider, ('colors',) + css_values, build_css)
 
         self.status_icon.get_style_context().add_class("status-icon")
         
@@ -270,81 +266,38 @@ class Soundbutton(Gtk.EventBox):
     #########################################################################################################
     def apply_image(self):
         """Wendet ein Hintergrundbild auf den Button an wenn eines eingestellt ist."""
-        if self.button_config.get('image_file', False): # Wenn ein individuelles Bild eingestellt ist            
+        if self.model.image is not None:          # Eigenes Bild oder Bild des Default-Buttons
             self.get_style_context().add_class("sound-button-with-image") 
-            # Lade den X Positionierungswert    
-            print(f"use button individual image")
-            
-            if 'image_x' in self.button_config:
-                image_x = self.button_config['image_x']
-            else:
-                image_x = self.default_button['image_x']
-            # Lade den Y Positionierungswert    
-            if 'image_y' in self.button_config:
-                image_y = self.button_config['image_y']
-            else:
-                image_y = self.default_button['image_y']
-            # Lade den Skalierungsfaktor    
-            if 'image_scale' in self.button_config:
-                image_scale = self.button_config['image_scale']
-            else:
-                image_scale = self.default_button['image_scale']
+            full_image_path, image_x, image_y, image_scale = self.model.image
             # Prüfe ob AUTO Skalierung gewünscht ist
             if image_scale == 0 or image_scale is None:
                 background_size = "contain"
             else:
                 background_size = f"{image_scale}% auto"
-            # Hole den vollständigen Bildpfad
-            if 'image_file' in self.button_config:
-                full_image_path = os.path.join(self.default_button['imagepfad_prefix'], self.button_config['image_file'])
-            else:
-                #full_image_path = os.path.join(self.default_button['imagepfad_prefix'], self.default_button['image_file'])
-                full_image_path = None
-            #self.get_style_context().add_class("sound-button-with-image")
-        
-            print(f"full_image_path: {full_image_path}")
-            print(f"image_x: {image_x}")
-            print(f"image_y: {image_y}")
-            print(f"image_scale: {image_scale}")
-
-            provider = Gtk.CssProvider()
-            provider.load_from_data(f"""
-                .sound-button-with-image {{
-                    background-image: url("{full_image_path}");
-                    background-repeat: no-repeat;
-                    background-position: calc(100% - {image_x}px) {image_y}px;
-                    background-size: {background_size};
-                }}
-            """.encode())
-            self.get_style_context().add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+            self.apply_image_css(full_image_path, image_x, image_y, image_scale, background_size)
+        else:
+            self.get_style_context().remove_class("sound-button-with-image")    
+            self.image_provider = style_manager.remove(self.get_style_context(), self.image_provider)
 
-        elif self.default_button['use_custom_image'] and self.default_button['image_file']:
-            self.get_style_context().add_class("sound-button-with-image") 
-            print(f"use default button image")
-            # Hole die Positionierungswerte
-            image_x = self.default_button['image_x']
-            image_y = self.default_button['image_y']
-            image_scale = self.default_button['image_scale']
-            # Prüfe ob AUTO Skalierung gewünscht ist
-            if image_scale == 0 or image_scale is None:
-                background_size = "contain"
-            else:
-                background_size = f"{image_scale}% auto"
-            # Hole den vollständigen Bildpfad
-            full_image_path = os.path.join(self.default_button['imagepfad_prefix'], self.default_button['image_file'])
-        
-            provider = Gtk.CssProvider()
-            provider.load_from_data(f"""
+    #########################################################################################################
+    def apply_image_css(self, full_image_path, image_x, image_y, image_scale, background_size):
+        """Wendet den geteilten CSS-Provider für das Hintergrundbild an"""
+        # Statt des Originals ein auf Buttongröße vorskaliertes Bild verwenden
+        thumb_width = self.model.defaults.button_width
+        thumb_height = self.model.defaults.button_height
+        if image_scale:                                   # Prozentuale Skalierung bezieht sich auf die Breite
+            thumb_width = max(1, int(thumb_width * image_scale / 100))
+        full_image_path = thumbnail_cache.get(full_image_path, thumb_width, thumb_height)
+        build_css = lambda: f"""
                 .sound-button-with-image {{
                     background-image: url("{full_image_path}");
                     background-repeat: no-repeat;
                     background-position: calc(100% - {image_x}px) {image_y}px;
                     background-size: {background_size};
                 }}
-            """.encode())
-            self.get_style_context().add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-        else:
-            self.get_style_context().remove_class("sound-button-with-image")    
+            """
+        key = ('image', full_image_path, image_x, image_y, background_size)
+        self.image_provider = style_manager.apply(self.get_style_context(), self.image_provider, key, build_css)
 
     #########################################################################################################
     def on_volume_changed(self, scale):
@@ -353,26 +306,100 @@ class Soundbutton(Gtk.EventBox):
         volume = scale.get_value()
         # Runde den Volumenwert auf eine Ganzzahl
         volume_int = int(round(volume))
-        if self.sound:
-            self.sound.set_volume(volume_int / 100.0)
-        self.button_config['volume'] = volume_int # Speichere den gerundeten Wert in der Konfiguration
+        playback_engine.set_volume(self, volume_int / 100.0)   # Der Sound wird geteilt, daher Lautstärke über den Kanal
+        self.model.set('volume', volume_int)      # Speichere den gerundeten Wert in der Konfiguration
         if self.parent and self.parent.config:
-            self.parent.config.mark_changed()  # Markiere Änderungen
+            self.parent.config.mark_changed(self.button_config, 'volume')  # Markiere Änderungen
+
+    #########################################################################################################
+    def get_sound_path(self):
+        """Liefert den vollständigen Pfad der Sounddatei mit Prefix"""
+        return self.model.sound_path
 
     #########################################################################################################
     def load_sound(self):
         """Lädt den Sound, falls noch nicht geladen"""
-        if not self.sound_loaded and 'audio_file' in self.button_config and self.button_config['audio_file']:
+        if not self.sound_loaded and self.model.audio_file:
             try:
-                # Konstruiere den vollständigen Pfad mit Prefix
-                full_sound_path = os.path.join(self.default_button['soundpfad_prefix'], self.button_config['audio_file'])
-                self.sound = pygame.mixer.Sound(full_sound_path)        # Lade den Sound
-                self.sound.set_volume(self.button_config['volume'] / 100.0)  # Setze die Lautstärke
+                self.sound = playback_engine.load(self.get_sound_path(), self.button_config)  # Stream oder gemeinsamer Cache
                 self.sound_loaded = True
                 print(f"Sound geladen: {self.button_config['audio_file']}")
             except Exception as e:
                 print(f"Fehler beim Laden des Sounds: {e}")
 
+    #########################################################################################################
+    def on_query_tooltip(self, widget, x, y, keyboard_mode, tooltip):
+        """Zeigt Länge, Format und Pegel aus dem Metadaten-Index, beim Abspielen auch die Position"""
+        if not self.model.sound_path:
+            return False
+        info = metadata_index.get(self.model.sound_path) or {}     # Nur Index, die Audiodatei wird nicht gelesen
+        duration_s = self.button_config.get('duration_s') or info.get('duration_s')
+        parts = []
+        if duration_s:
+            position_s = playback_engine.position_s(self)
+            if position_s is not None and not self.model.loop:
+                parts.append(f"{format_duration(min(position_s, duration_s))} / {format_duration(duration_s)}")
+            else:
+                parts.append(f"Länge {format_duration(duration_s)}")
+        sample_rate = self.button_config.get('sample_rate') or info.get('sample_rate')
+        if sample_rate:
+            channels = self.button_config.get('channels') or info.get('channels')
+            parts.append(f"{sample_rate} Hz" + {1: " Mono", 2: " Stereo"}.get(channels, ""))
+        if info.get('peak'):
+            parts.append(f"Spitze {20 * math.log10(info['peak']):.1f} dBFS")
+        if self.button_config.get('tags'):
+            parts.append("Tags: " + ", ".join(self.button_config['tags']))
+        tooltip.set_text(self.model.audio_file + ("\n" + " · ".join(parts) if parts else ""))
+        return True
+
+    #########################################################################################################
+    def get_priority(self):
+        """Priorität des Buttons für die Stimmenverdrängung (höher = wichtiger)"""
+        return self.model.priority
+
+    #########################################################################################################
+    def use_streaming(self, full_sound_path):
+        """Prüft, ob der Sound gestreamt werden soll (Button-Option 'stream' oder Größenschwelle des Boards)"""
+        return playback_engine.use_streaming(full_sound_path, self.button_config)
+
+    #########################################################################################################
+    def request_preload(self):
+        """Lässt den Sound im Hintergrund laden, ohne die Oberfläche zu blockieren"""
+        if self.sound_loaded or not self.model.audio_file:
+            return
+        if self.use_streaming(self.get_sound_path()):     # Streams müssen nicht vorab dekodiert werden
+            self.load_sound()
+            return
+        if self.loading:                                   # Alten Auftrag verwerfen, z.B. nach Dateiwechsel
+            sound_loader.cancel(self.preload_path, self.on_sound_preloaded)
+        self.loading = True
+        self.preload_path = self.get_sound_path()
+        # Vordere Buttons zuerst laden, sichtbare Buttons werden vom Soundboard nachträglich vorgezogen
+        sound_loader.request(self.preload_path, self.on_sound_preloaded, self.button_config.get('position', 1000))
+        self.update_status_icon()
+
+    #########################################################################################################
+    def on_sound_preloaded(self, sound, error):
+        """Übernimmt einen im Hintergrund geladenen Sound (läuft in der GTK-Hauptschleife)"""
+        if not self.loading:                               # Auftrag wurde inzwischen abgebrochen
+            return False
+        self.loading = False
+        if error is not None:
+            print(f"Fehler beim Vorladen des Sounds: {error}")
+        elif not self.sound_loaded:
+            self.sound = sound
+            self.sound_loaded = True
+            print(f"Sound vorgeladen: {self.button_config['audio_file']}")
+        self.update_status_icon()
+        return False                                       # idle-Callback nur einmal ausführen
+
+    #########################################################################################################
+    def cancel_preload(self):
+        """Bricht einen laufenden Hintergrund-Ladeauftrag ab"""
+        if self.loading:
+            sound_loader.cancel(self.preload_path, self.on_sound_preloaded)
+            self.loading = False
+
     #########################################################################################################
     def activate_button(self):
         """Aktiviert den Button visuell und spielt den Sound ab"""
@@ -387,78 +414,45 @@ class Soundbutton(Gtk.EventBox):
         self.is_pressed = True
 
         """Spielt den Sound ab"""
-        if 'audio_file' in self.button_config and self.button_config['audio_file']:
+        if self.model.audio_file:
             try:
                 # Lade den Sound wenn noch nicht geladen
                 if not self.sound_loaded:
                     self.load_sound()
                 
                 if self.sound:
-                    if self.button_config.get('loop', False):   # Wenn Endlosschleife
-                        self.channel = self.sound.play(loops=-1, fade_ms=self.fade_time_ms)
-                        if self.channel and self.channel.get_busy():
-                            self.parent.count_sounds += 1
-                            print(f"Sound gestartet (Loop). Aktive Sounds: {self.parent.count_sounds}")
-                    else:    
-                        self.channel = self.sound.play(loops=0, fade_ms=self.fade_time_ms)
-                        if self.channel and self.channel.get_busy():
-                            self.parent.count_sounds += 1
-                            print(f"Sound gestartet. Aktive Sounds: {self.parent.count_sounds}")
-                            self.timer_id = GLib.timeout_add(100, self.check_sound_end)
-                            self.current_length = self.sound.get_length()
-                            self.start_time = time.time()
-                            if self.fade_time_ms > 0:                          # Fade-Out nur wenn Fade-Time > 0
-                                fade_delay_ms = max(0, int((self.current_length * 1000) - self.fade_time_ms))
-                                print(f"fade_delay_ms: {fade_delay_ms}")
-                                GLib.timeout_add(fade_delay_ms, self.do_fade_out)
+                    # Die Engine überwacht auch Endlosschleifen, sie können verdrängt oder gestoppt werden
+                    channel = playback_engine.trigger(self, self.sound, volume=self.model.volume / 100.0,
+                                                      loop=self.model.loop, fade_ms=self.model.fade_time_ms,
+                                                      priority=self.get_priority(), on_finished=self.on_sound_finished)
+                    if channel is None:
+                        print("Kein freier Kanal verfügbar")
+                        # Button zurücksetzen, ohne den Sound-Zähler zu verändern
+                        style_context.remove_class("sound-button-active")
+                        style_context.add_class("sound-button")
+                        self.is_pressed = False
+                        return
+                    latency_meter.mark_started(self, channel)
+                    print(f"Sound gestartet{' (Loop)' if self.model.loop else ''}. Aktive Sounds: {playback_engine.active_count()}")
             except Exception as e:
                 print(f"Fehler beim Abspielen des Sounds: {e}")
 
     #########################################################################################################
-    def do_fade_out(self):
-        print(f"do_fade_out")
-        if self.channel and self.channel.get_busy():
-            self.channel.fadeout(self.fade_time_ms)
-        return False
-
-    #########################################################################################################
-    def check_sound_end(self):
-        """Prüft, ob der Sound zu Ende ist und deaktiviert den Button"""
-        if not self.sound or not self.channel:
-            if self.timer_id:
-                GLib.source_remove(self.timer_id)
-                self.timer_id = None
-            return False
-            
-        if self.button_config.get('loop', False): # Im Endlosschleifen-Modus nicht prüfen
-            return True
-            
-        if not self.channel.get_busy():           # Sound ist zu Ende
-            self.deactivate_button()              # Deaktiviere den Button
-            return False
-            
-        return True  # Timer weiterlaufen lassen
+    def on_sound_finished(self):
+        """Wird von der Abspiel-Engine aufgerufen, wenn der Kanal dieses Buttons nicht mehr spielt"""
+        self.deactivate_button()                  # Deaktiviere den Button
 
     #########################################################################################################
     def deactivate_button(self):
         """Deaktiviert den Button visuell und stoppt den Sound"""
-        if self.is_pressed:  # Nur wenn der Button aktiv war
-            self.parent.count_sounds -= 1
-            print(f"Sound gestoppt. Aktive Sounds: {self.parent.count_sounds}")
+        if playback_engine.stop(self):            # Blendet mit der Fade-Zeit aus, keine Endeprüfung mehr
+            print(f"Sound gestoppt. Aktive Sounds: {playback_engine.active_count()}")
             
-        if self.timer_id:
-            GLib.source_remove(self.timer_id)
-            self.timer_id = None
         # Button Visuell zurücksetzen    
         style_context = self.get_style_context()
         style_context.remove_class("sound-button-active")
         style_context.add_class("sound-button")
         self.is_pressed = False
-        # Stoppt den Sound
-        if self.sound and self.channel:
-            #self.channel.stop()
-            self.do_fade_out()
-            self.channel = None
 
     #########################################################################################################
     def on_motion_notify(self, widget, event):
@@ -488,6 +482,7 @@ class Soundbutton(Gtk.EventBox):
             if self.is_pressed:           # Zurück zum normalen Zustand
                 self.deactivate_button()  # Komplette Deaktivierung des Buttons                
             else:                         # Zum gedrückten Zustand wechseln
+                latency_meter.mark_trigger(self)
                 self.activate_button()    # Komplette Aktivierung des Buttons
         self.drag_started = False
         self.click_position = None
@@ -550,6 +545,7 @@ class Soundbutton(Gtk.EventBox):
         if uris:
             print("Elementanzahl: ", len(uris))
             print(f"uris: {uris}")
+            from urllib.parse import unquote                                       # Nur für Drag & Drop gebraucht
             for uri in uris:
 
                 path = unquote(uri.replace("file://", "").strip())                 # Datei-URI -> Pfad dekodieren
@@ -558,10 +554,10 @@ class Soundbutton(Gtk.EventBox):
                 if path.endswith(('.jpg', '.png')):                                # Bilddatei erkannt
                     print("Bilddatei:", path)
                     if not self.button_config.get('image_file', False):
-                        self.button_config['image_file'] = path
+                        self.model.set('image_file', path)
                         self.apply_image()
                         if self.parent and self.parent.config:
-                            self.parent.config.mark_changed()                      # Markiere Änderungen
+                            self.parent.config.mark_changed(self.button_config, 'image_file')  # Markiere Änderungen
                 elif path.endswith(('.mp3', '.wav')):                              # Audio-Datei erkannt
                     print("Audio-Datei:", path)
                     if not self.button_config.get('audio_file', False):
@@ -569,7 +565,7 @@ class Soundbutton(Gtk.EventBox):
                         self.add_sound(path)
                         self.update_status_icon()
                         if self.parent and self.parent.config:
-                            self.parent.config.mark_changed()                      # Markiere Änderungen
+                            self.parent.config.mark_changed(self.button_config, 'audio_file')  # Markiere Änderungen
                 else:
                     print("Nicht unterstützter Dateityp.")
         else:
@@ -585,8 +581,9 @@ class Soundbutton(Gtk.EventBox):
                         current_board = os.path.splitext(os.path.basename(self.parent.config.config_file))[0] if self.parent.config.config_file else "unnamed_soundboard"
                         
                         if source_board == current_board:
-                            # Internes Drag & Drop: Nur Position ändern
-                            source_position = portable_config['position']
+                            # Internes Drag & Drop: Nur Position ändern (Position über die stabile ID)
+                            source_button = self.parent.config.get_button(portable_config.get('id'))
+                            source_position = source_button['position'] if source_button else portable_config['position']
                             target_position = self.button_config['position']
                             
                             if source_position != target_position:
@@ -665,6 +662,17 @@ class Soundbutton(Gtk.EventBox):
         item3.connect("activate", self.on_change_text)
         menu.append(item3)
         
+        # Menüeintrag "Tags bearbeiten"
+        item_tags = Gtk.MenuItem(label="Tags bearbeiten")
+        item_tags.connect("activate", self.on_edit_tags)
+        menu.append(item_tags)
+        
+        # Menüeintrag "In Bibliothek übernehmen" nur für Buttons mit Sound, die noch nicht in der Bibliothek sind
+        if self.button_config.get('audio_file') and self.button_config.get('library_id') is None:
+            item_library = Gtk.MenuItem(label="In Bibliothek übernehmen")
+            item_library.connect("activate", self.on_add_to_library)
+            menu.append(item_library)
+        
         # Menüeintrag "Text-Farbe ändern"
         item6 = Gtk.MenuItem(label="Text-Farbe ändern")
         item6.connect("activate", self.on_change_text_color)
@@ -716,19 +724,19 @@ class Soundbutton(Gtk.EventBox):
         # Rote Textfarbe für den "Button entfernen"-Eintrag
         item11.get_child().get_style_context().add_class("delete-button-menu-item")
         
-        # CSS für die rote Textfarbe
-        css_provider = Gtk.CssProvider()
-        css_provider.load_from_data("""
+        # CSS für die rote Textfarbe, der geteilte Provider wird nur einmal für den Bildschirm registriert
+        if 'delete-menu-item' not in style_manager.providers:
+            css_provider = style_manager.get_provider('delete-menu-item', lambda: """
             .delete-button-menu-item {
                 color: #a51d2d;
                 font-weight: bold;
             }
-        """.encode())
-        Gtk.StyleContext.add_provider_for_screen(
-            Gdk.Screen.get_default(),
-            css_provider,
-            Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-        )
+        """)
+            Gtk.StyleContext.add_provider_for_screen(
+                Gdk.Screen.get_default(),
+                css_provider,
+                Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+            )
 
         # Event-Handler für Klicks außerhalb des Menüs
         menu.connect("deactivate", self.on_menu_deactivate)
@@ -780,32 +788,38 @@ class Soundbutton(Gtk.EventBox):
     def add_sound(self, full_path):
         """fügt eine Sounddatei hinzu"""
         rel_path = os.path.relpath(full_path, os.path.abspath(self.default_button['soundpfad_prefix']))
-        self.button_config['audio_file'] = rel_path
+        self.model.set('audio_file', rel_path)
         print(f"Sounddatei ausgewählt: {rel_path}")
+        info = metadata_index.lookup(full_path) or {}   # Länge, Abtastrate und Kanäle aus Index oder Dateikopf
+        for key in ('duration_s', 'sample_rate', 'channels'):
+            if info.get(key):
+                self.button_config[key] = info[key]
+            else:
+                self.button_config.pop(key, None)
         
         # Lade den neuen Sound nur wenn preload=True
-        if self.button_config.get('preload', False):
-            self.load_sound()
-        else:
-            self.sound_loaded = False
-            self.sound = None
+        self.cancel_preload()
+        self.sound_loaded = False
+        self.sound = None
+        if self.model.preload:
+            self.request_preload()
             
         self.update_status_icon()                 # Aktualisiere das Status-Icon
         if self.parent and self.parent.config:
             print(f"Markiere Änderungen am Soundboard")
-            self.parent.config.mark_changed()  # Markiere Änderungen
+            self.parent.config.mark_changed(self.button_config, 'audio_file', 'duration_s', 'sample_rate', 'channels')  # Markiere Änderungen
 
     #########################################################################################################
     def on_toggle_loop(self, widget):
         """Schaltet die Endlosschleife ein oder aus"""
-        self.button_config['loop'] = not self.button_config.get('loop', False)
-        print(f"Endlos wiederholen: {'Ein' if self.button_config['loop'] else 'Aus'}")
+        self.model.set('loop', not self.model.loop)
+        print(f"Endlos wiederholen: {'Ein' if self.model.loop else 'Aus'}")
         self.update_status_icon()                 # Aktualisiere das Status-Icon
         # Menü explizit schließen
         menu = widget.get_parent()
         menu.popdown()
         if self.parent and self.parent.config:
-            self.parent.config.mark_changed()  # Markiere Änderungen
+            self.parent.config.mark_changed(self.button_config, 'loop')  # Markiere Änderungen
 
     #########################################################################################################
     def on_change_text(self, widget):
@@ -825,15 +839,50 @@ class Soundbutton(Gtk.EventBox):
         if response == Gtk.ResponseType.OK:
             new_text = entry.get_text()
             formatted_text = new_text.replace("\\n", "\n")
-            self.button_config['text'] = formatted_text
+            self.model.set('text', formatted_text)
             self.text_label.set_text(formatted_text)                     # Zeige den Text mit echten Zeilenumbrüchen im Label
             print(f"Neuer Button-Text: {formatted_text}")
             if self.parent and self.parent.config:
-                self.parent.config.mark_changed()  # Markiere Änderungen
+                self.parent.config.mark_changed(self.button_config, 'text')  # Markiere Änderungen
+        
+        dialog.destroy()
+        widget.get_parent().popdown()
+
+    #########################################################################################################
+    def on_edit_tags(self, widget):
+        """Öffnet einen Dialog zum Bearbeiten der Tags (kommagetrennt), nach denen die Suche filtert"""
+        dialog = Gtk.Dialog(title="Tags bearbeiten", parent=self.get_toplevel(), flags=0)
+        dialog.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OK, Gtk.ResponseType.OK)
+        
+        # Texteingabefeld
+        entry = Gtk.Entry()
+        entry.set_text(", ".join(self.button_config.get('tags', [])))
+        entry.set_placeholder_text("z.B. Applaus, Intro, Lacher")
+        entry.connect("activate", lambda e: dialog.response(Gtk.ResponseType.OK))  # Enter-Taste als OK behandeln
+        dialog.get_content_area().pack_start(entry, True, True, 0)
+        
+        dialog.show_all()
+        response = dialog.run()
+        
+        if response == Gtk.ResponseType.OK:
+            tags = [tag.strip() for tag in entry.get_text().split(",") if tag.strip()]
+            self.button_config['tags'] = tags
+            print(f"Neue Tags: {tags}")
+            if self.parent and self.parent.config:
+                self.parent.config.mark_changed(self.button_config, 'tags')  # Aktualisiert auch den Suchindex
+                self.parent.refresh_search()
         
         dialog.destroy()
         widget.get_parent().popdown()
 
+    #########################################################################################################
+    def on_add_to_library(self, widget):
+        """Übernimmt den Button in die Sound-Bibliothek, andere Boards können dann auf ihn verweisen"""
+        if self.parent and self.parent.config:
+            library_id = self.parent.config.add_to_library(self.button_config)
+            print(f"In Bibliothek übernommen: {self.model.audio_file} (library_id {library_id})")
+        widget.get_parent().popdown()
+
     #########################################################################################################
     def on_change_color(self, widget):
         """Öffnet einen Farbauswahldialog"""
@@ -854,13 +903,13 @@ class Soundbutton(Gtk.EventBox):
         if response == Gtk.ResponseType.OK:
             color = dialog.get_rgba()
             self.button_config['background_color'] = f"#{int(color.red * 255):02x}{int(color.green * 255):02x}{int(color.blue * 255):02x}"
-            self.button_config['use_custom_bg_color'] = True  # Benutzerdefinierte Farbe aktivieren
+            self.model.set('use_custom_bg_color', True)  # Benutzerdefinierte Farbe aktivieren
             print(f"Neue Button-Farbe: {self.button_config['background_color']}")
             
             # Wende die neue Farbe an
             self.apply_colors_and_css()
             if self.parent and self.parent.config:
-                self.parent.config.mark_changed()  # Markiere Änderungen
+                self.parent.config.mark_changed(self.button_config, 'background_color', 'use_custom_bg_color')  # Markiere Änderungen
         
         dialog.destroy()
         widget.get_parent().popdown()
@@ -868,11 +917,13 @@ class Soundbutton(Gtk.EventBox):
     #########################################################################################################
     def on_remove_color(self, widget):
         """Entfernt die benutzerdefinierte Farbe"""
-        self.button_config['use_custom_bg_color'] = False
+        self.model.set('use_custom_bg_color', False)
         print("Button-Farbe entfernt")
         
         # Wende die Standardfarbe an
         self.apply_colors_and_css()
+        if self.parent and self.parent.config:
+            self.parent.config.mark_changed(self.button_config, 'use_custom_bg_color')  # Markiere Änderungen
         
         widget.get_parent().popdown()
 
@@ -896,13 +947,13 @@ class Soundbutton(Gtk.EventBox):
         if response == Gtk.ResponseType.OK:
             color = dialog.get_rgba()
             self.button_config['text_color'] = f"#{int(color.red * 255):02x}{int(color.green * 255):02x}{int(color.blue * 255):02x}"
-            self.button_config['use_custom_text_color'] = True  # Benutzerdefinierte Textfarbe aktivieren
+            self.model.set('use_custom_text_color', True)  # Benutzerdefinierte Textfarbe aktivieren
             print(f"Neue Text-Farbe: {self.button_config['text_color']}")
             
             # Wende die neue Farbe an
             self.apply_colors_and_css()
             if self.parent and self.parent.config:
-                self.parent.config.mark_changed()  # Markiere Änderungen
+                self.parent.config.mark_changed(self.button_config, 'text_color', 'use_custom_text_color')  # Markiere Änderungen
         
         dialog.destroy()
         widget.get_parent().popdown()
@@ -910,11 +961,13 @@ class Soundbutton(Gtk.EventBox):
     #########################################################################################################
     def on_remove_text_color(self, widget):
         """Entfernt die benutzerdefinierte Textfarbe"""
-        self.button_config['use_custom_text_color'] = False
+        self.model.set('use_custom_text_color', False)
         print("Text-Farbe entfernt")
         
         # Wende die Standardfarbe an
         self.apply_colors_and_css()
+        if self.parent and self.parent.config:
+            self.parent.config.mark_changed(self.button_config, 'use_custom_text_color')  # Markiere Änderungen
         
         widget.get_parent().popdown()
 
@@ -931,6 +984,7 @@ class Soundbutton(Gtk.EventBox):
             "button_radius":                 10,
             "audio_file":                    "",
             "volume":                        50,
+            "priority":                       0,
             "loop":                       False,
             "text":                "New Button",
             "use_custom_text_position":    True,
@@ -990,13 +1044,13 @@ class Soundbutton(Gtk.EventBox):
             # Speichere den relativen Pfad zum Bild
             full_path = dialog.get_filename()
             rel_path = os.path.relpath(full_path, os.path.abspath(self.default_button['imagepfad_prefix']))
-            self.button_config['image_file'] = rel_path
+            self.model.set('image_file', rel_path)
             print(f"Bild ausgewählt: {rel_path}")
             
             # Wende das neue Bild an
             self.apply_image()
             if self.parent and self.parent.config:
-                self.parent.config.mark_changed()  # Markiere Änderungen
+                self.parent.config.mark_changed(self.button_config, 'image_file')  # Markiere Änderungen
         
         dialog.destroy()
         widget.get_parent().popdown()
@@ -1005,12 +1059,14 @@ class Soundbutton(Gtk.EventBox):
     def on_remove_image(self, widget):
         """Entfernt das eingestellte Bild"""
         self.button_config['use_custom_image'] = False
-        self.button_config['image_file'] = ""
+        self.model.set('image_file', "")
         print("Bild entfernt")
         
         # Entferne die Bildklasse und wende die Änderungen an
         self.get_style_context().remove_class("sound-button-with-image")
         self.apply_image()
+        if self.parent and self.parent.config:
+            self.parent.config.mark_changed(self.button_config, 'use_custom_image', 'image_file')  # Markiere Änderungen
         
         widget.get_parent().popdown()
     
@@ -1058,6 +1114,8 @@ class Soundbutton(Gtk.EventBox):
         """Aktualisiert das Status-Icon basierend auf den Button-Eigenschaften"""
         if self.button_config.get('audio_file', '') == '':
             self.status_icon.set_text("🔇")
+        elif self.loading:
+            self.status_icon.set_text("⏳")                 # Sound wird im Hintergrund geladen
         elif self.button_config.get('loop', False):
             self.status_icon.set_text("∞")
         else:
@@ -1108,6 +1166,7 @@ class Soundbutton(Gtk.EventBox):
     #########################################################################################################
     def delete_button(self):
         """Löscht den Button"""
+        self.cancel_preload()
         self.deactivate_button()
         # Entferne die CSS-Klassen
         style_context = self.get_style_context()
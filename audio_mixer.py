@@ -0,0 +1,164 @@
+import math
+import threading
+import time
+
+# pygame wird erst bei Bedarf importiert (Import und Mixer-Start kosten spürbar Startzeit)
+
+# Audio-Profile überschreiben die Mixer-Einstellungen aus dem Window-Abschnitt
+AUDIO_PROFILES = {
+    "default": {},
+    "low_latency": {
+        "mixer_buffer":        128,   # Kleiner Puffer = kürzere Zeit zwischen Auslösen und Hören
+        "prewarm_channels":   True    # Alle Kanäle einmal stumm anspielen
+    }
+}
+
+#############################################################################################################
+def get_mixer_settings(window_config):
+    """Liefert die Mixer-Einstellungen des Boards mit angewendetem Audio-Profil"""
+    profile_name = window_config.get('audio_profile', 'default')
+    if profile_name not in AUDIO_PROFILES:
+        print(f"Unbekanntes Audio-Profil '{profile_name}', verwende 'default'")
+        profile_name = 'default'
+    settings = dict(window_config)
+    settings.update(AUDIO_PROFILES[profile_name])
+    return settings
+
+#############################################################################################################
+def init_mixer(window_config):
+    """Initialisiert den pygame-Mixer mit den Einstellungen aus dem Window-Abschnitt"""
+    import pygame
+    settings = get_mixer_settings(window_config)
+    pygame.mixer.pre_init(
+        frequency=settings['mixer_frequency'],  # Abtastrate in Hz
+        size=settings['mixer_size'],            # Sample-Format, negativ = vorzeichenbehaftet (-16 = 16 Bit)
+        channels=settings['mixer_channels'],    # 1 = Mono, 2 = Stereo
+        buffer=settings['mixer_buffer']         # Puffergröße in Samples
+    )
+    pygame.mixer.init()
+    pygame.mixer.set_num_channels(settings['mixer_num_channels'])
+    if settings.get('prewarm_channels', False):
+        prewarm_channels()
+    print(f"Mixer initialisiert: {pygame.mixer.get_init()}, Kanäle: {pygame.mixer.get_num_channels()}, "
+          f"Puffer: {settings['mixer_buffer']}")
+
+#############################################################################################################
+def prewarm_channels():
+    """Spielt auf jedem Kanal kurz Stille ab, damit Audiogerät und Kanäle beim ersten Auslösen bereit sind"""
+    import pygame
+    frequency, sample_format, channels = pygame.mixer.get_init()
+    frame_bytes = channels * (abs(sample_format) // 8)
+    silence = pygame.mixer.Sound(buffer=bytes(frame_bytes * (frequency // 100)))  # 10ms Stille
+    silence.set_volume(0)
+    for i in range(pygame.mixer.get_num_channels()):
+        pygame.mixer.Channel(i).play(silence)
+    pygame.mixer.stop()
+
+#############################################################################################################
+class MixerStarter:
+    """Startet den Mixer verzögert, damit das Fenster sofort erscheint.
+
+    Das Board hinterlegt mit configure() seine Einstellungen; gestartet wird im ersten Leerlauf nach
+    dem Fensteraufbau oder spätestens beim ersten Zugriff auf den Mixer (ensure). Das Soundboard hält
+    die Lade-Threads bis dahin an (sound_loader.hold), damit kein Vorladen den Start vorzieht.
+    """
+    def __init__(self):
+        self.window_config = None
+        self.ready         = False
+        self.lock          = threading.Lock()
+
+    #########################################################################################################
+    def configure(self, window_config):
+        """Merkt sich die Mixer-Einstellungen des Boards"""
+        self.window_config = window_config
+
+    #########################################################################################################
+    def ensure(self):
+        """Startet den Mixer, falls er noch nicht läuft; gibt True zurück, wenn er bereit ist"""
+        if self.ready:
+            return True
+        with self.lock:
+            if not self.ready:
+                if self.window_config is not None:
+                    init_mixer(self.window_config)
+                else:                                         # z.B. einzelner Button ohne Board
+                    import pygame
+                    pygame.mixer.init()
+                self.ready = True
+        return True
+
+    #########################################################################################################
+    def quit(self):
+        """Beendet den Mixer, falls er gestartet wurde"""
+        with self.lock:
+            if self.ready:
+                import pygame
+                pygame.mixer.quit()
+                self.ready = False
+
+# Gemeinsamer, verzögerter Mixer-Start
+mixer_starter = MixerStarter()
+
+#############################################################################################################
+class LatencyMeter:
+    """Misst die Auslösezeit (Loslassen der Maustaste bis channel.play() zurückkehrt) und schätzt die Latenz bis hörbar.
+
+    pygame meldet nicht, wann ein Sound tatsächlich am Audiogerät ankommt. Gemessen wird daher nur der
+    Python-Anteil; dazu kommen bis zu zwei Pufferlängen des Mixers (Warten auf den nächsten Mischdurchlauf
+    und Ausgabe des Puffers), berechnet aus mixer_buffer / mixer_frequency. Genau diesen Anteil verkürzt
+    das Audio-Profil low_latency.
+    """
+    def __init__(self):
+        self.enabled  = False
+        self.pending  = {}    # Button -> Zeitpunkt des Auslösens (perf_counter)
+        self.samples  = []    # Gemessene Auslösezeiten in ms
+
+    #########################################################################################################
+    def mark_trigger(self, button):
+        """Merkt sich den Zeitpunkt des Auslösens"""
+        if self.enabled:
+            self.pending[button] = time.perf_counter()
+
+    #########################################################################################################
+    def mark_started(self, button, channel):
+        """Beendet die Messung, sobald der Kanal des Buttons spielt"""
+        start = self.pending.pop(button, None)
+        if start is None or not channel or not channel.get_busy():
+            return
+        dispatch_ms = (time.perf_counter() - start) * 1000
+        self.samples.append(dispatch_ms)
+        print(f"Auslösezeit: {dispatch_ms:.2f} ms")
+
+    #########################################################################################################
+    def percentile(self, percent):
+        """Perzentil der gemessenen Auslösezeiten (Nearest-Rank-Verfahren)"""
+        ordered = sorted(self.samples)
+        rank = math.ceil(percent / 100.0 * len(ordered))
+        return ordered[max(0, rank - 1)]
+
+    #########################################################################################################
+    def buffer_ms(self):
+        """Dauer eines Mixer-Puffers in ms nach den Einstellungen des Boards (samt Audio-Profil), None wenn unbekannt"""
+        if mixer_starter.window_config is None:
+            return None
+        settings = get_mixer_settings(mixer_starter.window_config)
+        return settings['mixer_buffer'] * 1000.0 / settings['mixer_frequency']
+
+    #########################################################################################################
+    def report(self):
+        """Gibt p50/p99 der Auslösezeiten und die daraus geschätzte Latenz bis hörbar aus"""
+        if not self.enabled:
+            return
+        if not self.samples:
+            print("Latenzmessung: keine Messwerte")
+            return
+        p50, p99 = self.percentile(50), self.percentile(99)
+        print(f"Auslösezeit bis channel.play(): {len(self.samples)} Auslösungen, "
+              f"p50 = {p50:.2f} ms, p99 = {p99:.2f} ms, max = {max(self.samples):.2f} ms")
+        buffer_ms = self.buffer_ms()
+        if buffer_ms is not None:
+            print(f"Mixer-Puffer: {buffer_ms:.2f} ms, geschätzte Latenz bis hörbar (Auslösezeit + 2 Puffer): "
+                  f"p50 <= {p50 + 2 * buffer_ms:.2f} ms, p99 <= {p99 + 2 * buffer_ms:.2f} ms")
+
+# Gemeinsame Latenzmessung für alle Buttons
+latency_meter = LatencyMeter()
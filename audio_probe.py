@@ -0,0 +1,157 @@
+import os
+import struct
+
+#############################################################################################################
+# Liest Länge, Abtastrate und Kanalzahl aus dem Dateikopf von WAV, FLAC, Ogg (Vorbis/Opus) und MP3,
+# ohne die Datei zu dekodieren. Gelesen werden nur wenige Kilobyte am Anfang (und bei Ogg am Ende),
+# daher ist das auch für große Sample-Sammlungen im Thread-Pool schnell.
+#############################################################################################################
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.oga', '.opus', '.flac')
+
+#############################################################################################################
+def probe(path):
+    """Liefert {"duration_s", "sample_rate", "channels"} oder None, wenn die Datei nicht erkannt wird"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(12)
+            f.seek(0)
+            if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+                info = probe_wav(f)
+            elif head[:4] == b'fLaC':
+                info = probe_flac(f)
+            elif head[:4] == b'OggS':
+                info = probe_ogg(f, os.fstat(f.fileno()).st_size)
+            else:
+                info = probe_mp3(f, os.fstat(f.fileno()).st_size)
+    except (OSError, struct.error, ValueError, ZeroDivisionError):
+        return None
+    if info is None:
+        return None
+    duration_s, sample_rate, channels = info
+    return {"duration_s": round(duration_s, 3), "sample_rate": sample_rate, "channels": channels}
+
+#############################################################################################################
+def probe_wav(f):
+    """RIFF/WAVE: fmt-Chunk für Format, Größe des data-Chunks für die Länge"""
+    f.seek(12)
+    sample_rate = channels = block_align = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, size = struct.unpack('<4sI', chunk)
+        if chunk_id == b'fmt ':
+            fmt = f.read(size)
+            channels, sample_rate, _, block_align = struct.unpack_from('<HIIH', fmt, 2)
+            f.seek(size % 2, 1)                                # Chunks sind auf gerade Längen aufgefüllt
+        elif chunk_id == b'data':
+            if not sample_rate or not block_align:
+                return None
+            return size / block_align / sample_rate, sample_rate, channels
+        else:
+            f.seek(size + size % 2, 1)
+
+#############################################################################################################
+def probe_flac(f):
+    """FLAC: STREAMINFO ist immer der erste Metadatenblock"""
+    f.seek(4)
+    header = f.read(4)
+    if len(header) < 4 or header[0] & 0x7f != 0:              # Blocktyp 0 = STREAMINFO
+        return None
+    info = f.read(34)
+    if len(info) < 18:
+        return None
+    bits = int.from_bytes(info[10:18], 'big')                  # 20 Bit Rate, 3 Bit Kanäle-1, 5 Bit Bittiefe-1, 36 Bit Samples
+    sample_rate = bits >> 44
+    channels = ((bits >> 41) & 0x7) + 1
+    total_samples = bits & 0xfffffffff
+    if not sample_rate:
+        return None
+    return total_samples / sample_rate, sample_rate, channels
+
+#############################################################################################################
+def probe_ogg(f, file_size):
+    """Ogg Vorbis/Opus: Format aus dem ersten Paket, Länge aus der Granulposition der letzten Seite"""
+    page = f.read(4096)
+    segments = page[26]
+    packet = page[27 + segments:]
+    if packet[:7] == b'\x01vorbis':
+        channels = packet[11]
+        sample_rate = struct.unpack_from('<I', packet, 12)[0]
+        granule_rate, pre_skip = sample_rate, 0
+    elif packet[:8] == b'OpusHead':
+        channels = packet[9]
+        pre_skip = struct.unpack_from('<H', packet, 10)[0]
+        sample_rate = struct.unpack_from('<I', packet, 12)[0] or 48000
+        granule_rate = 48000                                   # Opus zählt Granulpositionen immer mit 48 kHz
+    else:
+        return None
+    f.seek(max(0, file_size - 65536))
+    tail = f.read()
+    last = tail.rfind(b'OggS')
+    if last < 0 or last + 14 > len(tail):
+        return None
+    granule = struct.unpack_from('<q', tail, last + 6)[0]
+    if not granule_rate or granule < 0:
+        return None
+    return max(0, granule - pre_skip) / granule_rate, sample_rate, channels
+
+#############################################################################################################
+MP3_BITRATES = {                                               # kbit/s je (MPEG-1?, Layer) nach Bitraten-Index
+    (True, 1):  (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2):  (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3):  (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+#############################################################################################################
+def probe_mp3(f, file_size):
+    """MP3: ID3v2 überspringen, ersten Frame-Header lesen; Länge aus Xing/Info-Header oder der Bitrate"""
+    start = 0
+    head = f.read(10)
+    if head[:3] == b'ID3':                                     # ID3v2-Größe ist "syncsafe" (7 Bit je Byte)
+        start = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+    f.seek(start)
+    data = f.read(16384)
+    for offset in range(len(data) - 4):
+        if data[offset] != 0xff or data[offset + 1] & 0xe0 != 0xe0:
+            continue
+        header = int.from_bytes(data[offset:offset + 4], 'big')
+        version = (header >> 19) & 0x3                         # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+        layer = 4 - ((header >> 17) & 0x3)
+        bitrate_index = (header >> 12) & 0xf
+        rate_index = (header >> 10) & 0x3
+        if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+            continue                                           # Ungültiger Header, weitersuchen
+        mpeg1 = version == 3
+        bitrate = MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+        sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+        channels = 1 if (header >> 6) & 0x3 == 3 else 2
+        samples_per_frame = 384 if layer == 1 else (1152 if mpeg1 or layer == 2 else 576)
+
+        # Xing/Info-Header (VBR) steht im ersten Frame nach den Seiteninformationen
+        side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+        xing = offset + 4 + side_info
+        if data[xing:xing + 4] in (b'Xing', b'Info') and struct.unpack_from('>I', data, xing + 4)[0] & 0x1:
+            frames = struct.unpack_from('>I', data, xing + 8)[0]
+            return frames * samples_per_frame / sample_rate, sample_rate, channels
+        if data[offset + 36:offset + 40] == b'VBRI':           # Fraunhofer-VBR-Header
+            frames = struct.unpack_from('>I', data, offset + 36 + 14)[0]
+            return frames * samples_per_frame / sample_rate, sample_rate, channels
+
+        audio_bytes = file_size - start - offset               # Konstante Bitrate: Länge aus der Dateigröße
+        f.seek(max(0, file_size - 128))
+        if f.read(3) == b'TAG':                                # ID3v1 am Dateiende nicht mitzählen
+            audio_bytes -= 128
+        return audio_bytes * 8 / bitrate, sample_rate, channels
+    return None
+
+#############################################################################################################
+if __name__ == '__main__':
+    import sys
+    # python3 audio_probe.py <datei> [...]
+    for path in sys.argv[1:]:
+        print(f"{path}: {probe(path)}")
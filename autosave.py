@@ -0,0 +1,169 @@
+import json
+import os
+import time
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib
+from config_writer import config_writer, snapshot_config
+
+#############################################################################################################
+class AutosaveService:
+    """Sichert ungespeicherte Änderungen periodisch in einen Ring mit fester Anzahl von Dateien.
+
+    Die Sicherungen heißen <Board>_autosave_<1..N>.json und liegen neben der Konfiguration.
+    Boards mit Änderungsjournal (siehe config_journal) brauchen keine Snapshots, der Ring wird
+    daher nur für neue oder schreibgeschützte Konfigurationen beschrieben. Es wird reihum
+    überschrieben, sodass nie mehr als N Dateien entstehen. Geschrieben wird über den
+    Hintergrund-Writer und nur, wenn sich seit der letzten Sicherung etwas geändert hat.
+    Bei sauberem Beenden werden die Slots gelöscht (close), angeboten wird also nur nach einem Absturz.
+    """
+    def __init__(self, config, slots=3, interval_s=60):
+        self.config      = config
+        self.slots       = max(1, int(slots))
+        self.interval_s  = max(1, int(interval_s))
+        self.timer_id    = None
+        self.next_slot   = 0       # Index des nächsten zu überschreibenden Slots
+        self.saved_count = None    # Änderungszähler beim letzten Autosave
+        self.start_paths = self.slot_paths()   # Ring beim Start, z.B. des unbenannten Boards vor "Speichern unter"
+        newest = self.find_newest()
+        if newest is not None:     # Ring dort fortsetzen, wo die letzte Sitzung aufgehört hat
+            self.next_slot = (self.slot_paths().index(newest[0]) + 1) % self.slots
+
+    #########################################################################################################
+    def slot_paths(self):
+        """Pfade aller Slots für die aktuelle Konfigurationsdatei"""
+        if self.config.config_file:
+            base_name = os.path.splitext(os.path.basename(self.config.config_file))[0]
+            base_dir = os.path.dirname(self.config.config_file)
+        else:
+            base_name = "unnamed_soundboard"
+            base_dir = os.getcwd()
+        return [os.path.join(base_dir, f"{base_name}_autosave_{i + 1}.json") for i in range(self.slots)]
+
+    #########################################################################################################
+    def start(self):
+        """Startet die periodische Sicherung"""
+        if self.timer_id is None:
+            self.timer_id = GLib.timeout_add_seconds(self.interval_s, self.tick)
+
+    #########################################################################################################
+    def stop(self):
+        """Hält die periodische Sicherung an"""
+        if self.timer_id is not None:
+            GLib.source_remove(self.timer_id)
+            self.timer_id = None
+
+    #########################################################################################################
+    def tick(self):
+        """Timer-Callback: sichert nur, wenn es ungespeicherte und noch nicht gesicherte Änderungen gibt"""
+        if self.config.journal.active():                      # Änderungen stehen bereits im Journal
+            return True
+        if self.config.has_changes and self.config.change_count != self.saved_count:
+            self.save_now()
+        return True  # Timer weiterlaufen lassen
+
+    #########################################################################################################
+    def save_now(self):
+        """Schreibt den aktuellen Stand in den nächsten Slot des Rings (im Hintergrund)"""
+        data = snapshot_config(self.config.data, self.config.inherited)
+        data['Autosave'] = {"saved_at": time.time(), "config_file": self.config.config_file or ""}
+        path = self.slot_paths()[self.next_slot]
+        config_writer.submit(path, data)
+        self.next_slot = (self.next_slot + 1) % self.slots
+        self.saved_count = self.config.change_count
+        print(f"Autosave geplant: {path}")
+        return path
+
+    #########################################################################################################
+    def read_slot(self, path):
+        """Liest einen Slot, liefert die Daten oder None, wenn er fehlt oder ungültig ist"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get('buttons'), list) or not isinstance(data.get('Window'), dict):
+            return None
+        if not isinstance(data.get('Autosave'), dict):
+            return None
+        return data
+
+    #########################################################################################################
+    def find_newest(self):
+        """Liefert (Pfad, Daten) des neuesten gültigen Slots oder None"""
+        newest = None
+        for path in self.slot_paths():
+            data = self.read_slot(path)
+            if data is None:
+                continue
+            if newest is None or data['Autosave'].get('saved_at', 0) > newest[1]['Autosave'].get('saved_at', 0):
+                newest = (path, data)
+        return newest
+
+    #########################################################################################################
+    def find_recoverable(self):
+        """Liefert (Pfad, Daten) des neuesten Slots, falls er jünger als die gespeicherte Konfiguration ist"""
+        newest = self.find_newest()
+        if newest is None:
+            return None
+        try:
+            saved_mtime = os.path.getmtime(self.config.config_file) if self.config.config_file else 0
+        except OSError:
+            saved_mtime = 0
+        if newest[1]['Autosave'].get('saved_at', 0) <= saved_mtime:
+            return None                                        # Datei wurde danach regulär gespeichert
+        return newest
+
+    #########################################################################################################
+    def discard(self):
+        """Löscht alle Slots dieses Boards (auch die unter dem Namen beim Start)"""
+        for path in set(self.slot_paths()) | set(self.start_paths):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    #########################################################################################################
+    def close(self, clean):
+        """Beim Beenden: ohne ungespeicherte Änderungen (clean) die Slots löschen, sonst für die Wiederherstellung behalten"""
+        self.stop()
+        if clean:
+            config_writer.flush()                              # Geplante Sicherungen nicht nach dem Löschen schreiben
+            self.discard()
+
+    #########################################################################################################
+    def offer_recovery(self, parent_window=None):
+        """Fragt beim Start, ob eine neuere Sicherung wiederhergestellt werden soll; True, wenn wiederhergestellt"""
+        recoverable = self.find_recoverable()
+        if recoverable is None:
+            return False
+        path, data = recoverable
+        saved_at = time.strftime('%d.%m.%Y %H:%M:%S', time.localtime(data['Autosave']['saved_at']))
+
+        dialog = Gtk.MessageDialog(
+            transient_for=parent_window,
+            flags=0,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.NONE,
+            text="Es gibt eine automatische Sicherung mit ungespeicherten Änderungen."
+        )
+        dialog.format_secondary_text(f"Sicherung vom {saved_at}\n{path}\n\nSoll sie wiederhergestellt werden?")
+        dialog.add_buttons(
+            "Später", Gtk.ResponseType.CANCEL,
+            "Verwerfen", Gtk.ResponseType.NO,
+            "Wiederherstellen", Gtk.ResponseType.YES
+        )
+        response = dialog.run()
+        dialog.destroy()
+
+        if response == Gtk.ResponseType.YES:
+            del data['Autosave']
+            self.config.restore(data)
+            self.saved_count = self.config.change_count        # Gerade geladen, noch nichts Neues zu sichern
+            print(f"Autosave wiederhergestellt: {path}")
+            return True
+        if response == Gtk.ResponseType.NO:
+            self.discard()
+            self.next_slot = 0
+            print("Autosaves verworfen")
+        return False
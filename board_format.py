@@ -0,0 +1,159 @@
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from config_writer import atomic_write_bytes, atomic_write_json
+
+#############################################################################################################
+# Kompaktes Board-Format (.sbb)
+#
+# Aufbau: 4 Byte Kennung "SBB1", 1 Byte Version, 4 Byte Länge der unkomprimierten Nutzdaten (big endian),
+# danach die mit zlib komprimierten Nutzdaten. Die Nutzdaten sind ein kompaktes JSON-Dokument, in dem
+# die Buttons spaltenweise abgelegt sind: Aufeinanderfolgende Buttons mit denselben Schlüsseln bilden
+# einen Block, jeder Schlüssel steht nur einmal in der Schlüsseltabelle und pro Block steht je Schlüssel
+# eine Liste mit den Werten aller Buttons des Blocks. So entfallen die pro Button wiederholten Schlüssel,
+# und der C-Parser von json liest wenige lange Listen statt tausender kleiner Objekte.
+# Wiederholte Pfade und Texte fasst zlib zusammen; eine eigene String-Tabelle wäre beim Laden langsamer,
+# weil jeder Index in Python aufgelöst werden müsste. Bewusst ohne pickle/marshal, da Boards auch aus
+# fremden Quellen kommen.
+#############################################################################################################
+MAGIC        = b'SBB1'
+VERSION      = 1
+HEADER       = struct.Struct('>4sBI')
+EXTENSION    = '.sbb'
+
+#############################################################################################################
+def is_compact_path(path):
+    """Soll die Datei im kompakten Format geschrieben werden?"""
+    return bool(path) and path.lower().endswith(EXTENSION)
+
+#############################################################################################################
+def encode_board(data):
+    """Wandelt eine Board-Konfiguration in das kompakte Format"""
+    keys = {}                                               # Schlüssel -> Index in der Schlüsseltabelle
+    blocks = []                                             # [Schlüsselindizes, Spalten] je Block gleicher Schlüssel
+    block_keys = None
+    for button in data.get('buttons', []):
+        button_keys = tuple(button)
+        if button_keys != block_keys or not button_keys:    # Neuer Block, sobald sich die Schlüssel ändern
+            block_keys = button_keys
+            for key in button_keys:
+                keys.setdefault(key, len(keys))
+            columns = [[] for _ in button_keys]
+            blocks.append([[keys[key] for key in button_keys], columns])
+        for column, value in zip(columns, button.values()):
+            column.append(value)
+
+    document = {
+        "sections": {section: value for section, value in data.items() if section != 'buttons'},
+        "keys":     list(keys),
+        "blocks":   blocks,
+    }
+    payload = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    return HEADER.pack(MAGIC, VERSION, len(payload)) + zlib.compress(payload, 6)
+
+#############################################################################################################
+def decode_board(content):
+    """Liest eine Board-Konfiguration aus dem kompakten Format, ValueError bei ungültigen Daten"""
+    if len(content) < HEADER.size:
+        raise ValueError("Datei zu kurz für ein kompaktes Board")
+    magic, version, length = HEADER.unpack_from(content)
+    if magic != MAGIC:
+        raise ValueError("Keine kompakte Board-Datei")
+    if version > VERSION:
+        raise ValueError(f"Board-Format Version {version} wird nicht unterstützt")
+    try:
+        payload = zlib.decompress(content[HEADER.size:])
+    except zlib.error as e:
+        raise ValueError(f"Beschädigte Board-Datei: {e}")
+    if len(payload) != length:
+        raise ValueError("Beschädigte Board-Datei: falsche Länge")
+    try:
+        document = json.loads(payload)
+        keys = document['keys']
+        buttons = []
+        for key_indices, columns in document['blocks']:
+            if not key_indices:                             # Button ohne Schlüssel (eigener Block)
+                buttons.append({})
+                continue
+            block_keys = [keys[index] for index in key_indices]
+            buttons.extend(dict(zip(block_keys, values)) for values in zip(*columns))
+        data = document['sections']
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ValueError(f"Beschädigte Board-Datei: {e}")
+    data['buttons'] = buttons
+    return data
+
+#############################################################################################################
+def read_board(path):
+    """Liest ein Board im JSON- oder kompakten Format (erkannt an der Kennung, nicht an der Endung).
+    Wirft FileNotFoundError oder ValueError (auch json.JSONDecodeError) wie json.load."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if content.startswith(MAGIC):
+        return decode_board(content)
+    return json.loads(content)
+
+#############################################################################################################
+def write_board(path, data):
+    """Schreibt ein Board atomar, das Format wird über die Dateiendung gewählt"""
+    if is_compact_path(path):
+        atomic_write_bytes(path, encode_board(data))
+    else:
+        atomic_write_json(path, data)
+
+#############################################################################################################
+def convert(source, target):
+    """Konvertiert ein Board zwischen JSON und kompaktem Format (Richtung über die Endung von target)"""
+    data = read_board(source)
+    write_board(target, data)
+    print(f"{source} ({os.path.getsize(source)} Bytes) -> {target} ({os.path.getsize(target)} Bytes)")
+
+#############################################################################################################
+def make_test_board(count):
+    """Erzeugt ein Board mit count Buttons für den Benchmark"""
+    from config_manager import ConfigManager
+    data = {"Window": dict(ConfigManager.DEFAULT_CONFIG['Window']), "buttons": [dict(ConfigManager.DEFAULT_CONFIG['buttons'][0])]}
+    for i in range(1, count + 1):
+        data['buttons'].append({
+            "position": i, "id": f"{i:012x}", "text": f"Sound {i}",
+            "audio_file": f"samples/category_{i % 40}/sound_{i}.wav", "volume": 50 + i % 50,
+            "loop": i % 7 == 0, "background_color": "#4e9a06", "use_custom_bg_color": i % 3 == 0,
+            "image_file": f"images/icon_{i % 25}.png" if i % 2 else "", "fade_time_ms": 500, "priority": 0
+        })
+    return data
+
+#############################################################################################################
+def benchmark(path=None, count=5000, repeat=5):
+    """Vergleicht Größe sowie Lade- und Speicherzeit von JSON und kompaktem Format"""
+    import tempfile
+    data = read_board(path) if path else make_test_board(count)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Benchmark mit {len(data['buttons'])} Buttons, bester von {repeat} Durchläufen:")
+        for name, target in (("JSON", os.path.join(directory, 'board.json')), ("kompakt", os.path.join(directory, 'board' + EXTENSION))):
+            save_times, load_times = [], []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                write_board(target, data)
+                save_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                loaded = read_board(target)
+                load_times.append(time.perf_counter() - start)
+            assert loaded == data, "Daten nach dem Laden nicht identisch"
+            print(f"  {name:8s} {os.path.getsize(target):>10d} Bytes   laden {min(load_times) * 1000:8.1f} ms   speichern {min(save_times) * 1000:8.1f} ms")
+
+#############################################################################################################
+if __name__ == '__main__':
+    # python3 board_format.py convert <quelle> <ziel>       z.B. board.json board.sbb oder board.sbb board.json
+    # python3 board_format.py benchmark [board] [anzahl]    ohne Board wird ein Test-Board erzeugt
+    if len(sys.argv) == 4 and sys.argv[1] == 'convert':
+        convert(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'benchmark':
+        board = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].isdigit() else None
+        count = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 5000
+        benchmark(board, count)
+    else:
+        print("Verwendung: board_format.py convert <quelle> <ziel> | benchmark [board] [anzahl]")
+        sys.exit(1)
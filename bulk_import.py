@@ -0,0 +1,213 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from audio_probe import AUDIO_EXTENSIONS
+from metadata_index import metadata_index
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+#############################################################################################################
+def classify_paths(paths):
+    """Teilt Pfade in Sound-, Bilddateien und Ordner auf, liefert (sounds, images, ordner, nicht unterstützte)"""
+    sound_files, image_files, folders, unsupported = [], [], [], []
+    for path in paths:
+        lower = path.lower()
+        if os.path.isdir(path):
+            folders.append(path)
+        elif lower.endswith(AUDIO_EXTENSIONS):
+            sound_files.append(path)
+        elif lower.endswith(IMAGE_EXTENSIONS):
+            image_files.append(path)
+        else:
+            unsupported.append(path)
+    return sound_files, image_files, folders, unsupported
+
+#############################################################################################################
+def walk_folder(folder):
+    """Sucht rekursiv alle Audiodateien in einem Ordner (sortiert, versteckte Ordner ausgenommen)"""
+    sound_files = []
+    for directory, subdirs, files in os.walk(folder):
+        subdirs[:] = sorted(d for d in subdirs if not d.startswith('.'))
+        sound_files.extend(os.path.join(directory, name) for name in sorted(files) if name.lower().endswith(AUDIO_EXTENSIONS))
+    return sound_files
+
+#############################################################################################################
+def probe_entry(entry):
+    """Prüft ein (Sound, Bild)-Paar im Worker-Thread; liefert (Eintrag, Metadaten des Sounds, Fehler oder None)"""
+    for path in entry:
+        if not path:
+            continue
+        try:
+            if os.stat(path).st_size == 0:
+                return entry, None, f"Leere Datei: {path}"
+        except OSError as e:
+            return entry, None, f"Datei nicht lesbar: {e}"
+        if not os.access(path, os.R_OK):
+            return entry, None, f"Datei nicht lesbar: {path}"
+    info = None
+    if entry[0]:                                    # Länge, Abtastrate, Kanäle aus dem Index oder dem Dateikopf
+        metadata = metadata_index.lookup(entry[0]) or {}
+        info = {key: metadata[key] for key in ('duration_s', 'sample_rate', 'channels') if metadata.get(key)}
+    return entry, info, None
+
+#############################################################################################################
+class BulkImporter:
+    """Importiert viele per Drag & Drop abgelegte Dateien, ohne die Oberfläche zu blockieren.
+
+    Ablauf: Abgelegte Ordner werden rekursiv nach Audiodateien durchsucht, alle Dateien werden in einem
+    Thread-Pool geprüft und ihre Länge, Abtastrate und Kanalzahl aus dem Dateikopf gelesen (gespeichert
+    in der Button-Konfiguration). Danach werden alle Button-Konfigurationen
+    in einem Durchgang erzeugt und mit einer einzigen Neunummerierung eingefügt. Die Platzhalter
+    werden anschließend in Portionen von höchstens FRAME_BUDGET_MS pro Leerlauf in die FlowBox
+    gesetzt, ein Fortschrittsbalken zeigt den Stand. Weitere Drops während eines Imports werden
+    hinten angestellt.
+    """
+    FRAME_BUDGET_MS = 8      # Zeit pro Leerlauf für neue Platzhalter, damit die Oberfläche flüssig bleibt
+    POLL_MS         = 50     # Prüfintervall für den Fortschritt der Worker
+
+    def __init__(self, board, progress_bar, max_workers=None):
+        self.board        = board
+        self.progress_bar = progress_bar
+        self.max_workers  = max_workers or min(8, (os.cpu_count() or 2) + 2)
+        self.queue        = []       # Wartende Importe: ((Sound, Bild)-Paare, Ordner)
+        self.entries      = []
+        self.running      = False
+        self.futures      = []
+        self.executor     = None
+        self.pending      = []       # Eingefügte Button-Konfigurationen, deren Platzhalter noch fehlen
+        self.added        = 0        # Davon bereits als Platzhalter gesetzt
+        self.total        = 0
+
+    #########################################################################################################
+    def import_files(self, sound_files, image_files, folders=()):
+        """Plant den Import; genau ein Sound und ein Bild ergeben einen Button mit beidem"""
+        if len(sound_files) == 1 and len(image_files) == 1:
+            entries = [(sound_files[0], image_files[0])]
+        else:
+            entries = [(path, None) for path in sound_files] + [(None, path) for path in image_files]
+        if not entries and not folders:
+            return
+        self.queue.append((entries, list(folders)))
+        if not self.running:
+            self.start_next()
+
+    #########################################################################################################
+    def start_next(self):
+        """Startet den nächsten wartenden Import"""
+        if not self.queue:
+            self.running = False
+            self.progress_bar.hide()
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+                self.executor = None
+            return
+        self.running = True
+        self.entries, folders = self.queue.pop(0)
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        if folders:
+            self.futures = [self.executor.submit(walk_folder, folder) for folder in folders]
+            self.show_progress(0, "Durchsuche Ordner ...")
+            self.progress_bar.pulse()
+            GLib.timeout_add(self.POLL_MS, self.on_walk_progress)
+        else:
+            self.start_probe()
+
+    #########################################################################################################
+    def on_walk_progress(self):
+        """Timer: wartet auf das Durchsuchen der Ordner und prüft dann alle gefundenen Dateien"""
+        if not all(future.done() for future in self.futures):
+            self.progress_bar.pulse()
+            return True
+        for future in self.futures:
+            self.entries.extend((path, None) for path in future.result())
+        self.start_probe()
+        return False
+
+    #########################################################################################################
+    def start_probe(self):
+        """Verteilt die Prüfung aller Dateien auf den Thread-Pool"""
+        self.total = len(self.entries)
+        if not self.total:
+            print("Import: keine Audiodateien gefunden")
+            self.start_next()
+            return
+        self.futures = [self.executor.submit(probe_entry, entry) for entry in self.entries]
+        self.entries = []
+        self.show_progress(0, f"Prüfe Dateien 0/{self.total}")
+        GLib.timeout_add(self.POLL_MS, self.on_probe_progress)
+
+    #########################################################################################################
+    def show_progress(self, fraction, text):
+        """Aktualisiert den Fortschrittsbalken"""
+        self.progress_bar.set_fraction(fraction)
+        self.progress_bar.set_text(text)
+        self.progress_bar.show()
+
+    #########################################################################################################
+    def on_probe_progress(self):
+        """Timer: zeigt den Fortschritt der Prüfung und übernimmt die Ergebnisse, sobald alle fertig sind"""
+        done = sum(1 for future in self.futures if future.done())
+        if done < self.total:
+            self.show_progress(done / self.total * 0.5, f"Prüfe Dateien {done}/{self.total}")
+            return True
+        results = [future.result() for future in self.futures]
+        self.futures = []
+        self.insert(results)
+        return False
+
+    #########################################################################################################
+    def make_button_config(self, sound_file, image_file, info=None):
+        """Erzeugt die Konfiguration eines neuen Buttons, Pfade relativ zu den Prefixen des Boards"""
+        defaults = self.board.config.defaults
+        button_config = dict(self.board.config.DEFAULT_CONFIG['buttons'][1])   # Minimaler Button
+        if sound_file:
+            button_config['audio_file'] = os.path.relpath(sound_file, os.path.abspath(defaults.soundpfad_prefix))
+            button_config['text'] = os.path.splitext(os.path.basename(sound_file))[0]
+            if info:                                                           # duration_s, sample_rate, channels
+                button_config.update(info)
+        if image_file:
+            button_config['image_file'] = os.path.relpath(image_file, os.path.abspath(defaults.imagepfad_prefix))
+            if not sound_file:
+                button_config['text'] = os.path.splitext(os.path.basename(image_file))[0]
+        return button_config
+
+    #########################################################################################################
+    def insert(self, results):
+        """Fügt alle gültigen Buttons mit einer Neunummerierung ein und beginnt mit den Platzhaltern"""
+        button_configs = []
+        for (sound_file, image_file), info, error in results:
+            if error is not None:
+                print(f"Übersprungen: {error}")
+                continue
+            button_configs.append(self.make_button_config(sound_file, image_file, info))
+        if button_configs:
+            self.board.config.insert_buttons(button_configs)     # Am Ende, nur einmal neu nummerieren
+            self.board.config.mark_changed()
+        print(f"Import: {len(button_configs)} von {len(results)} Dateien als Buttons eingefügt")
+        self.pending = button_configs
+        self.added = 0
+        self.total = len(button_configs)
+        GLib.idle_add(self.add_slots)
+
+    #########################################################################################################
+    def add_slots(self):
+        """Leerlauf-Callback: setzt Platzhalter, bis das Zeitbudget des Frames verbraucht ist"""
+        grid = self.board.grid
+        deadline = time.perf_counter() + self.FRAME_BUDGET_MS / 1000
+        while self.added < self.total and time.perf_counter() < deadline:
+            slot = grid.create_slot(self.pending[self.added])
+            self.board.flowbox.add(slot)
+            slot.get_parent().show()                     # Nur das neue FlowBoxChild zeigen, kein show_all
+            self.added += 1
+        self.show_progress(0.5 + 0.5 * self.added / max(1, self.total), f"Füge Buttons hinzu {self.added}/{self.total}")
+        grid.schedule_update()                           # Sichtbare neue Platzhalter mit Buttons füllen
+        if self.added < self.total:
+            return True
+        self.pending = []
+        self.board.refresh_search()                      # Laufende Suche auch auf die neuen Buttons anwenden
+        self.start_next()
+        return False
@@ -0,0 +1,129 @@
+import os
+import weakref
+
+#############################################################################################################
+def color_or_none(config, use_key, color_key):
+    """Liefert die Farbe, wenn sie aktiviert und gesetzt ist, sonst None.
+    Wie bisher gilt eine leere (oder nur aus Leerzeichen bestehende) Farbe als nicht gesetzt: Der Button
+    übernimmt dann die Farbe des Default-Buttons und ohne diese die Theme-Farbe, nie eine feste Farbe."""
+    color = config.get(color_key)
+    if config.get(use_key, False) and isinstance(color, str) and color.strip():
+        return color.strip()
+    return None
+
+#############################################################################################################
+class BoardDefaults:
+    """Aufgelöste Werte des Default-Buttons (Button0) für alle Buttons eines Boards.
+
+    Fehlende Schlüssel in Button0 werden einmal aus dem Schema (DEFAULT_CONFIG) ergänzt. Ändert sich
+    Button0, werden mit update() die Werte und die aller angemeldeten ButtonModels neu berechnet.
+    """
+    __slots__ = ('config', 'schema', 'models',
+                 'button_width', 'button_height', 'button_radius', 'button_spacing', 'text_size',
+                 'soundpfad_prefix', 'imagepfad_prefix', 'volume', 'fade_time_ms', 'priority',
+                 'text_x', 'text_y', 'text_align', 'text_color', 'bg_color', 'image')
+
+    def __init__(self, default_button, schema=None):
+        self.config = default_button
+        self.schema = schema or {}              # Standardwerte für in Button0 fehlende Schlüssel
+        self.models = weakref.WeakSet()         # Angemeldete Buttons, die bei Änderungen neu berechnet werden
+        self.resolve()
+
+    #########################################################################################################
+    def get(self, key, default=None):
+        """Wert aus Button0, ersatzweise aus dem Schema"""
+        value = self.config.get(key)
+        if value is None:
+            value = self.schema.get(key, default)
+        return value
+
+    #########################################################################################################
+    def resolve(self):
+        """Berechnet alle Werte aus Button0"""
+        get = self.get
+        self.button_width     = get('button_width', 100)
+        self.button_height    = get('button_height', 75)
+        self.button_radius    = get('button_radius', 10)
+        self.button_spacing   = get('button_spacing', 5)
+        self.text_size        = get('text_size', 13)
+        self.soundpfad_prefix = get('soundpfad_prefix', '')
+        self.imagepfad_prefix = get('imagepfad_prefix', '')
+        self.volume           = get('volume', 50)
+        self.fade_time_ms     = get('fade_time_ms', 0)
+        self.priority         = get('priority', 0)
+        self.text_x           = get('text_x', 10)
+        self.text_y           = get('text_y', 10)
+        self.text_align       = get('text_align', 'left')
+        self.text_color       = color_or_none(self.config, 'use_custom_text_color', 'text_color')   # None = Theme-Farbe
+        self.bg_color         = color_or_none(self.config, 'use_custom_bg_color', 'background_color')
+        if self.config.get('use_custom_image', False) and self.config.get('image_file'):
+            self.image = (os.path.join(self.imagepfad_prefix, self.config['image_file']),
+                          get('image_x', 10), get('image_y', 10), get('image_scale', 0))
+        else:
+            self.image = None
+
+    #########################################################################################################
+    def update(self, default_button=None):
+        """Nach einer Änderung von Button0: Werte und alle angemeldeten Buttons neu berechnen"""
+        if default_button is not None:
+            self.config = default_button
+        self.resolve()
+        for model in list(self.models):
+            model.resolve()
+
+#############################################################################################################
+class ButtonModel:
+    """Aufgelöste Werte eines Buttons, berechnet beim Erzeugen und nach jeder Änderung über set().
+
+    Die Button-Konfiguration (dict) bleibt die gespeicherte Quelle; das Modell hält die daraus
+    samt Default-Button aufgelösten Werte als einfache Attribute für häufig genutzte Pfade.
+    """
+    __slots__ = ('config', 'defaults', '__weakref__',
+                 'text', 'audio_file', 'sound_path', 'volume', 'loop', 'fade_time_ms', 'priority', 'preload',
+                 'text_x', 'text_y', 'text_align', 'text_color', 'bg_color', 'image')
+    DIRECT_KEYS = frozenset(('text', 'volume', 'loop', 'fade_time_ms', 'priority', 'preload'))   # Attribut = Konfigurationswert
+
+    def __init__(self, button_config, defaults):
+        self.config   = button_config
+        self.defaults = defaults
+        defaults.models.add(self)
+        self.resolve()
+
+    #########################################################################################################
+    def resolve(self):
+        """Berechnet alle Werte aus der Button-Konfiguration und dem Default-Button"""
+        config = self.config
+        defaults = self.defaults
+        self.text         = config.get('text', '')
+        self.audio_file   = config.get('audio_file') or None
+        self.sound_path   = os.path.join(defaults.soundpfad_prefix, self.audio_file) if self.audio_file else None
+        self.volume       = config.get('volume', defaults.volume)
+        self.loop         = config.get('loop', False)
+        self.fade_time_ms = config.get('fade_time_ms', defaults.fade_time_ms)
+        self.priority     = config.get('priority', defaults.priority)
+        self.preload      = config.get('preload', False)
+        if config.get('use_custom_text_position', False):
+            self.text_x   = config.get('text_x', defaults.text_x)
+            self.text_y   = config.get('text_y', defaults.text_y)
+        else:
+            self.text_x   = defaults.text_x
+            self.text_y   = defaults.text_y
+        self.text_align   = config.get('text_align', defaults.text_align)
+        self.text_color   = color_or_none(config, 'use_custom_text_color', 'text_color') or defaults.text_color
+        self.bg_color     = color_or_none(config, 'use_custom_bg_color', 'background_color') or defaults.bg_color
+        if config.get('image_file'):
+            self.image = (os.path.join(defaults.imagepfad_prefix, config['image_file']),
+                          config.get('image_x', defaults.get('image_x', 10)),
+                          config.get('image_y', defaults.get('image_y', 10)),
+                          config.get('image_scale', defaults.get('image_scale', 0)))
+        else:
+            self.image = defaults.image
+
+    #########################################################################################################
+    def set(self, key, value):
+        """Ändert einen Wert in der Konfiguration und berechnet das Modell neu"""
+        self.config[key] = value
+        if key in self.DIRECT_KEYS:               # z.B. Lautstärkeregler: nur dieses Attribut aktualisieren
+            setattr(self, key, value)
+        else:
+            self.resolve()
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+from config_writer import config_writer, snapshot_config, atomic_write_text
+from board_format import write_board
+
+#############################################################################################################
+class ConfigJournal:
+    """Protokolliert Änderungen an der Konfiguration in einer Journal-Datei neben der Konfiguration.
+
+    Jede Änderung wird als eine JSON-Zeile angehängt (set, add, add_many, delete, move, restore), statt das
+    ganze Board neu zu schreiben. Die erste Zeile enthält die save_id der Konfigurationsdatei, auf
+    der das Journal aufbaut; nach einem Absturz werden die Änderungen beim Laden genau nachgespielt.
+    Beim Speichern wird das Journal geleert, wird es zu lang, wird es zu einem Eintrag verdichtet.
+    """
+    COMPACT_OPS = 500   # Ab so vielen Einträgen wird das Journal verdichtet
+
+    def __init__(self, config):
+        self.config      = config
+        self.pending     = []                 # Noch nicht geschriebene Einträge
+        self.lock        = threading.Lock()   # Schützt pending, reset_id und compact vor dem Writer-Thread
+        self.reset_id    = None               # save_id, mit der das Journal nach dem Speichern neu beginnt
+        self.compact     = False              # Journal beim nächsten Schreiben neu anlegen statt anhängen
+        self.stale_paths = []                 # Journale früherer Dateinamen, die nach dem Speichern entfallen
+        self.op_count    = 0                  # Einträge in der Journal-Datei
+        self.replaying   = False              # Beim Nachspielen nichts erneut protokollieren
+        self.base_id     = config.data.get('Journal', {}).get('save_id')  # Speicherstand, auf dem das Journal aufbaut
+        self.saved_id    = self.base_id       # save_id der Konfigurationsdatei, die tatsächlich auf der Platte liegt
+
+    #########################################################################################################
+    def get_path(self, config_file=None):
+        """Pfad der Journal-Datei zu einer Konfigurationsdatei"""
+        return (config_file or self.config.config_file) + '.journal'
+
+    #########################################################################################################
+    def active(self):
+        """Ein Journal gibt es nur für gespeicherte, beschreibbare Konfigurationen"""
+        return bool(self.config.config_file) and not self.config.is_new_config and not self.config.data['Window'].get('read_only', False)
+
+    #########################################################################################################
+    def record(self, op):
+        """Hängt einen Eintrag an (im Hintergrund)"""
+        if self.replaying or not self.active():
+            return
+        with self.lock:
+            last = self.pending[-1] if self.pending else None
+            if op['op'] == 'set' and last is not None and last['op'] == 'set' and last['id'] == op['id']:
+                last['values'].update(op['values'])   # z.B. Lautstärkeregler: nur der letzte Wert zählt
+            else:
+                self.pending.append(op)
+            compact = self.op_count + len(self.pending) > self.COMPACT_OPS
+        if compact:
+            self.rewrite()
+        else:
+            config_writer.submit(self.get_path(), None, self.sync)
+
+    #########################################################################################################
+    def rewrite(self):
+        """Verdichtet das Journal zu einem einzigen Eintrag mit dem aktuellen Stand.
+        Die Konfigurationsdatei selbst wird nur beim Speichern durch den Benutzer überschrieben."""
+        if not self.active():
+            return
+        with self.lock:
+            self.pending = [{"op": "restore", "data": snapshot_config(self.config.data, self.config.inherited)}]   # Ohne Werte aus der Bibliothek
+            self.compact = True
+        config_writer.submit(self.get_path(), None, self.sync)
+
+    #########################################################################################################
+    def record_set(self, button_config, keys):
+        """Protokolliert geänderte Werte eines Buttons"""
+        if button_config.get('id') is None:
+            return
+        values = {key: (list(button_config[key]) if isinstance(button_config.get(key), list) else button_config.get(key)) for key in keys}
+        self.record({"op": "set", "id": button_config['id'], "values": values})
+
+    #########################################################################################################
+    def begin_save(self, save_id, old_config_file=None):
+        """Wird beim Speichern aufgerufen: alle bisherigen Änderungen stecken nun in der Konfigurationsdatei"""
+        with self.lock:
+            self.pending = []
+            self.compact = False
+            self.reset_id = save_id
+            self.base_id = save_id
+            if old_config_file and old_config_file != self.config.config_file:
+                self.stale_paths.append(self.get_path(old_config_file))
+
+    #########################################################################################################
+    def write_config(self, path, data):
+        """Schreibfunktion für die Konfigurationsdatei: erst die Datei, dann das Journal neu beginnen"""
+        write_board(path, data)                   # JSON oder kompaktes Format je nach Endung
+        self.saved_id = data.get('Journal', {}).get('save_id')
+        try:
+            self.sync(self.get_path(path), None, after_save=True)
+        except OSError as e:                      # Die Konfiguration ist gespeichert, nur das Journal fehlt
+            print(f"Fehler beim Schreiben des Journals: {e}")
+
+    #########################################################################################################
+    def abort_save(self):
+        """Speichern fehlgeschlagen: das Journal baut wieder auf dem Stand auf der Platte auf und nimmt den
+        aktuellen Stand als einen Eintrag auf, damit seit dem letzten Speichern nichts verloren geht"""
+        with self.lock:
+            self.reset_id = None
+            self.base_id = self.saved_id
+            if self.config.config_file:           # Journal der (wieder) aktuellen Datei nicht löschen
+                self.stale_paths = [path for path in self.stale_paths if path != self.get_path()]
+        if self.saved_id:
+            self.config.data['Journal'] = {"save_id": self.saved_id}
+        else:
+            self.config.data.pop('Journal', None)
+        self.rewrite()
+
+    #########################################################################################################
+    def sync(self, path, data, after_save=False):
+        """Schreibt wartende Einträge (läuft im Writer-Thread)"""
+        with self.lock:
+            if self.reset_id is not None and not after_save:
+                return                            # Erst muss die Konfigurationsdatei geschrieben sein
+            ops, self.pending = self.pending, []
+            reset_id, self.reset_id = self.reset_id, None
+            compact, self.compact = self.compact, False
+            stale_paths, self.stale_paths = self.stale_paths, []
+
+        for stale_path in stale_paths:
+            try:
+                os.remove(stale_path)
+            except FileNotFoundError:
+                pass
+
+        if reset_id is not None or compact or not os.path.exists(path):
+            if reset_id is None:
+                reset_id = self.base_id
+            if not ops and not compact:           # Nach dem Speichern ohne neue Änderungen: kein Journal nötig
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self.op_count = 0
+                return
+            lines = [json.dumps({"op": "base", "save_id": reset_id})] + [json.dumps(op) for op in ops]
+            atomic_write_text(path, '\n'.join(lines) + '\n')
+            self.op_count = len(ops)
+        elif ops:
+            with open(path, 'a') as f:
+                for op in ops:
+                    f.write(json.dumps(op) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.op_count += len(ops)
+
+    #########################################################################################################
+    def read(self):
+        """Liest die Einträge, die auf der geladenen Konfigurationsdatei aufbauen"""
+        if not self.active():
+            return []
+        ops = []
+        try:
+            with open(self.get_path(), 'r') as f:
+                for line in f:
+                    try:
+                        ops.append(json.loads(line))
+                    except ValueError:
+                        break                     # Abgebrochene letzte Zeile nach einem Absturz
+        except OSError:
+            return []
+        if not ops or ops[0].get('op') != 'base':
+            return []
+        if ops[0].get('save_id') != self.base_id:
+            print("Journal gehört zu einem anderen Speicherstand und wird ignoriert")
+            return []
+        self.op_count = len(ops) - 1
+        return ops[1:]
+
+    #########################################################################################################
+    def replay(self):
+        """Spielt die Einträge des Journals auf die geladene Konfiguration nach, True wenn es welche gab"""
+        ops = self.read()
+        if not ops:
+            return False
+        config = self.config
+        self.replaying = True
+        try:
+            for op in ops:
+                kind = op.get('op')
+                if kind == 'set':
+                    button = config.get_button(op.get('id'))
+                    if button is not None:
+                        button.update(op['values'])
+                        if button is config.defaults.config:
+                            config.defaults.update()
+                elif kind == 'add':
+                    config.insert_button(op['button'], op.get('position'))
+                elif kind == 'add_many':
+                    config.insert_buttons(op['buttons'], op.get('position'))
+                elif kind == 'delete':
+                    button = config.get_button(op.get('id'))
+                    if button is not None:
+                        config.delete_button(button['position'])
+                elif kind == 'move':
+                    button = config.get_button(op.get('id'))
+                    if button is not None:
+                        config.move_button(button['position'], op['position'])
+                elif kind == 'restore':
+                    config.restore(op['data'])
+        finally:
+            self.replaying = False
+        self.rewrite()                            # Evtl. abgebrochene letzte Zeile nicht weiter fortschreiben
+        print(f"{len(ops)} Änderungen aus dem Journal {self.get_path()} wiederhergestellt")
+        return True
+
+    #########################################################################################################
+    def discard(self):
+        """Verwirft das Journal, z.B. wenn ungespeicherte Änderungen verworfen werden"""
+        with self.lock:
+            self.pending = []
+            self.compact = False
+        config_writer.flush()                     # Laufende Schreibvorgänge abwarten
+        if self.active():
+            try:
+                os.remove(self.get_path())
+            except FileNotFoundError:
+                pass
+        self.op_count = 0
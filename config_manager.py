@@ -1,8 +1,16 @@
-import json
+import collections
+import copy
 import os
+import uuid
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import Gtk, GLib
+from config_writer import config_writer, snapshot_config
+from config_journal import ConfigJournal
+from board_format import read_board
+from button_model import BoardDefaults
+from search_index import SearchIndex, SEARCH_KEYS
+from sound_library import sound_library, entry_from_config, LIBRARY_KEYS
 
 ###################################################################################################################################
 class ConfigManager:
@@ -10,9 +18,19 @@ class ConfigManager:
         self.parent = parent
         self.config_file = config_file
         self.data = self.load_config()
+        self.buttons_by_id = {}  # Index: Button-ID -> Button-Konfiguration
+        self.inherited = {}      # Button-ID -> aus der Sound-Bibliothek übernommene Schlüssel (werden nicht gespeichert)
         self.buttonlist = self.load_buttonlist()
+        self.defaults = BoardDefaults(self.get_default_button(), self.DEFAULT_CONFIG['buttons'][0])  # Aufgelöster Button0
         self.is_new_config = config_file == '' or config_file is None
         self.has_changes = False  # Statusvariable für Änderungen
+        self.title_update_pending = False  # Titelaktualisierung ist bereits für den nächsten Leerlauf geplant
+        self.change_count = 0  # Zählt alle Änderungen, z.B. damit Autosave unveränderte Stände überspringt
+        self.save_results = collections.deque()  # Fertige Speichervorgänge aus dem Writer-Thread, Übernahme im GTK-Thread
+        self.search = SearchIndex()         # Suchindex über Text, Tags und Dateinamen, aufgebaut bei der ersten Suche
+        self.journal = ConfigJournal(self)  # Änderungsprotokoll neben der Konfigurationsdatei
+        if self.journal.replay():           # Nach einem Absturz die protokollierten Änderungen nachspielen
+            self.mark_changed()
         
     ###################################################################################################################################
     # Konstanten für die Konfiguration
@@ -21,7 +39,21 @@ class ConfigManager:
             "title_prefix":    "Soundboard: ",
             "window_width":               400,
             "window_height":              200,
-            "read_only":                False
+            "read_only":                False,
+            "sound_cache_mb":             256,
+            "preload_workers":              2,
+            "stream_threshold_mb":          0,   # 0 = aus; gestreamte Sounds teilen sich einen Musik-Kanal
+            "mixer_frequency":          44100,
+            "mixer_size":                 -16,
+            "mixer_channels":               2,
+            "mixer_buffer":               512,
+            "mixer_num_channels":          16,
+            "mixer_max_channels":          64,
+            "voice_stealing":        "oldest",
+            "audio_profile":        "default",
+            "measure_latency":          False,
+            "autosave_slots":               3,
+            "autosave_interval_s":         60
         },
         "buttons": [
             {
@@ -34,6 +66,7 @@ class ConfigManager:
                 "button_radius":                 10,
                 "audio_file":                    "",
                 "volume":                        50,
+                "priority":                       0,
                 "fade_time_ms":                 500,
                 "loop":                       False,
                 "text":                    "Button",
@@ -65,21 +98,24 @@ class ConfigManager:
         # Wenn kein Dateiname angegeben ist, verwende die Standardkonfiguration
         if self.config_file == '' or self.config_file is None:
             print("Keine Konfigurationsdatei angegeben, verwende Standardkonfiguration!")
-            return self.DEFAULT_CONFIG.copy()
+            return copy.deepcopy(self.DEFAULT_CONFIG)   # Tiefe Kopie, sonst würden die Standardwerte mitverändert
             
         try:
-            with open(self.config_file, 'r') as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            data = read_board(self.config_file)     # JSON oder kompaktes Format (.sbb)
+        except (FileNotFoundError, ValueError):
             print("Keine gültige Konfigurationsdatei gefunden, erstelle neue Konfiguration!")
-            data = self.DEFAULT_CONFIG.copy()
+            data = copy.deepcopy(self.DEFAULT_CONFIG)
             
         # Ergänze fehlende Werte mit Standardwerten
+        return self.fill_defaults(data)
+
+    ###################################################################################################################################
+    def fill_defaults(self, data):
         """Überprüft und ergänzt die Konfiguration mit Standardwerten"""
         # Für jede Sektion in der Standardkonfiguration
         for section, settings in self.DEFAULT_CONFIG.items():
             if section not in data:
-                data[section] = settings.copy()
+                data[section] = copy.deepcopy(settings)
             elif isinstance(settings, dict):
                 # Für jede Einstellung in der Sektion
                 for key, value in settings.items():
@@ -109,7 +145,7 @@ class ConfigManager:
         
         # Wenn kein Default-Button gefunden wurde, erstelle einen
         if default_button is None:
-            default_button = self.DEFAULT_CONFIG['buttons'][0]
+            default_button = self.DEFAULT_CONFIG['buttons'][0].copy()
             buttonlist.insert(0, default_button)
         
         # Durchnummeriere die Buttons neu und und verändere sie nicht
@@ -120,7 +156,185 @@ class ConfigManager:
         # Aktualisiere die Buttonliste in der Konfiguration
         self.data['buttons'] = buttonlist
         
+        # Baue den ID-Index auf, fehlende oder doppelte IDs werden neu vergeben
+        self.buttons_by_id = {}
+        for button in buttonlist:
+            if not button.get('id') or button['id'] in self.buttons_by_id:
+                button['id'] = self.new_button_id()
+            self.buttons_by_id[button['id']] = button
+        
         return buttonlist
+
+    ###################################################################################################################################
+    # Die Position eines Buttons ist gleich seinem Index in der Buttonliste (Default-Button = 0).
+    # Suchen per ID (buttons_by_id) oder Position (Listenindex) sind O(1). Einfügen, Löschen und Verschieben
+    # ändern die Liste direkt an der Stelle und nummerieren nur den betroffenen Bereich neu, statt die ganze
+    # Liste zu sortieren: beim Verschieben die Buttons dazwischen, beim Einfügen und Löschen die dahinter.
+    # Das bleibt O(n), kostet bei 5000 Buttons aber unter 0,5 ms. Die Positionen bleiben lückenlos in den
+    # Button-Konfigurationen, weil sie gespeichert und überall (z.B. Drag & Drop) direkt gelesen werden;
+    # ein Baum mit berechneten Positionen würde jeden dieser Zugriffe ändern.
+    ###################################################################################################################################
+    def new_button_id(self):
+        """Erzeugt eine neue, eindeutige Button-ID"""
+        while True:
+            button_id = uuid.uuid4().hex[:12]
+            if button_id not in self.buttons_by_id:
+                return button_id
+
+    ###################################################################################################################################
+    def get_button(self, button_id):
+        """Liefert die Button-Konfiguration zu einer ID oder None"""
+        return self.buttons_by_id.get(button_id)
+
+    ###################################################################################################################################
+    def get_button_at(self, position):
+        """Liefert die Button-Konfiguration an einer Position oder None"""
+        if 0 <= position < len(self.buttonlist):
+            return self.buttonlist[position]
+        return None
+
+    ###################################################################################################################################
+    def renumber(self, start, end=None):
+        """Setzt die Positionen der Buttons im Bereich start bis end (einschließlich) neu"""
+        if end is None:
+            end = len(self.buttonlist) - 1
+        for i in range(max(0, start), min(end, len(self.buttonlist) - 1) + 1):
+            self.buttonlist[i]['position'] = i
+
+    ###################################################################################################################################
+    def insert_button(self, button_config, position=None):
+        """Fügt eine Button-Konfiguration an einer Position ein (None = am Ende) und vergibt eine ID"""
+        if position is None or position > len(self.buttonlist):
+            position = len(self.buttonlist)
+        position = max(1, position)                                   # Position 0 gehört dem Default-Button
+        if not button_config.get('id') or button_config['id'] in self.buttons_by_id:
+            button_config['id'] = self.new_button_id()
+        self.buttonlist.insert(position, button_config)
+        self.buttons_by_id[button_config['id']] = button_config
+        self.renumber(position)
+        self.journal.record({"op": "add", "position": position, "button": dict(button_config)})
+        self.index_button(button_config)
+        return button_config
+
+    ###################################################################################################################################
+    def insert_buttons(self, button_configs, position=None):
+        """Fügt mehrere Button-Konfigurationen auf einmal ein (None = am Ende), nummeriert nur einmal neu"""
+        if position is None or position > len(self.buttonlist):
+            position = len(self.buttonlist)
+        position = max(1, position)
+        for button_config in button_configs:
+            if not button_config.get('id') or button_config['id'] in self.buttons_by_id:
+                button_config['id'] = self.new_button_id()
+            self.buttons_by_id[button_config['id']] = button_config
+        self.buttonlist[position:position] = button_configs
+        self.renumber(position)
+        self.journal.record({"op": "add_many", "position": position, "buttons": [dict(b) for b in button_configs]})
+        for button_config in button_configs:
+            self.index_button(button_config)
+        return button_configs
+
+    ###################################################################################################################################
+    def search_buttons(self, query):
+        """IDs der Buttons, die zur Suche passen, None bei leerer Suche; baut den Index beim ersten Mal auf"""
+        if not self.search.built:
+            self.resolve_library_all()             # Text und Tags von Bibliotheks-Buttons werden mit durchsucht
+            self.search.build(self.buttonlist)
+        return self.search.search(query)
+
+    ###################################################################################################################################
+    def index_button(self, button_config):
+        """Aktualisiert die Einträge eines Buttons im Suchindex, sofern dieser schon aufgebaut ist"""
+        if self.search.built:
+            self.resolve_library(button_config)
+            self.search.update(button_config)
+
+    ###################################################################################################################################
+    # Buttons mit library_id verweisen auf einen Eintrag der benutzerweiten Sound-Bibliothek (sound_library).
+    # Erst wenn ein Button gebraucht wird (Erzeugen, Vorladen, Suche), werden die im Board fehlenden Werte
+    # aus dem Eintrag übernommen; diese Schlüssel merkt sich self.inherited, damit sie beim Speichern
+    # weggelassen werden. Ändert der Benutzer einen davon, wird er zu einem eigenen Wert des Boards.
+    ###################################################################################################################################
+    def resolve_library(self, button_config):
+        """Übernimmt fehlende Werte eines Bibliotheks-Buttons aus seinem Eintrag (nur beim ersten Aufruf)"""
+        library_id = button_config.get('library_id')
+        if library_id is None or button_config.get('id') in self.inherited:
+            return
+        entry = sound_library.get(library_id)
+        keys = set()
+        if entry is None:
+            print(f"Bibliothekseintrag {library_id} nicht gefunden")
+        else:
+            for key, value in entry.items():
+                if key in button_config:                      # Eigener Wert des Boards hat Vorrang
+                    continue
+                if key == 'audio_file':
+                    value = self.library_path(value, self.defaults.soundpfad_prefix)
+                elif key == 'image_file':
+                    value = self.library_path(value, self.defaults.imagepfad_prefix)
+                button_config[key] = list(value) if isinstance(value, list) else value
+                keys.add(key)
+        self.inherited[button_config.get('id')] = keys
+
+    ###################################################################################################################################
+    def resolve_library_all(self):
+        """Löst alle Bibliotheks-Buttons auf, die Einträge werden dafür gesammelt geladen"""
+        pending = [button for button in self.buttonlist
+                   if button.get('library_id') is not None and button.get('id') not in self.inherited]
+        if pending:
+            sound_library.load_many(button['library_id'] for button in pending)
+            for button in pending:
+                self.resolve_library(button)
+
+    ###################################################################################################################################
+    def library_path(self, path, prefix):
+        """Macht einen absoluten Pfad aus der Bibliothek relativ zum Prefix dieses Boards (wenn möglich)"""
+        try:
+            return os.path.relpath(path, os.path.abspath(prefix))
+        except ValueError:                                     # z.B. anderes Laufwerk unter Windows
+            return path
+
+    ###################################################################################################################################
+    def add_to_library(self, button_config):
+        """Nimmt einen Button in die Sound-Bibliothek auf; danach verweist er nur noch per library_id darauf"""
+        self.resolve_library(button_config)
+        entry = entry_from_config(button_config, self.defaults.soundpfad_prefix, self.defaults.imagepfad_prefix)
+        library_id = sound_library.add(entry)
+        if library_id is None:
+            return None                                        # Ohne Sounddatei kein Bibliothekseintrag
+        entry = sound_library.get(library_id)                  # Evtl. schon vorhandener Eintrag derselben Datei
+        local = entry_from_config(button_config, self.defaults.soundpfad_prefix, self.defaults.imagepfad_prefix)
+        button_config['library_id'] = library_id
+        self.inherited[button_config.get('id')] = {key for key, value in local.items() if entry.get(key) == value}
+        self.mark_changed(button_config, 'library_id')
+        return library_id
+
+    ###################################################################################################################################
+    def library_reference(self, portable_config):
+        """Macht aus einer portablen Konfiguration einen Verweis auf die Sound-Bibliothek.
+        Übrig bleiben library_id und die Werte, die vom Eintrag abweichen; ohne Sounddatei bleibt es eine Kopie."""
+        library_id = portable_config.get('library_id')
+        if library_id is None:
+            library_id = sound_library.add(entry_from_config(portable_config))   # Pfade sind bereits absolut
+            if library_id is None:
+                return portable_config
+        entry = sound_library.get(library_id) or {}
+        own = entry_from_config(portable_config)
+        reference = {key: value for key, value in portable_config.items()
+                     if key not in LIBRARY_KEYS or own.get(key) != entry.get(key)}
+        reference['library_id'] = library_id
+        return reference
+
+    ###################################################################################################################################
+    def move_button(self, current_position, new_position):
+        """Verschiebt einen Button und nummeriert nur den Bereich dazwischen neu, gibt die neue Position zurück"""
+        new_position = max(1, min(new_position, len(self.buttonlist) - 1))
+        if current_position == new_position or self.get_button_at(current_position) is None:
+            return current_position
+        button = self.buttonlist.pop(current_position)
+        self.buttonlist.insert(new_position, button)
+        self.renumber(min(current_position, new_position), max(current_position, new_position))
+        self.journal.record({"op": "move", "id": button.get('id'), "position": new_position})
+        return new_position
     
     ###################################################################################################################################
     def save_config(self, parent_window=None):
@@ -158,23 +372,76 @@ class ConfigManager:
                 print("Fehler: Kein übergeordnetes Fenster für den Dialog angegeben!")
                 return False
         else:
-            # Speichere die Konfiguration in die angegebene Datei
-            with open(self.config_file, 'w') as f:
-                json.dump(self.data, f, indent=4)
-            self.mark_saved()  # Markiere, dass alle Änderungen gespeichert wurden
+            # Speichere die Konfiguration im Hintergrund (atomar, schnelle Folgeaufrufe werden zusammengefasst),
+            # als gespeichert gilt sie erst, wenn die Datei geschrieben ist (on_save_done)
+            self.submit_save(self.config_file, self.snapshot_for_save())
         return True
 
+    ###################################################################################################################################
+    def submit_save(self, config_file, data, previous=None):
+        """Übergibt die Daten an den Writer; das Ergebnis wird im GTK-Thread von apply_save_results übernommen.
+        previous: (alter Dateiname, war neue Konfiguration) bei "Speichern unter", für den Fehlerfall"""
+        change_count = self.change_count
+        def on_written(error):                     # Läuft im Writer-Thread
+            self.save_results.append((config_file, change_count, error, previous))
+            GLib.idle_add(self.apply_save_results)
+        config_writer.submit(config_file, data, self.journal.write_config, on_written)
+
+    ###################################################################################################################################
+    def apply_save_results(self):
+        """Markiert das Board nach erfolgreichem Speichern als gespeichert, meldet fehlgeschlagene Speichervorgänge"""
+        while self.save_results:
+            config_file, change_count, error, previous = self.save_results.popleft()
+            if error is None:
+                if change_count == self.change_count:  # Sonst gibt es schon neuere, ungespeicherte Änderungen
+                    self.mark_saved()
+                continue
+            if previous is not None and self.config_file == config_file:
+                self.config_file, self.is_new_config = previous   # "Speichern unter" fehlgeschlagen: alte Datei bleibt aktuell
+            self.journal.abort_save()
+            self.has_changes = True
+            if self.parent:
+                self.parent.update_window_title()
+                dialog = Gtk.MessageDialog(
+                    transient_for=self.parent,
+                    flags=0,
+                    message_type=Gtk.MessageType.ERROR,
+                    buttons=Gtk.ButtonsType.OK,
+                    text="Die Konfiguration konnte nicht gespeichert werden."
+                )
+                dialog.format_secondary_text(f"{config_file}: {error}")
+                dialog.run()
+                dialog.destroy()
+        return False                               # idle-Callback nur einmal ausführen
+
+    ###################################################################################################################################
+    def finish_saves(self):
+        """Wartet auf alle laufenden Speichervorgänge und übernimmt ihr Ergebnis, z.B. vor dem Beenden"""
+        config_writer.flush()
+        self.apply_save_results()
+
+    ###################################################################################################################################
+    def snapshot_for_save(self, old_config_file=None):
+        """Vergibt eine neue save_id, beginnt das Journal neu und liefert die zu schreibende Kopie der Daten"""
+        save_id = uuid.uuid4().hex
+        self.data['Journal'] = {"save_id": save_id}   # Das Journal baut ab jetzt auf diesem Speicherstand auf
+        self.journal.begin_save(save_id, old_config_file)
+        return snapshot_config(self.data, self.inherited)   # Aus der Bibliothek übernommene Werte nicht speichern
+
     ###################################################################################################################################
     def save_config_as(self, new_config_file):
         """Speichert die aktuelle Konfiguration unter einem neuen Dateinamen"""
-        # Speichere die Konfiguration direkt in die neue Datei
+        # Speichere die Konfiguration im Hintergrund in die neue Datei
         try:
-            with open(new_config_file, 'w') as f:
-                json.dump(self.data, f, indent=4)
+            directory = os.path.dirname(os.path.abspath(new_config_file))
+            if not os.access(directory, os.W_OK):   # Fehler früh melden, das Schreiben selbst läuft asynchron
+                raise PermissionError(f"Verzeichnis '{directory}' ist nicht beschreibbar")
+            old_config_file = self.config_file
+            was_new_config = self.is_new_config
             self.config_file = new_config_file
             self.is_new_config = False  # Markiere, dass es keine neue Konfiguration mehr ist
-            self.mark_saved()  # Markiere, dass alle Änderungen gespeichert wurden
-            print(f"Konfiguration wurde unter '{new_config_file}' gespeichert")
+            self.submit_save(new_config_file, self.snapshot_for_save(old_config_file), (old_config_file, was_new_config))
+            print(f"Konfiguration wird unter '{new_config_file}' gespeichert")
             return True
         except Exception as e:
             print(f"Fehler beim Speichern der Konfiguration unter '{new_config_file}': {e}")
@@ -203,6 +470,12 @@ class ConfigManager:
             filter_json.add_pattern("*.json")
             dialog.add_filter(filter_json)
             
+            # Filter für das kompakte Board-Format
+            filter_sbb = Gtk.FileFilter()
+            filter_sbb.set_name("Kompakte Boards (*.sbb)")
+            filter_sbb.add_pattern("*.sbb")
+            dialog.add_filter(filter_sbb)
+            
             # Aktuelle Konfigurationsdatei als Vorschlag setzen
             if self.config_file:
                 dialog.set_filename(self.config_file)
@@ -220,17 +493,16 @@ class ConfigManager:
                 new_config_file = dialog.get_filename()
                 #print(f"Ausgewählte Datei: {new_config_file}")
                 
-                # Stelle sicher, dass die Datei die Endung .json hat
-                if not new_config_file.endswith('.json'):
-                    new_config_file += '.json'
+                # Stelle sicher, dass die Datei die Endung .json oder .sbb hat
+                if not new_config_file.endswith(('.json', '.sbb')):
+                    new_config_file += '.sbb' if dialog.get_filter() is filter_sbb else '.json'
                     #print(f"Dateiendung hinzugefügt: {new_config_file}")
                 
                 # Prüfe, ob die Datei bereits existiert
                 if os.path.exists(new_config_file):
                     # Versuche, die existierende Konfiguration zu laden
                     try:
-                        with open(new_config_file, 'r') as f:
-                            existing_config = json.load(f)
+                        existing_config = read_board(new_config_file)
                         
                         # Prüfe, ob die Konfiguration schreibgeschützt ist
                         if 'Window' in existing_config and 'read_only' in existing_config['Window'] and existing_config['Window']['read_only']:
@@ -264,7 +536,7 @@ class ConfigManager:
                                 # Benutzer möchte nicht überschreiben, schließe den Dialog
                                 dialog.destroy()
                                 return False
-                    except (json.JSONDecodeError, FileNotFoundError):
+                    except (ValueError, FileNotFoundError):
                         # Datei existiert, ist aber keine gültige JSON-Datei
                         confirm_dialog = Gtk.MessageDialog(
                             transient_for=parent_window,
@@ -283,7 +555,6 @@ class ConfigManager:
                 
                 # Speichere die Konfiguration unter dem neuen Namen
                 if self.save_config_as(new_config_file):
-                    print(f"Konfiguration wurde unter '{new_config_file}' gespeichert")
                     dialog.destroy()
                     return True
                 else:
@@ -302,32 +573,72 @@ class ConfigManager:
     ###################################################################################################################################
     def add_minimal_button(self):
         """Fügt einen minimalen Button zur Konfiguration hinzu"""
-        new_position = len(self.data['buttons'])              # Bestimme die neue Position basierend auf der Länge der Liste
+        new_position = len(self.buttonlist)                   # Bestimme die neue Position basierend auf der Länge der Liste
         print(f"Add new minimal button at position: {new_position}")
         new_button = self.DEFAULT_CONFIG['buttons'][1].copy() # Kopiere den minimalen Button aus der Standardkonfiguration
-        new_button['position'] = new_position                 # Setze die neue Position
-        self.data['buttons'].append(new_button)               # Füge den neuen Button zur Konfiguration hinzu
-        self.buttonlist = self.load_buttonlist()              # Aktualisiere die Buttonliste
+        self.insert_button(new_button, new_position)          # Füge den neuen Button am Ende hinzu
         #self.mark_changed()                                   # Markiere, dass es Änderungen am Soundboard gegeben hat
         return new_button
 
     ###################################################################################################################################
     def delete_button(self, position):
         """Entfernt einen Button anhand seiner Position aus der Konfiguration"""
-        for i, button in enumerate(self.data['buttons']):             # Finde den Button in der Konfiguration
-            if button.get('position') == position:
-                del self.data['buttons'][i]                           # Entferne den Button aus der Konfiguration
-                self.buttonlist = self.load_buttonlist()              # Aktualisiere die Buttonliste
-                return True        
-        return False                                                  # Button nicht gefunden
+        button = self.get_button_at(position)                         # Position entspricht dem Listenindex
+        if button is None or position == 0:                           # Default-Button wird nie gelöscht
+            return False                                              # Button nicht gefunden
+        del self.buttonlist[position]                                 # Entferne den Button aus der Konfiguration
+        self.buttons_by_id.pop(button.get('id'), None)
+        self.renumber(position)                                       # Nur die nachfolgenden Buttons rücken auf
+        self.journal.record({"op": "delete", "id": button.get('id')})
+        self.search.remove(button.get('id'))
+        self.inherited.pop(button.get('id'), None)
+        return True
 
     ###################################################################################################################################
-    def mark_changed(self):
-        """Markiert, dass es Änderungen am Soundboard gegeben hat"""
-        self.has_changes = True
-        self.parent.update_window_title()  # Aktualisiere den Fenstertitel
+    def mark_changed(self, button_config=None, *keys):
+        """Markiert, dass es Änderungen am Soundboard gegeben hat.
+        Mit button_config und keys werden die geänderten Werte im Journal protokolliert.
+        Wird z.B. bei jedem Schritt des Lautstärkereglers aufgerufen, daher ändert sich der Titel
+        nur beim Übergang zu "ungespeichert" und höchstens einmal pro Durchlauf der Hauptschleife."""
+        if button_config is not None and keys:
+            self.journal.record_set(button_config, keys)
+            if button_config is self.defaults.config:
+                self.defaults.update()             # Button0 geändert: aufgelöste Werte aller Buttons neu berechnen
+            else:
+                inherited = self.inherited.get(button_config.get('id'))
+                if inherited:
+                    inherited.difference_update(keys)  # Geänderte Bibliothekswerte werden eigene Werte des Boards
+                if not SEARCH_KEYS.isdisjoint(keys):
+                    self.index_button(button_config)   # Nur die Einträge dieses Buttons im Suchindex
+        self.change_count += 1
+        if not self.has_changes:
+            self.has_changes = True
+            self.schedule_title_update()
         return True
+
+    ###################################################################################################################################
+    def schedule_title_update(self):
+        """Plant eine Aktualisierung des Fenstertitels, mehrere Anforderungen werden zusammengefasst"""
+        if self.parent is None or self.title_update_pending:
+            return
+        self.title_update_pending = True
+        def update_title():
+            self.title_update_pending = False
+            self.parent.update_window_title()  # Aktualisiere den Fenstertitel
+            return False                       # idle-Callback nur einmal ausführen
+        GLib.idle_add(update_title)
         
+    ###################################################################################################################################
+    def restore(self, data):
+        """Übernimmt eine wiederhergestellte Konfiguration (z.B. aus einem Autosave) als ungespeicherten Stand"""
+        self.data = self.fill_defaults(data)
+        self.buttonlist = self.load_buttonlist()
+        self.defaults.update(self.get_default_button())
+        self.search.built = False               # Suchindex bei der nächsten Suche neu aufbauen
+        self.inherited = {}                     # Neue Button-Konfigurationen, Bibliothekswerte neu übernehmen
+        self.journal.record({"op": "restore", "data": snapshot_config(self.data)})
+        self.mark_changed()
+
     ###################################################################################################################################
     def mark_saved(self):
         """Markiert, dass alle Änderungen gespeichert wurden"""
@@ -344,32 +655,17 @@ class ConfigManager:
 
     ###################################################################################################################################
     def create_portable_config(self, button_config):
-        """Erstellt eine portable Version der Button-Konfiguration für Drag & Drop zwischen Soundboards"""
-        import os
+        """Erstellt eine portable Version der Button-Konfiguration für Drag & Drop zwischen Soundboards.
+        Bei Bibliotheks-Buttons bleiben die aus der Bibliothek übernommenen Werte weg, das Ziel verweist
+        dann ebenfalls nur per library_id auf den Eintrag."""
+        inherited = self.inherited.get(button_config.get('id'), ())
+        portable_config = {key: value for key, value in button_config.items() if key not in inherited}
         
-        # Erstelle eine Kopie der Button-Konfiguration
-        portable_config = button_config.copy()
-        
-        # Konvertiere relative Pfade zu absoluten Pfaden
-        if 'audio_file' in portable_config and portable_config['audio_file']:
-            if not os.path.isabs(portable_config['audio_file']):
-                # Wenn ein soundpfad_prefix vorhanden ist, verwende es
-                if 'soundpfad_prefix' in portable_config:
-                    base_path = os.path.dirname(self.config_file) if self.config_file else os.getcwd()
-                    portable_config['audio_file'] = os.path.join(base_path, portable_config['soundpfad_prefix'], portable_config['audio_file'])
-                else:
-                    base_path = os.path.dirname(self.config_file) if self.config_file else os.getcwd()
-                    portable_config['audio_file'] = os.path.join(base_path, portable_config['audio_file'])
-        
-        if 'image_file' in portable_config and portable_config['image_file']:
-            if not os.path.isabs(portable_config['image_file']):
-                # Wenn ein imagepfad_prefix vorhanden ist, verwende es
-                if 'imagepfad_prefix' in portable_config:
-                    base_path = os.path.dirname(self.config_file) if self.config_file else os.getcwd()
-                    portable_config['image_file'] = os.path.join(base_path, portable_config['imagepfad_prefix'], portable_config['image_file'])
-                else:
-                    base_path = os.path.dirname(self.config_file) if self.config_file else os.getcwd()
-                    portable_config['image_file'] = os.path.join(base_path, portable_config['image_file'])
+        # Konvertiere relative Pfade zu absoluten Pfaden (relativ zum Prefix des Boards, wie beim Abspielen)
+        if portable_config.get('audio_file'):
+            portable_config['audio_file'] = os.path.abspath(os.path.join(self.defaults.soundpfad_prefix, portable_config['audio_file']))
+        if portable_config.get('image_file'):
+            portable_config['image_file'] = os.path.abspath(os.path.join(self.defaults.imagepfad_prefix, portable_config['image_file']))
         
         # Füge Informationen über das Quell-Soundboard hinzu
         if self.config_file:
@@ -385,32 +681,13 @@ class ConfigManager:
         try:
             # Erstelle eine Kopie der Konfiguration
             local_config = portable_config.copy()
+            local_config.pop('CopyOf', None)
 
-            if 'audio_file' in local_config and local_config['audio_file']:
-                if os.path.isabs(local_config['audio_file']):
-                    # Hole den imagepfad_prefix aus der Konfiguration oder verwende den Standard
-                    soundpfad_prefix = self.data['Window'].get('soundpfad_prefix', 'sounds/')
-                    # Versuche, den Pfad relativ zum Konfigurationsverzeichnis zu machen
-                    if self.config_file:
-                        base_path = os.path.dirname(self.config_file)
-                        try:
-                            local_config['audio_file'] = os.path.relpath(local_config['audio_file'], base_path)
-                        except ValueError:
-                            # Wenn der Pfad nicht relativ gemacht werden kann, behalte den absoluten Pfad
-                            pass
-
-            if 'image_file' in local_config and local_config['image_file']:
-                if os.path.isabs(local_config['image_file']):
-                    # Hole den imagepfad_prefix aus der Konfiguration oder verwende den Standard
-                    imagepfad_prefix = self.data['Window'].get('imagepfad_prefix', 'images/')
-                    # Versuche, den Pfad relativ zum Konfigurationsverzeichnis zu machen
-                    if self.config_file:
-                        base_path = os.path.dirname(self.config_file)
-                        try:
-                            local_config['image_file'] = os.path.relpath(local_config['image_file'], base_path)
-                        except ValueError:
-                            # Wenn der Pfad nicht relativ gemacht werden kann, behalte den absoluten Pfad
-                            pass
+            # Absolute Pfade relativ zu den Prefixen dieses Boards machen (wenn möglich)
+            if local_config.get('audio_file') and os.path.isabs(local_config['audio_file']):
+                local_config['audio_file'] = self.library_path(local_config['audio_file'], self.defaults.soundpfad_prefix)
+            if local_config.get('image_file') and os.path.isabs(local_config['image_file']):
+                local_config['image_file'] = self.library_path(local_config['image_file'], self.defaults.imagepfad_prefix)
             
             # Setze die gewünschte Position, falls angegeben
             if target_position is not None:
@@ -425,29 +702,16 @@ class ConfigManager:
     def add_portable_button(self, portable_config, target_position=None):
         """Fügt einen Button aus einer portablen Konfiguration hinzu"""
         try:
-            # Importiere die portable Konfiguration
-            local_config = self.import_portable_config(portable_config, target_position)
+            # Verweis auf die Sound-Bibliothek statt einer vollständigen Kopie, dann lokal machen
+            local_config = self.import_portable_config(self.library_reference(portable_config), target_position)
             if not local_config:
                 return False
             
-            # Wenn keine Position angegeben wurde, füge den Button am Ende hinzu
-            if target_position is None:
-                target_position = len(self.buttonlist) + 1
-                local_config['position'] = target_position
-            
-            # Verschiebe existierende Buttons, um Platz zu machen
-            for button in self.buttonlist:
-                if button['position'] >= target_position:
-                    button['position'] += 1
-            
-            # Füge den neuen Button zur Liste hinzu
-            self.buttonlist.append(local_config)
-            
-            # Sortiere die Buttonliste nach Position
-            self.buttonlist.sort(key=lambda x: x.get('position', 0))
+            # Kopie aus einem anderen Board bekommt eine eigene ID
+            local_config.pop('id', None)
             
-            # Aktualisiere die Konfiguration
-            self.data['buttons'] = self.buttonlist
+            # Füge den Button ein (ohne Position am Ende), nachfolgende Buttons rücken auf
+            self.insert_button(local_config, target_position)
             
             # Markiere Änderungen
             self.mark_changed()
@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+#############################################################################################################
+def atomic_write_bytes(path, content):
+    """Schreibt eine Datei atomar: temporäre Datei im Zielverzeichnis, fsync, dann os.replace"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())              # Inhalt liegt sicher auf der Platte, bevor umbenannt wird
+        os.replace(temp_path, path)           # Atomarer Austausch, die alte Datei bleibt bis hierhin gültig
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    try:                                      # Auch den Verzeichniseintrag sichern (nur POSIX)
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+#############################################################################################################
+def atomic_write_text(path, text):
+    """Schreibt eine Textdatei atomar (siehe atomic_write_bytes)"""
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+#############################################################################################################
+def atomic_write_json(path, data):
+    """Schreibt JSON atomar (siehe atomic_write_text)"""
+    atomic_write_text(path, json.dumps(data, indent=4))
+
+#############################################################################################################
+def snapshot_config(data, omit=None):
+    """Kopiert die Konfiguration, damit der Writer-Thread unabhängig vom GTK-Thread serialisieren kann.
+    omit: Button-ID -> Schlüssel, die nicht mitgespeichert werden (aus der Sound-Bibliothek übernommen)"""
+    omit = omit or {}
+    copy = {}
+    for section, value in data.items():
+        if section == 'buttons':
+            copy[section] = [{key: (list(v) if isinstance(v, list) else v) for key, v in button.items()
+                              if key not in omit.get(button.get('id'), ())} for button in value]
+        elif isinstance(value, dict):
+            copy[section] = dict(value)
+        else:
+            copy[section] = value
+    return copy
+
+#############################################################################################################
+class ConfigWriter:
+    """Schreibt Konfigurationen in einem Hintergrund-Thread.
+
+    Mehrere Speicheraufträge für dieselbe Datei kurz hintereinander werden zu einem
+    Schreibvorgang zusammengefasst; geschrieben wird der zuletzt übergebene Stand. Rückruffunktionen
+    aller zusammengefassten Aufträge werden nach dem Schreiben im Writer-Thread mit dem Fehler
+    (oder None) aufgerufen.
+    """
+    def __init__(self, delay=0.3, max_delay=2.0):
+        self.delay     = delay       # Wartezeit nach dem letzten Auftrag in Sekunden
+        self.max_delay = max_delay   # Spätestens nach dieser Zeit wird trotzdem geschrieben
+        self.pending   = {}          # Pfad -> [Daten, Schreibfunktion, fällig um, erster Auftrag um, Rückrufe]
+        self.writing   = None        # Pfad, der gerade geschrieben wird
+        self.condition = threading.Condition()
+        self.thread    = None
+
+    #########################################################################################################
+    def submit(self, path, data, write_func=atomic_write_json, on_done=None):
+        """Plant das Schreiben von data nach path, ältere wartende Stände derselben Datei werden ersetzt.
+        on_done(error) wird nach dem Schreiben im Writer-Thread aufgerufen (error = None bei Erfolg)."""
+        now = time.monotonic()
+        with self.condition:
+            job = self.pending.get(path)
+            first = job[3] if job else now
+            due = min(now + self.delay, first + self.max_delay)
+            callbacks = job[4] if job else []
+            if on_done is not None:
+                callbacks.append(on_done)
+            self.pending[path] = [data, write_func, due, first, callbacks]
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._work, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    #########################################################################################################
+    def flush(self):
+        """Schreibt alle wartenden Aufträge sofort und wartet, bis sie fertig sind (z.B. beim Beenden)"""
+        with self.condition:
+            for job in self.pending.values():
+                job[2] = 0
+            self.condition.notify_all()
+            while self.pending or self.writing:
+                self.condition.wait()
+
+    #########################################################################################################
+    def _work(self):
+        """Hauptschleife des Writer-Threads"""
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                path = min(self.pending, key=lambda p: self.pending[p][2])
+                wait = self.pending[path][2] - time.monotonic()
+                if wait > 0:                                  # Noch nicht fällig, weitere Aufträge abwarten
+                    self.condition.wait(wait)
+                    continue
+                data, write_func, _, _, callbacks = self.pending.pop(path)
+                self.writing = path
+
+            error = None
+            try:
+                write_func(path, data)
+                print(f"Konfiguration gespeichert: {path}")
+            except Exception as e:
+                error = e
+                print(f"Fehler beim Speichern der Konfiguration '{path}': {e}")
+            for callback in callbacks:
+                try:
+                    callback(error)
+                except Exception as e:
+                    print(f"Fehler im Rückruf nach dem Speichern von '{path}': {e}")
+
+            with self.condition:
+                self.writing = None
+                self.condition.notify_all()
+
+# Gemeinsamer Writer für alle Speichervorgänge
+config_writer = ConfigWriter()
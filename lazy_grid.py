@@ -0,0 +1,261 @@
+import bisect
+import os
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib
+from Soundbutton import Soundbutton
+from sound_loader import sound_loader
+from sound_stream import should_stream
+
+#############################################################################################################
+def estimate_slot_size(default_button):
+    """Schätzt die Größe eines Soundbuttons (Mindestgröße, CSS-Größe, Innenabstand und Rahmen)"""
+    spacing = default_button['button_spacing']
+    width = max(150, default_button['button_width'] + 2 * spacing + 4)
+    height = max(75, default_button['button_height'] + 2 * spacing + 4)
+    return width, height
+
+#############################################################################################################
+class ButtonSlot(Gtk.Box):
+    """Platzhalter in der FlowBox, der seinen Soundbutton erst bei Bedarf erzeugt.
+
+    Der Platzhalter hält die Button-Konfiguration und hat die Größe eines Buttons,
+    damit Layout, Scrollbalken und Drag & Drop-Positionen stimmen, bevor der Button existiert.
+    """
+    def __init__(self, grid, button_config):
+        super().__init__()
+        self.grid          = grid
+        self.button_config = button_config
+        self.button        = None
+        self.set_size_request(*grid.slot_size)
+        self.request_warmup()
+
+    #########################################################################################################
+    def request_warmup(self):
+        """Lädt Sounds mit preload=true in den Cache, auch wenn der Button noch nicht erzeugt wurde"""
+        if not self.button_config.get('preload', False):
+            return
+        self.grid.board.config.resolve_library(self.button_config)  # Sounddatei evtl. aus der Sound-Bibliothek
+        if not self.button_config.get('audio_file'):
+            return
+        path = os.path.join(self.grid.board.config.defaults.soundpfad_prefix, self.button_config['audio_file'])
+        threshold_mb = self.grid.board.config.data['Window'].get('stream_threshold_mb', 0)
+        if not should_stream(path, self.button_config, threshold_mb):
+            sound_loader.request(path, None, self.button_config.get('position', 1000))
+
+    #########################################################################################################
+    def materialize(self):
+        """Erzeugt den Soundbutton oder nimmt einen freigegebenen aus dem Pool, falls noch keiner existiert"""
+        if self.button is None:
+            board = self.grid.board
+            board.config.resolve_library(self.button_config)           # Werte aus der Sound-Bibliothek erst jetzt laden
+            if self.grid.pool:
+                self.button = self.grid.pool.pop()
+                self.button.bind(self.button_config)                    # Nur Werte neu setzen, Widgets bleiben
+            else:
+                self.button = Soundbutton(parent=board, default_button=board.config.data['buttons'][0], button_config=self.button_config)
+            self.add(self.button)
+            self.button.show_all()
+            self.grid.materialized.add(self)
+        return self.button
+
+    #########################################################################################################
+    def release(self):
+        """Gibt den Soundbutton frei, solange er nicht spielt; der Sound bleibt im Sound-Cache.
+        Bis zu POOL_SIZE freigegebene Buttons werden für andere Platzhalter aufgehoben statt zerstört."""
+        if self.button is None or self.button.is_pressed:
+            return False
+        if len(self.grid.pool) < self.grid.POOL_SIZE:
+            self.button.cancel_preload()
+            self.remove(self.button)
+            self.grid.pool.append(self.button)
+        else:
+            self.button.delete_button()
+        self.button = None
+        self.grid.materialized.discard(self)
+        return True
+
+    #########################################################################################################
+    def get_index(self):
+        """Index des Platzhalters in der FlowBox"""
+        return self.get_parent().get_index()
+
+#############################################################################################################
+class LazyGrid:
+    """Erzeugt Soundbuttons nur im und nahe am sichtbaren Bereich des ScrolledWindow.
+
+    Beim Scrollen werden neu sichtbare Platzhalter mit Buttons gefüllt und weit entfernte
+    Buttons wieder freigegeben (außer sie spielen gerade). Freigegebene Buttons kommen in einen Pool und
+    werden für neu sichtbare Platzhalter per bind() umgestellt, statt sie zu zerstören und neu zu bauen.
+
+    Bei einer Suche werden nur die Platzhalter ein- oder ausgeblendet, deren Sichtbarkeit sich
+    gegenüber der vorherigen Suche ändert. Die Bereichsberechnung läuft dann über die Rangfolge der
+    sichtbaren Platzhalter (filter_positions) statt über die FlowBox-Indizes.
+    """
+    OVERSCAN_PAGES = 1   # Zusätzlich erzeugte Bildschirmseiten ober- und unterhalb
+    POOL_SIZE      = 64  # Freigegebene Buttons, die zum Wiederverwenden aufgehoben werden (etwa eine Seite)
+
+    def __init__(self, board, flowbox, scrolled_window):
+        self.board           = board
+        self.flowbox         = flowbox
+        self.scrolled_window = scrolled_window
+        self.materialized    = set()    # Platzhalter mit erzeugtem Button
+        self.pool            = []       # Freigegebene Soundbuttons ohne Platzhalter, werden per bind() wiederverwendet
+        self.update_pending  = False
+        self.slots_by_id     = {}       # Button-ID -> Platzhalter
+        self.hidden          = set()    # IDs der durch die Suche ausgeblendeten Buttons
+        self.filter_positions = None    # Sortierte FlowBox-Indizes der sichtbaren Platzhalter, None = alle
+        self.slot_size       = estimate_slot_size(board.config.data['buttons'][0])
+        scrolled_window.get_vadjustment().connect("value-changed", self.schedule_update)
+        flowbox.connect("size-allocate", self.schedule_update)      # Nach jedem Layout Sichtbarkeit prüfen
+
+    #########################################################################################################
+    def create_slot(self, button_config):
+        """Erzeugt einen Platzhalter für eine Button-Konfiguration"""
+        slot = ButtonSlot(self, button_config)
+        slot.show()
+        self.slots_by_id[button_config.get('id')] = slot
+        return slot
+
+    #########################################################################################################
+    def buttons(self):
+        """Alle aktuell erzeugten Soundbuttons"""
+        return [slot.button for slot in list(self.materialized) if slot.button is not None]
+
+    #########################################################################################################
+    def clear_pool(self):
+        """Zerstört die aufgehobenen Buttons, z.B. beim Beenden"""
+        for button in self.pool:
+            button.delete_button()
+        self.pool = []
+
+    #########################################################################################################
+    def forget(self, slot):
+        """Entfernt einen Platzhalter aus der Verwaltung, z.B. beim Löschen"""
+        self.materialized.discard(slot)
+        button_id = slot.button_config.get('id')
+        if self.slots_by_id.get(button_id) is slot:
+            del self.slots_by_id[button_id]
+        self.hidden.discard(button_id)
+
+    #########################################################################################################
+    def apply_filter(self, ids):
+        """Zeigt nur die Buttons mit den IDs aus ids (None = alle); ändert nur Platzhalter, deren Zustand wechselt"""
+        if ids is None:
+            new_hidden = set()
+        else:
+            new_hidden = self.slots_by_id.keys() - ids
+        for button_id in new_hidden - self.hidden:
+            child = self.slots_by_id[button_id].get_parent()
+            child.set_no_show_all(True)                  # Bleibt auch bei flowbox.show_all() ausgeblendet
+            child.hide()
+        for button_id in self.hidden - new_hidden:
+            slot = self.slots_by_id.get(button_id)
+            if slot is not None and slot.get_parent() is not None:
+                child = slot.get_parent()
+                child.set_no_show_all(False)
+                child.show()
+        self.hidden = new_hidden
+        if ids is None:
+            self.filter_positions = None
+        else:
+            self.filter_positions = sorted(self.slots_by_id[button_id].button_config['position'] - 1
+                                           for button_id in ids if button_id in self.slots_by_id)
+        self.schedule_update()
+
+    #########################################################################################################
+    def materialize_range(self, first, last):
+        """Erzeugt die Buttons der sichtbaren Platzhalter mit Rang first bis last (ohne Suche = Index)"""
+        for index in self.indices(first, last):
+            child = self.flowbox.get_child_at_index(index)
+            if child is None:
+                break
+            slot = child.get_child()
+            if isinstance(slot, ButtonSlot):
+                slot.materialize()
+
+    #########################################################################################################
+    def indices(self, first, last):
+        """FlowBox-Indizes der sichtbaren Platzhalter mit Rang first bis last"""
+        if self.filter_positions is None:
+            return range(max(0, first), last + 1)
+        return self.filter_positions[max(0, first):max(0, last + 1)]
+
+    #########################################################################################################
+    def rank(self, index):
+        """Rang eines FlowBox-Index unter den sichtbaren Platzhaltern"""
+        if self.filter_positions is None:
+            return index
+        return bisect.bisect_left(self.filter_positions, index)
+
+    #########################################################################################################
+    def materialize_initial(self, window_width, window_height):
+        """Erzeugt vor dem ersten Layout so viele Buttons, wie voraussichtlich ins Fenster passen"""
+        columns = max(1, window_width // self.slot_size[0])
+        rows = window_height // self.slot_size[1] + 1
+        self.materialize_range(0, columns * rows * (1 + self.OVERSCAN_PAGES) - 1)
+
+    #########################################################################################################
+    def schedule_update(self, *args):
+        """Plant eine Aktualisierung der erzeugten Buttons nach Scrollen oder Layoutänderungen"""
+        if not self.update_pending:
+            self.update_pending = True
+            GLib.idle_add(self.update)
+
+    #########################################################################################################
+    def index_at(self, y, fallback):
+        """Index des Platzhalters in der ersten Spalte auf Höhe y (FlowBox-Koordinaten)"""
+        for probe_y in (y, y + self.flowbox.get_row_spacing() + 1):   # Zeilenabstand überspringen
+            child = self.flowbox.get_child_at_pos(1, probe_y)
+            if child is not None:
+                return child.get_index()
+        return fallback
+
+    #########################################################################################################
+    def update(self):
+        """Erzeugt Buttons im sichtbaren Bereich samt Überhang und gibt weit entfernte frei"""
+        self.update_pending = False
+        first_child = self.flowbox.get_child_at_index(0)
+        if first_child is None:
+            return False
+        cell = first_child.get_allocation()
+        if cell.width <= 1:                                             # Noch kein Layout erfolgt
+            return False
+
+        adjustment = self.scrolled_window.get_vadjustment()
+        top = adjustment.get_value() - self.flowbox.get_allocation().y
+        page = adjustment.get_page_size()
+        column_spacing = self.flowbox.get_column_spacing()
+        columns = max(1, (self.flowbox.get_allocated_width() + column_spacing) // (cell.width + column_spacing))
+
+        first = self.rank(self.index_at(max(0, top), 0))
+        last = self.index_at(top + page, None)
+        if last is None:                                                # Unterhalb des letzten Buttons
+            last = first + columns * (int(page // max(1, cell.height)) + 1)
+        else:
+            last = self.rank(last)
+        last += columns - 1                                             # Ganze letzte Zeile
+        overscan = (last - first + 1) * self.OVERSCAN_PAGES
+
+        self.materialize_range(first - overscan, last + overscan)
+
+        # Weit entfernte Buttons freigeben (doppelter Überhang als Hysterese gegen Flackern)
+        keep_first = first - 2 * overscan
+        keep_last = last + 2 * overscan
+        for slot in list(self.materialized):
+            if slot.get_parent() is None:
+                self.materialized.discard(slot)
+                continue
+            rank = self.rank(slot.get_index())
+            if rank < keep_first or rank > keep_last or slot.button_config.get('id') in self.hidden:
+                slot.release()
+
+        # Sichtbare Buttons, deren Sound noch geladen wird, beim Vorladen vorziehen
+        for index in self.indices(first, last):
+            child = self.flowbox.get_child_at_index(index)
+            if child is None:
+                break
+            button = child.get_child().button if isinstance(child.get_child(), ButtonSlot) else None
+            if button is not None and button.loading:
+                sound_loader.prioritize(button.preload_path, 0)
+        return False  # idle-Callback nur einmal ausführen
@@ -0,0 +1,161 @@
+import math
+import operator
+import os
+import sys
+from audio_probe import probe
+from sqlite_store import SqliteStore
+
+#############################################################################################################
+class MetadataIndex(SqliteStore):
+    """Benutzerweiter Index mit Metadaten aller bekannten Sounddateien (SQLite).
+
+    Gespeichert werden pro Datei Größe, Änderungszeit, Länge, Abtastrate, Kanäle, Format sowie
+    Spitzen- und RMS-Pegel. Ein Eintrag gilt, solange Größe und Änderungszeit der Datei passen; sonst
+    wird der Dateikopf neu gelesen. Die Pegel werden nebenbei aus bereits dekodierten Sounds berechnet
+    (siehe sound_loader), dafür wird nie eine Datei eigens dekodiert. Zugriffe sind threadsicher.
+    """
+    FIELDS = ('duration_s', 'sample_rate', 'channels', 'format', 'peak', 'rms')
+    LEVEL_SAMPLES = 100000   # Höchstens so viele Samples für die Pegelberechnung auswerten (alle Kanäle zusammen)
+    BASE_DIR    = ('XDG_CACHE_HOME', '.cache')
+    FILE_NAME   = 'metadata.sqlite'
+    PRAGMAS     = ("journal_mode=WAL",       # Schreiben blockiert Lesen nicht
+                   "synchronous=NORMAL")     # Cache, ein verlorener Eintrag wird neu gelesen
+    SCHEMA      = ("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                   "duration_s REAL, sample_rate INTEGER, channels INTEGER, format TEXT, peak REAL, rms REAL)")
+    TABLE       = 'files'
+    KEY_COLUMN  = 'path'                     # entries: Pfad -> (Größe, mtime, Metadaten)
+    PATH_COLUMN = 'path'
+
+    #########################################################################################################
+    def get(self, path):
+        """Liefert die gespeicherten Metadaten, falls sie zur aktuellen Datei passen, sonst None"""
+        try:
+            real_path = os.path.realpath(path)
+            stat = os.stat(real_path)
+        except OSError:
+            return None
+        with self.lock:
+            return self._get(real_path, stat)
+
+    #########################################################################################################
+    def lookup(self, path):
+        """Liefert die Metadaten einer Datei, liest bei fehlendem oder veraltetem Eintrag den Dateikopf"""
+        try:
+            real_path = os.path.realpath(path)
+            stat = os.stat(real_path)
+        except OSError:
+            return None
+        with self.lock:
+            info = self._get(real_path, stat)
+        if info is not None:
+            return info
+        info = probe(real_path) or {}                 # Außerhalb des Locks, der Dateikopf kann langsam sein
+        info['format'] = os.path.splitext(real_path)[1].lstrip('.').lower()
+        info['peak'] = info['rms'] = None
+        with self.lock:
+            self._store(real_path, stat, info)
+        return info
+
+    #########################################################################################################
+    def duration(self, path):
+        """Länge in Sekunden aus dem Index, 0 wenn unbekannt"""
+        info = self.lookup(path)
+        return (info or {}).get('duration_s') or 0
+
+    #########################################################################################################
+    def record_levels(self, path, sound):
+        """Berechnet Spitzen- und RMS-Pegel aus einem bereits dekodierten pygame-Sound und speichert sie"""
+        info = self.lookup(path)
+        if info is None or info.get('peak') is not None:
+            return
+        levels = measure_levels(sound)
+        if levels is None:
+            return
+        info['peak'], info['rms'] = levels
+        if not info.get('duration_s'):
+            info['duration_s'] = round(sound.get_length(), 3)   # z.B. Format, dessen Kopf nicht gelesen werden kann
+        try:
+            real_path = os.path.realpath(path)
+            stat = os.stat(real_path)
+        except OSError:
+            return
+        with self.lock:
+            self._store(real_path, stat, info)
+
+    #########################################################################################################
+    def _get(self, real_path, stat):
+        """Sucht einen gültigen Eintrag im Speicher oder in der Datenbank (Aufruf unter self.lock)"""
+        entry = self.entries.get(real_path)
+        if entry is None:
+            row = self.connect().execute(
+                "SELECT size, mtime_ns, " + ", ".join(self.FIELDS) + " FROM files WHERE path = ?", (real_path,)).fetchone()
+            if row is None:
+                return None
+            entry = (row[0], row[1], dict(zip(self.FIELDS, row[2:])))
+            self.entries[real_path] = entry
+        if entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            return None                               # Datei wurde geändert
+        return dict(entry[2])
+
+    #########################################################################################################
+    def _store(self, real_path, stat, info):
+        """Schreibt einen Eintrag (Aufruf unter self.lock)"""
+        values = {field: info.get(field) for field in self.FIELDS}
+        self.entries[real_path] = (stat.st_size, stat.st_mtime_ns, values)
+        connection = self.connect()
+        connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (real_path, stat.st_size, stat.st_mtime_ns) + tuple(values[field] for field in self.FIELDS))
+        connection.commit()
+
+#############################################################################################################
+def measure_levels(sound):
+    """Spitzen- und RMS-Pegel (0.0 - 1.0) eines dekodierten Sounds, bei langen Sounds aus einer Stichprobe.
+    Gelesen wird ohne Kopie aus dem Puffer des Sounds, jeder n-te Frame mit allen Kanälen; min, max
+    und sum(map(...)) laufen in C, es gibt keine Python-Schleife pro Sample."""
+    import pygame
+    mixer_init = pygame.mixer.get_init()
+    if not mixer_init:
+        return None
+    sample_format, channels = mixer_init[1], mixer_init[2]
+    if sample_format == -16:
+        typecode, scale = 'h', 32768.0
+    elif sample_format == 32:
+        typecode, scale = 'f', 1.0
+    else:
+        return None                                    # Seltene Formate werden nicht ausgewertet
+    try:
+        buffer = memoryview(sound).cast('B')           # pygame 2: Puffer des Sounds, (Frames, Kanäle)
+    except TypeError:
+        buffer = sound.get_raw()                       # Ältere pygame-Versionen: Kopie der Rohdaten
+    samples = memoryview(buffer).cast(typecode)
+    frames = len(samples) // channels
+    if not frames:
+        return None
+    stride = max(1, frames * channels // MetadataIndex.LEVEL_SAMPLES) * channels   # Ganze Frames überspringen
+    peak = squares = 0
+    count = 0
+    for channel in range(channels):
+        sampled = samples[channel::stride]
+        peak = max(peak, abs(min(sampled)), abs(max(sampled)))
+        squares += sum(map(operator.mul, sampled, sampled))
+        count += len(sampled)
+    return round(min(1.0, peak / scale), 4), round(math.sqrt(squares / count) / scale, 4)
+
+#############################################################################################################
+def format_duration(seconds):
+    """Formatiert eine Länge als m:ss"""
+    seconds = int(round(seconds))
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+# Gemeinsamer Metadaten-Index für alle Boards
+metadata_index = MetadataIndex()
+
+#############################################################################################################
+if __name__ == '__main__':
+    # python3 metadata_index.py <datei> [...]    Metadaten anzeigen (und in den Index aufnehmen)
+    # python3 metadata_index.py prune            Einträge für gelöschte Dateien entfernen
+    if sys.argv[1:] == ['prune']:
+        print(f"{metadata_index.prune()} Einträge entfernt")
+    else:
+        for path in sys.argv[1:]:
+            print(f"{path}: {metadata_index.lookup(path)}")
@@ -0,0 +1,344 @@
+import os
+import sys
+import time
+from audio_mixer import mixer_starter, LatencyMeter
+from sound_cache import sound_cache
+from sound_stream import MusicStream, should_stream
+
+#############################################################################################################
+class Voice:
+    """Ein laufender Sound: Schlüssel, Kanal, Sound, Abspieleinstellungen und Rückruf für das Ende"""
+    __slots__ = ('key', 'channel', 'index', 'sound', 'fade_ms', 'priority', 'started_ms', 'fade_out_at_ms', 'on_finished')
+
+    def __init__(self, key, channel, index, sound, fade_ms, priority, started_ms, fade_out_at_ms, on_finished):
+        self.key            = key
+        self.channel        = channel
+        self.index          = index             # Nummer des Mixer-Kanals, None bei gestreamten Sounds
+        self.sound          = sound             # Zum Prüfen, ob der Kanal noch diesen Sound spielt
+        self.fade_ms        = fade_ms
+        self.priority       = priority
+        self.started_ms     = started_ms
+        self.fade_out_at_ms = fade_out_at_ms    # Zeitpunkt (monotone ms) des geplanten Fade-Outs oder None
+        self.on_finished    = on_finished       # Wird ohne Argumente aufgerufen, wenn der Sound endet
+
+#############################################################################################################
+class PlaybackEngine:
+    """Abspiellogik ohne GTK: Laden, Auslösen, Stoppen, Fades, Endlosschleifen und Stimmenverwaltung.
+
+    Die Stimmen werden über einen beliebigen Schlüssel verwaltet (im Soundboard der Soundbutton).
+    poll() prüft alle Kanäle, löst geplante Fade-Outs aus und ruft für beendete Sounds on_finished auf.
+    In der Oberfläche ruft ein über scheduler (z.B. GLib.timeout_add) angelegter Timer poll() auf,
+    solange Sounds laufen; ohne scheduler muss der Aufrufer poll() selbst aufrufen (headless).
+
+    Sind alle Mixer-Kanäle belegt, wird die Kanalzahl bis max_channels verdoppelt, danach wird nach
+    der eingestellten Strategie eine Stimme verdrängt ("oldest", "quietest" oder "priority").
+    Stimmen mit höherer Priorität als der neue Sound werden nie verdrängt.
+
+    Ein Kanal wird nach dem Ende eines Sounds neu vergeben, pygame liefert dafür jedes Mal ein neues
+    Channel-Objekt. Die Engine merkt sich deshalb je Kanalnummer die Stimme, die ihn belegt, und meldet
+    beim erneuten Vergeben die alte Stimme ab; geteilte Sounds aus dem Cache sind so unterscheidbar.
+    Bevor ein Kanal ausgeblendet, gestoppt oder in der Lautstärke geändert wird, prüft owns_channel,
+    ob er noch zur Stimme gehört. Der Mixer lässt sich über mixer ersetzen (z.B. in Tests).
+    """
+    TICK_MS = 20  # Prüfintervall in Millisekunden
+    STEALING_POLICIES = ("oldest", "quietest", "priority")
+
+    def __init__(self):
+        self.voices              = {}      # Schlüssel -> Voice
+        self.channel_voices      = {}      # Kanalnummer -> Voice, die den Kanal zuletzt bekommen hat
+        self.mixer               = None    # None = pygame.mixer, sonst Ersatz mit derselben Schnittstelle
+        self.scheduler           = None    # scheduler(ms, callback) -> Timer-ID, z.B. GLib.timeout_add
+        self.timer_id            = None
+        self.max_channels        = 64
+        self.policy              = "oldest"
+        self.stream_threshold_mb = 0
+        self.stolen              = 0       # Anzahl verdrängter Stimmen (Statistik)
+
+    #########################################################################################################
+    def configure(self, max_channels=None, policy=None, stream_threshold_mb=None):
+        """Setzt maximale Kanalzahl, Verdrängungsstrategie und Schwelle für das Streamen"""
+        if max_channels is not None:
+            self.max_channels = max_channels
+        if policy is not None:
+            if policy not in self.STEALING_POLICIES:
+                print(f"Unbekannte Verdrängungsstrategie '{policy}', verwende 'oldest'")
+                policy = "oldest"
+            self.policy = policy
+        if stream_threshold_mb is not None:
+            self.stream_threshold_mb = stream_threshold_mb
+
+    #########################################################################################################
+    def now_ms(self):
+        """Monotone Zeit in Millisekunden"""
+        return time.monotonic() * 1000
+
+    #########################################################################################################
+    def use_streaming(self, path, button_config=None):
+        """Prüft, ob der Sound gestreamt werden soll (Button-Option 'stream' oder Größenschwelle)"""
+        return should_stream(path, button_config or {}, self.stream_threshold_mb)
+
+    #########################################################################################################
+    def load(self, path, button_config=None):
+        """Lädt einen Sound: lange Dateien als Stream, sonst dekodiert über den Sound-Cache"""
+        if self.use_streaming(path, button_config):
+            return MusicStream(path, (button_config or {}).get('duration_s'))
+        return sound_cache.get(path)
+
+    #########################################################################################################
+    def trigger(self, key, sound, volume=1.0, loop=False, fade_ms=0, priority=0, on_finished=None):
+        """Spielt einen Sound für key ab und liefert den Kanal, None wenn kein Kanal frei ist"""
+        if key in self.voices:                           # Erneutes Auslösen ersetzt die laufende Stimme
+            self.stop(key)
+        loops = -1 if loop else 0
+        if isinstance(sound, MusicStream):               # Gestreamter Sound ist zugleich sein eigener Kanal
+            channel = sound.play(loops=loops, fade_ms=fade_ms, volume=volume)
+            index = None
+        else:
+            # Der Sound kann von mehreren Buttons geteilt werden, daher wird die Lautstärke
+            # nicht am Sound, sondern am Kanal vor dem Abspielen gesetzt
+            index, channel = self.acquire_channel(priority)
+            if channel is None:
+                return None
+            previous = self.channel_voices.get(index)
+            if previous is not None and self.voices.get(previous.key) is previous:
+                self.finish(previous.key)                # Kanal war frei, die alte Stimme ist also beendet
+            channel.set_volume(volume)
+            channel.play(sound, loops=loops, fade_ms=fade_ms)
+
+        now = self.now_ms()
+        fade_out_at_ms = None
+        length = sound.get_length()
+        if not loop and fade_ms > 0 and length > 0:     # Fade-Out nur wenn Fade-Time > 0 und Länge bekannt
+            fade_out_at_ms = now + max(0, int(length * 1000 - fade_ms))
+        voice = self.voices[key] = Voice(key, channel, index, sound, fade_ms, priority, now, fade_out_at_ms, on_finished)
+        if index is not None:
+            self.channel_voices[index] = voice
+        self.start_timer()
+        return channel
+
+    #########################################################################################################
+    def stop(self, key):
+        """Blendet den Sound von key mit seiner Fade-Zeit aus und meldet die Stimme ab"""
+        voice = self.voices.pop(key, None)
+        if voice is None:
+            return False
+        if self.owns_channel(voice):
+            if voice.channel.get_busy():
+                voice.channel.fadeout(voice.fade_ms)
+            if voice.index is not None:
+                del self.channel_voices[voice.index]
+        return True
+
+    #########################################################################################################
+    def owns_channel(self, voice):
+        """Gehört der Kanal noch der Stimme? Ein beendeter Kanal wird evtl. schon für einen anderen Button
+        mit demselben (geteilten) Sound benutzt"""
+        if voice.index is not None and self.channel_voices.get(voice.index) is not voice:
+            return False
+        return voice.channel.get_sound() is voice.sound
+
+    #########################################################################################################
+    def finish(self, key):
+        """Meldet die beendete Stimme von key ab und ruft ihr on_finished auf"""
+        voice = self.voices.pop(key, None)
+        if voice is None:
+            return
+        if voice.index is not None and self.channel_voices.get(voice.index) is voice:
+            del self.channel_voices[voice.index]
+        if voice.on_finished:
+            voice.on_finished()
+
+    #########################################################################################################
+    def stop_all(self):
+        """Stoppt alle laufenden Sounds und meldet ihr Ende"""
+        for key in list(self.voices):
+            voice = self.voices[key]
+            self.stop(key)
+            if voice.on_finished:
+                voice.on_finished()
+
+    #########################################################################################################
+    def set_volume(self, key, volume):
+        """Ändert die Lautstärke eines laufenden Sounds (0.0 - 1.0)"""
+        voice = self.voices.get(key)
+        if voice is not None and self.owns_channel(voice):
+            voice.channel.set_volume(volume)
+
+    #########################################################################################################
+    def is_playing(self, key):
+        """Läuft für key gerade ein Sound?"""
+        return key in self.voices
+
+    #########################################################################################################
+    def position_s(self, key):
+        """Sekunden seit dem Start des Sounds von key, None wenn er nicht läuft"""
+        voice = self.voices.get(key)
+        if voice is None:
+            return None
+        return (self.now_ms() - voice.started_ms) / 1000
+
+    #########################################################################################################
+    def active_count(self):
+        """Anzahl der laufenden Sounds"""
+        return len(self.voices)
+
+    #########################################################################################################
+    def get_mixer(self):
+        """Der Mixer, dessen Kanäle vergeben werden (startet pygame.mixer bei Bedarf)"""
+        if self.mixer is not None:
+            return self.mixer
+        mixer_starter.ensure()
+        import pygame
+        return pygame.mixer
+
+    #########################################################################################################
+    def find_free_channel(self, mixer, start=0):
+        """Erster nicht spielender Kanal ab start als (Nummer, Kanal), sonst (None, None).
+        Statt find_channel(), weil nur so die Nummer des Kanals bekannt ist"""
+        for index in range(start, mixer.get_num_channels()):
+            channel = mixer.Channel(index)
+            if not channel.get_busy():
+                return index, channel
+        return None, None
+
+    #########################################################################################################
+    def acquire_channel(self, priority=0):
+        """Liefert (Nummer, Kanal) eines freien Kanals, vergrößert den Kanalpool oder verdrängt eine Stimme"""
+        mixer = self.get_mixer()
+        index, channel = self.find_free_channel(mixer)
+        if channel is None:
+            num_channels = mixer.get_num_channels()
+            if num_channels < self.max_channels:
+                new_num_channels = min(self.max_channels, max(1, num_channels * 2))
+                mixer.set_num_channels(new_num_channels)
+                print(f"Kanalpool vergrößert: {num_channels} -> {new_num_channels}")
+                index, channel = self.find_free_channel(mixer, num_channels)
+        if channel is None:
+            index, channel = self.steal_voice(priority)
+        return index, channel
+
+    #########################################################################################################
+    def steal_voice(self, priority):
+        """Stoppt eine laufende Stimme nach der Verdrängungsstrategie und gibt (Nummer, Kanal) zurück"""
+        candidates = [key for key, voice in self.voices.items()
+                      if voice.index is not None and voice.priority <= priority and self.owns_channel(voice)]
+        if not candidates:
+            print("Kein Kanal frei und keine Stimme mit passender Priorität zum Verdrängen")
+            return None, None
+
+        voices = self.voices
+        if self.policy == "quietest":
+            victim = min(candidates, key=lambda k: (voices[k].channel.get_volume(), voices[k].started_ms))
+        elif self.policy == "priority":
+            victim = min(candidates, key=lambda k: (voices[k].priority, voices[k].started_ms))
+        else:  # oldest
+            victim = min(candidates, key=lambda k: voices[k].started_ms)
+
+        voice = voices[victim]
+        voice.channel.stop()               # Sofort stoppen, damit der Kanal direkt wiederverwendet werden kann
+        self.stolen += 1
+        self.finish(victim)                # z.B. Button visuell zurücksetzen
+        print(f"Stimme verdrängt ({self.policy}): {getattr(victim, 'button_config', {}).get('text', victim)}")
+        return voice.index, voice.channel
+
+    #########################################################################################################
+    def start_timer(self):
+        """Startet den Prüf-Timer, falls ein scheduler gesetzt ist und er noch nicht läuft"""
+        if self.scheduler is not None and self.timer_id is None:
+            self.timer_id = self.scheduler(self.TICK_MS, self.tick)
+
+    #########################################################################################################
+    def tick(self):
+        """Timer-Callback: prüft alle Stimmen und beendet den Timer, wenn keine mehr laufen"""
+        if self.poll():
+            return True
+        self.timer_id = None
+        return False
+
+    #########################################################################################################
+    def poll(self):
+        """Fade-Outs auslösen und beendete Sounds melden; True, solange noch Sounds laufen"""
+        now = self.now_ms()
+        finished = [key for key, voice in self.voices.items()
+                    if not self.owns_channel(voice) or not voice.channel.get_busy()]
+        for key in finished:
+            self.finish(key)
+
+        for voice in self.voices.values():
+            if voice.fade_out_at_ms is not None and voice.fade_out_at_ms <= now:
+                voice.fade_out_at_ms = None
+                voice.channel.fadeout(voice.fade_ms)
+        return bool(self.voices)
+
+    #########################################################################################################
+    def wait(self, timeout_s=None):
+        """Headless: ruft poll() auf, bis alle Sounds beendet sind oder timeout_s abgelaufen ist"""
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while self.poll():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.TICK_MS / 1000)
+        return True
+
+# Gemeinsame Abspiel-Engine für alle Buttons
+playback_engine = PlaybackEngine()
+
+#############################################################################################################
+def load_test(board_path, triggers=200, interval_ms=5, wait_s=10):
+    """Headless-Lasttest: löst die Sounds eines Boards reihum aus und misst die Auslösezeit"""
+    from board_format import read_board
+    from audio_mixer import get_mixer_settings
+    data = read_board(board_path)
+    window = data.get('Window', {})
+    mixer_starter.configure(window)
+    playback_engine.configure(window.get('mixer_max_channels', 64), window.get('voice_stealing', 'oldest'),
+                              window.get('stream_threshold_mb', 0))
+    prefix = data['buttons'][0].get('soundpfad_prefix', '') if data.get('buttons') else ''
+    buttons = [b for b in data.get('buttons', [])[1:] if b.get('audio_file')]
+    if not buttons:
+        print("Keine Buttons mit Sounddatei im Board")
+        return
+
+    start = time.perf_counter()
+    sounds = []
+    for button in buttons:
+        path = os.path.join(prefix, button['audio_file'])          # Wie im Soundboard relativ zum Arbeitsverzeichnis
+        try:
+            sounds.append((button, playback_engine.load(path, button)))
+        except Exception as e:
+            print(f"Fehler beim Laden von {path}: {e}")
+    print(f"{len(sounds)} Sounds geladen in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(Mixer: {get_mixer_settings(window)['mixer_frequency']} Hz)")
+    if not sounds:
+        return
+
+    meter = LatencyMeter()
+    meter.enabled = True
+    failed = 0
+    for i in range(triggers):
+        button, sound = sounds[i % len(sounds)]
+        key = (i, button.get('position'))
+        start = time.perf_counter()
+        channel = playback_engine.trigger(key, sound, button.get('volume', 50) / 100.0, button.get('loop', False),
+                                          button.get('fade_time_ms', 0), button.get('priority', 0))
+        if channel is None:
+            failed += 1
+        else:
+            meter.samples.append((time.perf_counter() - start) * 1000)
+        playback_engine.poll()
+        time.sleep(interval_ms / 1000)
+    print(f"Auslösungen: {triggers}, ohne Kanal: {failed}, verdrängt: {playback_engine.stolen}, "
+          f"gleichzeitig aktiv: {playback_engine.active_count()}")
+    meter.report()
+    if not playback_engine.wait(wait_s):
+        playback_engine.stop_all()
+    mixer_starter.quit()
+
+#############################################################################################################
+if __name__ == '__main__':
+    # python3 playback_engine.py <board> [auslösungen]    ohne Fenster und Audiogerät (SDL-Dummy-Treiber)
+    if len(sys.argv) < 2:
+        print("Verwendung: playback_engine.py <board> [auslösungen]")
+        sys.exit(1)
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')    # Vor dem ersten pygame-Import setzen
+    load_test(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 200)
@@ -0,0 +1,110 @@
+import bisect
+import os
+import re
+
+TOKEN_SPLIT = re.compile(r'[\W_]+')                       # Wörter in Text, Tags und Dateinamen
+SEARCH_KEYS = frozenset(('text', 'tags', 'audio_file', 'image_file')) # Schlüssel, deren Änderung den Index betrifft
+
+#############################################################################################################
+def tokenize(value):
+    """Zerlegt einen Text in kleingeschriebene Suchbegriffe"""
+    return [token for token in TOKEN_SPLIT.split(value.lower()) if token]
+
+#############################################################################################################
+def button_tokens(button_config):
+    """Alle Suchbegriffe eines Buttons: Text, Tags sowie Namen und Ordner von Sound- und Bilddatei"""
+    tokens = set(tokenize(button_config.get('text', '')))
+    for tag in button_config.get('tags') or []:
+        tokens.update(tokenize(tag))
+    for key in ('audio_file', 'image_file'):
+        path = button_config.get(key)
+        if path:
+            tokens.update(tokenize(os.path.splitext(path)[0]))
+    return tokens
+
+#############################################################################################################
+class SearchIndex:
+    """Invertierter Index über die Buttons eines Boards für die Suche beim Tippen.
+
+    Jeder Suchbegriff zeigt auf die IDs der Buttons, die ihn enthalten. Die Begriffe liegen zusätzlich
+    sortiert in einer Liste, sodass die Präfixsuche per bisect nur die passenden Begriffe anfasst statt
+    alle Buttons. Mehrere Wörter einer Suche müssen alle passen. Der Index wird erst bei der ersten
+    Suche aufgebaut und danach bei jeder Änderung eines Buttons nur für diesen Button aktualisiert.
+    """
+    def __init__(self):
+        self.postings = {}       # Begriff -> Menge der Button-IDs
+        self.tokens   = []       # Alle Begriffe, sortiert
+        self.by_id    = {}       # Button-ID -> Begriffe des Buttons
+        self.built    = False
+
+    #########################################################################################################
+    def build(self, buttonlist):
+        """Baut den Index für alle Buttons (außer dem Default-Button) neu auf"""
+        self.postings = {}
+        self.by_id = {}
+        for button_config in buttonlist[1:]:
+            self._add(button_config)
+        self.tokens = sorted(self.postings)
+        self.built = True
+
+    #########################################################################################################
+    def update(self, button_config):
+        """Aktualisiert die Einträge eines Buttons nach einer Änderung oder beim Einfügen"""
+        if not self.built or button_config.get('position') == 0:
+            return
+        old_tokens = self.by_id.get(button_config.get('id'), set())
+        new_tokens = button_tokens(button_config)
+        if old_tokens == new_tokens:
+            return
+        self.remove(button_config.get('id'))
+        self._add(button_config, new_tokens)
+
+    #########################################################################################################
+    def remove(self, button_id):
+        """Entfernt einen Button aus dem Index"""
+        if not self.built:
+            return
+        for token in self.by_id.pop(button_id, ()):
+            ids = self.postings[token]
+            ids.discard(button_id)
+            if not ids:                                   # Letzter Button mit diesem Begriff
+                del self.postings[token]
+                del self.tokens[bisect.bisect_left(self.tokens, token)]
+
+    #########################################################################################################
+    def _add(self, button_config, tokens=None):
+        """Trägt einen Button ein; neue Begriffe werden sortiert einsortiert, sobald der Index aufgebaut ist"""
+        button_id = button_config.get('id')
+        if tokens is None:
+            tokens = button_tokens(button_config)
+        self.by_id[button_id] = tokens
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = ids = set()
+                if self.built:
+                    bisect.insort(self.tokens, token)
+            ids.add(button_id)
+
+    #########################################################################################################
+    def match_prefix(self, prefix):
+        """IDs aller Buttons mit einem Begriff, der mit prefix beginnt"""
+        start = bisect.bisect_left(self.tokens, prefix)
+        end = bisect.bisect_left(self.tokens, prefix + '\uffff')
+        if end - start == 1:
+            return self.postings[self.tokens[start]]
+        return set().union(*(self.postings[token] for token in self.tokens[start:end]))
+
+    #########################################################################################################
+    def search(self, query):
+        """IDs der Buttons, auf die alle Wörter der Suche (als Präfix) passen; None bei leerer Suche"""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        result = None
+        for term in sorted(set(terms), key=len, reverse=True):   # Lange Begriffe zuerst, sie passen seltener
+            ids = self.match_prefix(term)
+            result = set(ids) if result is None else result & ids
+            if not result:
+                break
+        return result
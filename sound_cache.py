@@ -0,0 +1,83 @@
+import os
+import threading
+from collections import OrderedDict
+from audio_mixer import mixer_starter
+
+#############################################################################################################
+class SoundCache:
+    """Prozessweiter Cache für dekodierte Sounds mit LRU-Verdrängung"""
+    def __init__(self, budget_mb=256):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)   # Speicherbudget in Bytes
+        self.used_bytes   = 0                               # Aktuell belegter Speicher
+        self.entries      = OrderedDict()                   # Schlüssel -> (Sound, Größe), älteste zuerst
+        self.lock         = threading.Lock()                # Schutz für den Zugriff aus mehreren Threads
+
+    #########################################################################################################
+    def set_budget_mb(self, budget_mb):
+        """Setzt das Speicherbudget in MB und verdrängt bei Bedarf alte Einträge"""
+        with self.lock:
+            self.budget_bytes = int(budget_mb * 1024 * 1024)
+            self._evict()
+
+    #########################################################################################################
+    def make_key(self, path):
+        """Bildet den Cache-Schlüssel aus aufgelöstem Pfad, Änderungszeit und Mixer-Format"""
+        import pygame
+        real_path = os.path.realpath(path)
+        mtime = os.stat(real_path).st_mtime_ns       # Wirft FileNotFoundError, wenn die Datei fehlt
+        return (real_path, mtime, pygame.mixer.get_init())
+
+    #########################################################################################################
+    def get(self, path):
+        """Liefert den dekodierten Sound zu einem Pfad, lädt ihn bei Bedarf"""
+        mixer_starter.ensure()                       # Dekodieren braucht das Format des laufenden Mixers
+        import pygame
+        key = self.make_key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)        # Als zuletzt benutzt markieren
+                return entry[0]
+
+        # Dekodieren außerhalb des Locks, damit andere Threads nicht blockiert werden
+        sound = pygame.mixer.Sound(key[0])
+        size = self.estimate_size(sound)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:                    # Ein anderer Thread war schneller
+                self.entries.move_to_end(key)
+                return entry[0]
+            self.entries[key] = (sound, size)
+            self.used_bytes += size
+            self._evict()
+        return sound
+
+    #########################################################################################################
+    def estimate_size(self, sound):
+        """Schätzt den Speicherbedarf eines dekodierten Sounds in Bytes"""
+        import pygame
+        mixer_init = pygame.mixer.get_init()
+        if not mixer_init:
+            return 0
+        frequency, sample_format, channels = mixer_init
+        return int(sound.get_length() * frequency * channels * (abs(sample_format) // 8))
+
+    #########################################################################################################
+    def _evict(self):
+        """Verdrängt die am längsten unbenutzten Einträge, bis das Budget eingehalten wird"""
+        # Der zuletzt eingefügte Eintrag bleibt immer erhalten, auch wenn er allein zu groß ist
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            key, (sound, size) = self.entries.popitem(last=False)
+            self.used_bytes -= size
+            print(f"Sound aus dem Cache verdrängt: {key[0]}")
+
+    #########################################################################################################
+    def clear(self):
+        """Leert den Cache vollständig"""
+        with self.lock:
+            self.entries.clear()
+            self.used_bytes = 0
+
+# Gemeinsamer Cache für alle Buttons und Boards im Prozess
+sound_cache = SoundCache()
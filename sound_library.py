@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+from sqlite_store import SqliteStore
+
+# Schlüssel eines Buttons, die ein Bibliothekseintrag für alle Boards gemeinsam hält
+LIBRARY_KEYS = ('audio_file', 'image_file', 'text', 'tags', 'volume', 'loop', 'fade_time_ms',
+                'use_custom_text_color', 'text_color', 'use_custom_bg_color', 'background_color',
+                'duration_s', 'sample_rate', 'channels')
+
+#############################################################################################################
+def entry_from_config(button_config, soundpfad_prefix='', imagepfad_prefix=''):
+    """Bibliothekseintrag aus einer Button-Konfiguration, Sound- und Bildpfad werden absolut"""
+    entry = {}
+    for key in LIBRARY_KEYS:
+        value = button_config.get(key)
+        if value is None or value == '':
+            continue
+        if key == 'audio_file':
+            value = os.path.abspath(os.path.join(soundpfad_prefix, value))
+        elif key == 'image_file':
+            value = os.path.abspath(os.path.join(imagepfad_prefix, value))
+        entry[key] = value
+    return entry
+
+#############################################################################################################
+class SoundLibrary(SqliteStore):
+    """Benutzerweite Bibliothek von Sounds, auf die Buttons aller Boards per library_id verweisen (SQLite).
+
+    Ein Eintrag hält Sounddatei (absoluter Pfad), Bild, Text, Tags, Lautstärke, Farben und die Metadaten
+    des Sounds. Ein Board speichert für einen solchen Button nur library_id und die Werte, die es
+    abweichend selbst setzt. Einträge werden erst geladen, wenn ein Button sie braucht, und danach im
+    Speicher gehalten. Je Sounddatei gibt es genau einen Eintrag. Zugriffe sind threadsicher.
+    """
+    QUERY_CHUNK = 500        # Höchstens so viele IDs pro SELECT ... IN (...)
+    FILE_NAME   = 'library.sqlite'           # Im Datenverzeichnis des Benutzers
+    SCHEMA      = "CREATE TABLE IF NOT EXISTS sounds (id INTEGER PRIMARY KEY, audio_file TEXT UNIQUE, entry TEXT)"
+    TABLE       = 'sounds'
+    KEY_COLUMN  = 'id'                       # entries: library_id -> Eintrag
+    PATH_COLUMN = 'audio_file'
+
+    #########################################################################################################
+    def get(self, library_id):
+        """Liefert den Eintrag zu einer ID oder None; nicht verändern, er wird von allen Buttons geteilt"""
+        with self.lock:
+            entry = self.entries.get(library_id)
+            if entry is None:
+                row = self.connect().execute("SELECT entry FROM sounds WHERE id = ?", (library_id,)).fetchone()
+                if row is not None:
+                    entry = self.entries[library_id] = json.loads(row[0])
+            return entry
+
+    #########################################################################################################
+    def load_many(self, library_ids):
+        """Lädt alle noch fehlenden Einträge mit wenigen Abfragen, z.B. bevor ein ganzes Board durchsucht wird"""
+        with self.lock:
+            missing = sorted({library_id for library_id in library_ids if library_id not in self.entries})
+            connection = self.connect() if missing else None
+            for start in range(0, len(missing), self.QUERY_CHUNK):
+                chunk = missing[start:start + self.QUERY_CHUNK]
+                rows = connection.execute("SELECT id, entry FROM sounds WHERE id IN (%s)" % ",".join("?" * len(chunk)), chunk)
+                for library_id, entry in rows:
+                    self.entries[library_id] = json.loads(entry)
+
+    #########################################################################################################
+    def add(self, entry):
+        """Nimmt einen Eintrag auf und liefert seine ID; gibt es die Sounddatei schon, deren ID"""
+        audio_file = entry.get('audio_file')
+        if not audio_file:
+            return None
+        with self.lock:
+            connection = self.connect()
+            row = connection.execute("SELECT id FROM sounds WHERE audio_file = ?", (audio_file,)).fetchone()
+            if row is not None:
+                return row[0]
+            library_id = connection.execute("INSERT INTO sounds (audio_file, entry) VALUES (?, ?)",
+                                            (audio_file, json.dumps(entry))).lastrowid
+            connection.commit()
+            self.entries[library_id] = dict(entry)
+            return library_id
+
+    #########################################################################################################
+    def list_entries(self):
+        """Alle Einträge als (ID, Eintrag), sortiert nach ID"""
+        with self.lock:
+            rows = self.connect().execute("SELECT id, entry FROM sounds ORDER BY id").fetchall()
+        return [(library_id, json.loads(entry)) for library_id, entry in rows]
+
+# Gemeinsame Bibliothek für alle Boards
+sound_library = SoundLibrary()
+
+#############################################################################################################
+if __name__ == '__main__':
+    # python3 sound_library.py           Alle Einträge anzeigen
+    # python3 sound_library.py prune     Einträge für gelöschte Sounddateien entfernen
+    if sys.argv[1:] == ['prune']:
+        print(f"{sound_library.prune()} Einträge entfernt")
+    else:
+        for library_id, entry in sound_library.list_entries():
+            print(f"{library_id}: {entry.get('text', '')} - {entry['audio_file']}")
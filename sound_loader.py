@@ -0,0 +1,121 @@
+import heapq
+import itertools
+import threading
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from sound_cache import sound_cache
+from metadata_index import metadata_index
+
+#############################################################################################################
+class SoundLoader:
+    """Dekodiert vorzuladende Sounds in Hintergrund-Threads, damit die GTK-Hauptschleife nicht blockiert"""
+    def __init__(self, num_workers=2):
+        self.num_workers = num_workers
+        self.queue       = []                    # Heap aus (Priorität, Laufnummer, Pfad)
+        self.priorities  = {}                    # Pfad -> aktuell beste Priorität der wartenden Aufträge
+        self.callbacks   = {}                    # Pfad -> Liste der Rückruffunktionen
+        self.counter     = itertools.count()     # Laufnummer für stabile Reihenfolge im Heap
+        self.condition   = threading.Condition()
+        self.workers     = []
+        self.running     = True
+        self.held        = False                 # Aufträge nur sammeln, Worker noch nicht starten (Programmstart)
+
+    #########################################################################################################
+    def request(self, path, callback, priority=1000):
+        """Fordert das Laden eines Sounds an, callback(sound, error) wird in der Hauptschleife aufgerufen.
+        Ohne callback wird der Sound nur in den Sound-Cache geladen."""
+        with self.condition:
+            if callback is not None:
+                self.callbacks.setdefault(path, []).append(callback)
+            self._push(path, priority)
+            if not self.held:
+                self._start_worker()
+            self.condition.notify()
+
+    #########################################################################################################
+    def hold(self):
+        """Sammelt Aufträge, ohne sie zu bearbeiten, z.B. bis Fenster und Mixer gestartet sind"""
+        with self.condition:
+            self.held = True
+
+    #########################################################################################################
+    def release(self):
+        """Beginnt mit der Bearbeitung der gesammelten Aufträge"""
+        with self.condition:
+            self.held = False
+            for _ in range(min(len(self.priorities), self.num_workers)):
+                self._start_worker()
+            self.condition.notify_all()
+
+    #########################################################################################################
+    def _start_worker(self):
+        """Startet einen weiteren Worker, solange das Maximum nicht erreicht ist (Aufruf unter self.condition)"""
+        if len(self.workers) < self.num_workers:      # Worker erst bei Bedarf starten
+            worker = threading.Thread(target=self._work, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    #########################################################################################################
+    def prioritize(self, path, priority):
+        """Ändert die Priorität eines noch wartenden Auftrags (kleinere Zahl = früher)"""
+        with self.condition:
+            if path in self.priorities:
+                self._push(path, priority)
+
+    #########################################################################################################
+    def cancel(self, path, callback):
+        """Entfernt eine Rückruffunktion, z.B. wenn der Button gelöscht wurde"""
+        with self.condition:
+            callbacks = self.callbacks.get(path)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+
+    #########################################################################################################
+    def shutdown(self):
+        """Beendet die Worker-Threads nach dem aktuellen Auftrag"""
+        with self.condition:
+            self.running = False
+            self.queue.clear()
+            self.priorities.clear()
+            self.callbacks.clear()
+            self.condition.notify_all()
+
+    #########################################################################################################
+    def _push(self, path, priority):
+        """Legt einen Auftrag in den Heap, veraltete Einträge werden beim Entnehmen übersprungen"""
+        if path not in self.priorities or priority < self.priorities[path]:
+            self.priorities[path] = priority
+            heapq.heappush(self.queue, (priority, next(self.counter), path))
+
+    #########################################################################################################
+    def _work(self):
+        """Hauptschleife eines Worker-Threads"""
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                priority, _, path = heapq.heappop(self.queue)
+                if self.priorities.get(path) != priority:  # Veralteter Eintrag, Auftrag wurde umpriorisiert
+                    continue
+                del self.priorities[path]
+
+            try:
+                sound, error = sound_cache.get(path), None
+            except Exception as e:
+                sound, error = None, e
+
+            with self.condition:
+                callbacks = self.callbacks.pop(path, [])
+            for callback in callbacks:
+                GLib.idle_add(callback, sound, error)     # Ergebnis an die Hauptschleife übergeben
+            if sound is not None:
+                try:
+                    metadata_index.record_levels(path, sound)  # Pegel nebenbei aus dem ohnehin dekodierten Sound
+                except Exception as e:
+                    print(f"Fehler beim Speichern der Pegel für '{path}': {e}")
+
+# Gemeinsamer Lade-Pool für alle Buttons
+sound_loader = SoundLoader()
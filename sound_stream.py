@@ -0,0 +1,89 @@
+import os
+from audio_mixer import mixer_starter
+from metadata_index import metadata_index
+
+#############################################################################################################
+def probe_length(path):
+    """Ermittelt die Länge einer Audiodatei in Sekunden ohne sie zu dekodieren, 0 wenn unbekannt"""
+    return metadata_index.duration(path)          # Aus dem Index, nur bei neuen oder geänderten Dateien aus dem Dateikopf
+
+#############################################################################################################
+class MusicStream:
+    """Spielt lange Dateien über pygame.mixer.music gestreamt ab, statt sie vollständig zu dekodieren.
+
+    Das Objekt ersetzt im Button sowohl den Sound als auch den Kanal. pygame kann nur einen
+    Musik-Stream gleichzeitig abspielen, ein neu gestarteter Stream verdrängt daher den vorherigen.
+    """
+    owner = None  # Stream, der gerade pygame.mixer.music benutzt
+
+    def __init__(self, path, length=None):
+        self.path   = path
+        self.length = length if length else probe_length(path)   # Beim Import gespeicherte Länge spart das Lesen
+
+    #########################################################################################################
+    def get_length(self):
+        """Länge in Sekunden, 0 wenn sie ohne Dekodieren nicht bestimmbar ist"""
+        return self.length
+
+    #########################################################################################################
+    def play(self, loops=0, fade_ms=0, volume=1.0):
+        """Startet den Stream und liefert sich selbst als Kanal zurück"""
+        mixer_starter.ensure()
+        import pygame
+        pygame.mixer.music.load(self.path)
+        pygame.mixer.music.set_volume(volume)          # Zielwert für das Einblenden
+        pygame.mixer.music.play(loops=loops, fade_ms=fade_ms)
+        MusicStream.owner = self
+        return self
+
+    #########################################################################################################
+    def is_owner(self):
+        """Prüft, ob dieser Stream noch pygame.mixer.music besitzt"""
+        return MusicStream.owner is self
+
+    #########################################################################################################
+    def get_sound(self):
+        """Wie Channel.get_sound(): der Stream selbst, solange er pygame.mixer.music besitzt, sonst None"""
+        return self if self.is_owner() else None
+
+    #########################################################################################################
+    def get_busy(self):
+        """Wie Channel.get_busy(): False, sobald der Stream beendet oder verdrängt wurde"""
+        if not self.is_owner():
+            return False
+        import pygame
+        return pygame.mixer.music.get_busy()
+
+    #########################################################################################################
+    def set_volume(self, volume):
+        """Setzt die Lautstärke des laufenden Streams"""
+        if self.is_owner():
+            import pygame
+            pygame.mixer.music.set_volume(volume)
+
+    #########################################################################################################
+    def fadeout(self, fade_ms):
+        """Blendet den Stream aus"""
+        if self.is_owner():
+            import pygame
+            pygame.mixer.music.fadeout(fade_ms)
+
+    #########################################################################################################
+    def stop(self):
+        """Stoppt den Stream sofort"""
+        if self.is_owner():
+            import pygame
+            pygame.mixer.music.stop()
+            MusicStream.owner = None
+
+#############################################################################################################
+def should_stream(path, button_config, threshold_mb):
+    """Entscheidet, ob eine Datei gestreamt statt in den Speicher dekodiert wird"""
+    if 'stream' in button_config:                       # Explizite Einstellung am Button hat Vorrang
+        return bool(button_config['stream'])
+    if not threshold_mb:                                # 0 schaltet die automatische Erkennung ab
+        return False
+    try:
+        return os.path.getsize(path) > threshold_mb * 1024 * 1024
+    except OSError:
+        return False
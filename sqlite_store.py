@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import threading
+
+#############################################################################################################
+def user_dir(variable, *default):
+    """Basisverzeichnis nach XDG (z.B. XDG_CACHE_HOME), sonst default unter ~; ohne GLib, auch ohne GTK nutzbar"""
+    return os.environ.get(variable) or os.path.join(os.path.expanduser('~'), *default)
+
+#############################################################################################################
+class SqliteStore:
+    """Grundlage der benutzerweiten SQLite-Datenbanken (Metadaten-Index, Sound-Bibliothek).
+
+    Die Datenbank wird erst beim ersten Zugriff geöffnet und von allen Threads über self.lock benutzt.
+    Unterklassen legen Datei, Tabelle, Pragmas und die Spalte mit dem Dateipfad für prune() fest und
+    halten bereits gelesene Einträge in self.entries (Schlüssel wie KEY_COLUMN).
+    """
+    BASE_DIR    = ('XDG_DATA_HOME', '.local', 'share')   # Umgebungsvariable und Ersatz unter ~
+    FILE_NAME   = None                                   # Dateiname im Verzeichnis pySoundboard
+    SCHEMA      = None                                   # CREATE TABLE IF NOT EXISTS ...
+    PRAGMAS     = ("journal_mode=WAL",)                  # Mehrere Boards lesen gleichzeitig
+    TABLE       = None
+    KEY_COLUMN  = None                                   # Schlüssel von self.entries
+    PATH_COLUMN = None                                   # Einträge ohne vorhandene Datei entfernt prune()
+
+    def __init__(self, db_path=None):
+        self.db_path    = db_path                # None = im Benutzerverzeichnis nach BASE_DIR
+        self.connection = None                   # Wird beim ersten Zugriff geöffnet
+        self.lock       = threading.Lock()
+        self.entries    = {}                     # Bereits gelesene Einträge
+
+    #########################################################################################################
+    def connect(self):
+        """Öffnet die Datenbank und legt die Tabelle bei Bedarf an (Aufruf unter self.lock)"""
+        if self.connection is None:
+            if self.db_path is None:
+                self.db_path = os.path.join(user_dir(*self.BASE_DIR), 'pySoundboard', self.FILE_NAME)
+            if self.db_path != ':memory:':
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                self.connection.execute("PRAGMA " + pragma)
+            self.connection.execute(self.SCHEMA)
+        return self.connection
+
+    #########################################################################################################
+    def prune(self):
+        """Entfernt Einträge, deren Datei nicht mehr existiert, liefert ihre Anzahl"""
+        with self.lock:
+            connection = self.connect()
+            rows = connection.execute(f"SELECT {self.KEY_COLUMN}, {self.PATH_COLUMN} FROM {self.TABLE}")
+            missing = [key for key, path in rows if not os.path.exists(path)]
+            connection.executemany(f"DELETE FROM {self.TABLE} WHERE {self.KEY_COLUMN} = ?", [(key,) for key in missing])
+            connection.commit()
+            for key in missing:
+                self.entries.pop(key, None)
+        return len(missing)
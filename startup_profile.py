@@ -0,0 +1,37 @@
+import time
+
+#############################################################################################################
+class StartupProfiler:
+    """Misst die Dauer der einzelnen Startphasen (aktiviert mit --profile-startup).
+
+    Die Zeitmessung beginnt beim Import dieses Moduls, es sollte daher als erstes importiert werden.
+    mark() schließt die laufende Phase ab; report() gibt die Aufstellung nur aus, wenn aktiviert.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.start   = time.perf_counter()
+        self.last    = self.start
+        self.phases  = []          # (Name, Dauer in ms)
+        self.done    = False
+
+    #########################################################################################################
+    def mark(self, phase):
+        """Beendet die aktuelle Phase und merkt sich ihre Dauer"""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    #########################################################################################################
+    def report(self):
+        """Gibt die Aufstellung einmalig aus"""
+        if not self.enabled or self.done:
+            return
+        self.done = True
+        total = (self.last - self.start) * 1000
+        print("Startzeit nach Phasen:")
+        for phase, duration_ms in self.phases:
+            print(f"  {phase:28s} {duration_ms:8.1f} ms")
+        print(f"  {'bis zum ersten Leerlauf':28s} {total:8.1f} ms")
+
+# Gemeinsamer Profiler für den Programmstart
+startup_profiler = StartupProfiler()
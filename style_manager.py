@@ -0,0 +1,67 @@
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+#############################################################################################################
+class StyleManager:
+    """Verwaltet gemeinsam genutzte CSS-Provider.
+
+    Für jede unterschiedliche Kombination von Farben und Größen wird genau ein Gtk.CssProvider
+    erzeugt und von allen Buttons mit denselben Werten geteilt. Beim Aktualisieren wird der
+    bisherige Provider eines Widgets ersetzt statt einen weiteren hinzuzufügen.
+
+    Theme-Farben werden einmal pro Theme über ein einziges Hilfs-Widget ermittelt und zwischengespeichert.
+    """
+    def __init__(self):
+        self.providers    = {}     # Schlüssel -> Gtk.CssProvider
+        self.theme_colors = {}     # Farbname -> Gdk.RGBA des aktuellen Themes
+        self.theme_probe  = None   # Hilfs-Widget für lookup_color
+
+    #########################################################################################################
+    def get_theme_color(self, name):
+        """Liefert eine Theme-Farbe (z.B. "theme_bg_color") als Gdk.RGBA aus dem Cache"""
+        color = self.theme_colors.get(name)
+        if color is None:
+            if self.theme_probe is None:
+                self.theme_probe = Gtk.Button()       # Einziges temporäres Widget pro Theme
+            erg, color = self.theme_probe.get_style_context().lookup_color(name)
+            self.theme_colors[name] = color
+        return color
+
+    #########################################################################################################
+    def invalidate_theme(self):
+        """Verwirft die zwischengespeicherten Theme-Farben, z.B. nach einem Theme-Wechsel"""
+        self.theme_colors.clear()
+        if self.theme_probe is not None:
+            self.theme_probe.destroy()
+            self.theme_probe = None
+
+    #########################################################################################################
+    def get_provider(self, key, build_css):
+        """Liefert den Provider zu einem Schlüssel, build_css() wird nur beim ersten Mal aufgerufen"""
+        provider = self.providers.get(key)
+        if provider is None:
+            provider = Gtk.CssProvider()
+            provider.load_from_data(build_css().encode())
+            self.providers[key] = provider
+        return provider
+
+    #########################################################################################################
+    def apply(self, style_context, current_provider, key, build_css):
+        """Ersetzt current_provider im Stilkontext durch den geteilten Provider zu key und gibt diesen zurück"""
+        provider = self.get_provider(key, build_css)
+        if provider is not current_provider:
+            if current_provider is not None:
+                style_context.remove_provider(current_provider)
+            style_context.add_provider(provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+        return provider
+
+    #########################################################################################################
+    def remove(self, style_context, current_provider):
+        """Entfernt einen zuvor angewendeten Provider, gibt None für die Zuweisung zurück"""
+        if current_provider is not None:
+            style_context.remove_provider(current_provider)
+        return None
+
+# Gemeinsame Provider-Verwaltung für alle Buttons
+style_manager = StyleManager()
@@ -0,0 +1,98 @@
+import os
+import struct
+import tempfile
+import unittest
+import wave
+from audio_probe import probe
+
+#############################################################################################################
+def ogg_page(granule, packet, sequence=0):
+    """Eine Ogg-Seite mit einem Paket (Prüfsumme wird beim Proben nicht gelesen)"""
+    return b'OggS' + bytes([0, 0]) + struct.pack('<qIII', granule, 1, sequence, 0) + bytes([1, len(packet)]) + packet
+
+#############################################################################################################
+def flac_header(sample_rate, channels, total_samples, bits_per_sample=16):
+    """fLaC-Kennung und STREAMINFO-Block"""
+    bits = (sample_rate << 44) | ((channels - 1) << 41) | ((bits_per_sample - 1) << 36) | total_samples
+    info = bytes(10) + bits.to_bytes(8, 'big') + bytes(16)
+    return b'fLaC' + bytes([0x80, 0, 0, len(info)]) + info
+
+#############################################################################################################
+class AudioProbeTest(unittest.TestCase):
+    """Länge, Abtastrate und Kanäle aus synthetischen Dateiköpfen"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    #########################################################################################################
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    #########################################################################################################
+    def test_wav(self):
+        path = os.path.join(self.directory.name, 'test.wav')
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(2)
+            f.setsampwidth(2)
+            f.setframerate(22050)
+            f.writeframes(bytes(22050 * 4 // 2))                   # 0,5 s
+        self.assertEqual(probe(path), {"duration_s": 0.5, "sample_rate": 22050, "channels": 2})
+
+    #########################################################################################################
+    def test_wav_with_extra_chunk(self):
+        fmt = struct.pack('<HHIIHH', 1, 1, 8000, 16000, 2, 16)
+        content = (b'WAVE' + b'LIST' + struct.pack('<I', 3) + b'abc\x00'   # Ungerade Länge, aufgefüllt
+                   + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'data' + struct.pack('<I', 32000))
+        path = self.write('extra.wav', b'RIFF' + struct.pack('<I', len(content)) + content)
+        self.assertEqual(probe(path), {"duration_s": 2.0, "sample_rate": 8000, "channels": 1})
+
+    #########################################################################################################
+    def test_flac(self):
+        path = self.write('test.flac', flac_header(48000, 2, 48000 * 3) + bytes(100))
+        self.assertEqual(probe(path), {"duration_s": 3.0, "sample_rate": 48000, "channels": 2})
+
+    #########################################################################################################
+    def test_ogg_vorbis(self):
+        head = b'\x01vorbis' + struct.pack('<I', 0) + bytes([2]) + struct.pack('<I', 44100) + bytes(16)
+        content = ogg_page(0, head) + bytes(70000) + ogg_page(44100 * 3 // 2, b'audio', 1)
+        path = self.write('test.ogg', content)
+        self.assertEqual(probe(path), {"duration_s": 1.5, "sample_rate": 44100, "channels": 2})
+
+    #########################################################################################################
+    def test_opus(self):
+        head = b'OpusHead' + bytes([1, 1]) + struct.pack('<HIHB', 312, 16000, 0, 0)
+        path = self.write('test.opus', ogg_page(0, head) + ogg_page(48000 * 2 + 312, b'audio', 1))
+        self.assertEqual(probe(path), {"duration_s": 2.0, "sample_rate": 16000, "channels": 1})
+
+    #########################################################################################################
+    def test_mp3_cbr_with_tags(self):
+        id3v2 = b'ID3' + bytes([3, 0, 0, 0, 0, 0, 20]) + bytes(20)   # 20 Byte Tag, Größe "syncsafe"
+        frames = b'\xff\xfb\x90\x00' + bytes(15996)                  # MPEG-1 Layer III, 128 kbit/s, 44,1 kHz, Stereo
+        id3v1 = b'TAG' + bytes(125)
+        path = self.write('test.mp3', id3v2 + frames + id3v1)
+        self.assertEqual(probe(path), {"duration_s": 1.0, "sample_rate": 44100, "channels": 2})
+
+    #########################################################################################################
+    def test_mp3_xing(self):
+        header = b'\xff\xfb\x90\xc0'                                  # Mono: Xing nach 17 Byte Seiteninformation
+        xing = b'Xing' + struct.pack('>II', 0x1, 100)
+        path = self.write('vbr.mp3', bytes(3) + header + bytes(17) + xing + bytes(2000))
+        self.assertEqual(probe(path), {"duration_s": round(100 * 1152 / 44100, 3), "sample_rate": 44100, "channels": 1})
+
+    #########################################################################################################
+    def test_unknown_or_broken(self):
+        self.assertIsNone(probe(self.write('text.mp3', b'kein Audio ' * 100)))
+        self.assertIsNone(probe(self.write('empty.wav', b'')))
+        self.assertIsNone(probe(self.write('short.flac', b'fLaC\x00\x00')))
+        self.assertIsNone(probe(self.write('broken.wav', b'RIFF\x00\x00\x00\x00WAVEdata\x10\x00\x00\x00')))
+        self.assertIsNone(probe(self.write('other.ogg', ogg_page(0, b'\x80theora' + bytes(40)))))
+        self.assertIsNone(probe(os.path.join(self.directory.name, 'missing.wav')))
+
+if __name__ == '__main__':
+    unittest.main()
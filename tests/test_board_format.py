@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+import zlib
+from board_format import encode_board, decode_board, read_board, write_board, HEADER, MAGIC, VERSION
+
+#############################################################################################################
+def make_board(count):
+    """Board mit count gleichartigen Buttons (make_test_board braucht GTK für die Standardwerte)"""
+    data = {"Window": {"title": "Test", "columns": 8}, "buttons": [{"position": 0, "soundpfad_prefix": ""}]}
+    for i in range(1, count + 1):
+        data['buttons'].append({"position": i, "id": f"{i:012x}", "text": f"Sound {i}",
+                                "audio_file": f"samples/sound_{i}.wav", "volume": 50 + i % 50, "loop": i % 7 == 0})
+    return data
+
+#############################################################################################################
+class BoardFormatTest(unittest.TestCase):
+    """Kompaktes Board-Format: Hin- und Rückweg sowie beschädigte Dateien"""
+
+    def test_round_trip_test_board(self):
+        data = make_board(200)
+        self.assertEqual(decode_board(encode_board(data)), data)
+
+    #########################################################################################################
+    def test_round_trip_mixed_keys(self):
+        # Wechselnde Schlüssel, Button ohne Schlüssel und Listenwerte ergeben mehrere Blöcke
+        data = {"Window": {"title": "Test", "columns": 4}, "extra": [1, 2],
+                "buttons": [{"position": 0, "soundpfad_prefix": ""},
+                            {"position": 1, "text": "Ä", "tags": ["a", "b"]},
+                            {"position": 2, "text": "B", "tags": []},
+                            {},
+                            {"text": "C", "position": 4, "volume": None}]}
+        self.assertEqual(decode_board(encode_board(data)), data)
+        self.assertEqual(list(decode_board(encode_board(data))['buttons'][4]), ["text", "position", "volume"])
+
+    #########################################################################################################
+    def test_read_write_by_extension(self):
+        data = make_board(20)
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('board.json', 'board.sbb'):
+                path = os.path.join(directory, name)
+                write_board(path, data)
+                with open(path, 'rb') as f:
+                    self.assertEqual(f.read(4) == MAGIC, name.endswith('.sbb'))
+                self.assertEqual(read_board(path), data)
+
+    #########################################################################################################
+    def test_invalid_content(self):
+        content = encode_board(make_board(5))
+        for broken in (content[:3],                                           # zu kurz
+                       b'XXXX' + content[4:],                                 # falsche Kennung
+                       HEADER.pack(MAGIC, VERSION + 1, 0) + content[HEADER.size:],
+                       content[:HEADER.size] + b'kein zlib',
+                       HEADER.pack(MAGIC, VERSION, 1) + content[HEADER.size:],  # falsche Länge
+                       HEADER.pack(MAGIC, VERSION, 2) + zlib.compress(b'[]')):  # kein Board-Dokument
+            with self.assertRaises(ValueError):
+                decode_board(broken)
+
+if __name__ == '__main__':
+    unittest.main()
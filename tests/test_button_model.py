@@ -0,0 +1,66 @@
+import unittest
+from button_model import BoardDefaults, ButtonModel
+
+SCHEMA = {"use_custom_text_color": False, "text_color": "#000000",
+          "use_custom_bg_color": False, "background_color": "#4e9a06"}
+
+#############################################################################################################
+class ColorResolutionTest(unittest.TestCase):
+    """Eigene Farbe, Farbe des Default-Buttons oder Theme-Farbe (None)"""
+
+    def resolve(self, button, default_button):
+        defaults = BoardDefaults(dict(default_button, position=0), SCHEMA)
+        model = ButtonModel(dict(button, position=1), defaults)
+        return model.text_color, model.bg_color
+
+    #########################################################################################################
+    def test_theme_color_without_custom_colors(self):
+        self.assertEqual(self.resolve({}, {}), (None, None))
+        # Gespeicherte Standardfarben ohne aktivierte eigene Farbe bleiben beim Theme
+        self.assertEqual(self.resolve({"text_color": "#000000", "background_color": "#4e9a06"},
+                                      {"text_color": "#000000", "use_custom_text_color": False}), (None, None))
+
+    #########################################################################################################
+    def test_empty_colors_mean_theme(self):
+        empty = {"use_custom_text_color": True, "text_color": "", "use_custom_bg_color": True, "background_color": " "}
+        self.assertEqual(self.resolve(empty, {}), (None, None))
+        self.assertEqual(self.resolve({}, empty), (None, None))
+        self.assertEqual(self.resolve(empty, empty), (None, None))
+        self.assertEqual(self.resolve({"use_custom_text_color": True, "text_color": None}, {}), (None, None))
+
+    #########################################################################################################
+    def test_default_button_colors(self):
+        default_button = {"use_custom_text_color": True, "text_color": "#222222",
+                          "use_custom_bg_color": True, "background_color": "#333333"}
+        self.assertEqual(self.resolve({}, default_button), ("#222222", "#333333"))
+        self.assertEqual(self.resolve({"use_custom_text_color": True, "text_color": ""}, default_button)[0], "#222222")
+        self.assertEqual(self.resolve({"use_custom_text_color": False, "text_color": "#111111"}, default_button)[0], "#222222")
+
+    #########################################################################################################
+    def test_own_colors_win(self):
+        button = {"use_custom_text_color": True, "text_color": "#111111",
+                  "use_custom_bg_color": True, "background_color": "#444444"}
+        default_button = {"use_custom_text_color": True, "text_color": "#222222"}
+        self.assertEqual(self.resolve(button, default_button), ("#111111", "#444444"))
+
+    #########################################################################################################
+    def test_default_button_change(self):
+        default_button = {"position": 0}
+        defaults = BoardDefaults(default_button, SCHEMA)
+        model = ButtonModel({"position": 1}, defaults)
+        default_button.update(use_custom_text_color=True, text_color="#222222")
+        defaults.update()
+        self.assertEqual(model.text_color, "#222222")
+        default_button['text_color'] = ""
+        defaults.update()
+        self.assertIsNone(model.text_color)                          # Zurück zur Theme-Farbe
+
+    #########################################################################################################
+    def test_remove_custom_color(self):
+        model = ButtonModel({"position": 1, "use_custom_text_color": True, "text_color": "#111111"},
+                            BoardDefaults({"position": 0}, SCHEMA))
+        model.set('use_custom_text_color', False)                    # "Textfarbe entfernen"
+        self.assertIsNone(model.text_color)
+
+if __name__ == '__main__':
+    unittest.main()
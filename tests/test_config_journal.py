@@ -0,0 +1,178 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+from config_journal import ConfigJournal
+from config_writer import config_writer
+
+#############################################################################################################
+class FakeDefaults:
+    """Wie ButtonDefaults im ConfigManager, nur ohne GTK"""
+    def __init__(self, config):
+        self.config = config
+
+    def update(self, config=None):
+        if config is not None:
+            self.config = config
+
+#############################################################################################################
+class FakeConfig:
+    """Die Teile des ConfigManagers, die das Journal benutzt und beim Nachspielen aufruft"""
+    def __init__(self, config_file, data):
+        self.config_file   = config_file
+        self.is_new_config = False
+        self.data          = data
+        self.inherited     = {}
+        self.defaults      = FakeDefaults(data['buttons'][0])
+        self.next_id       = 100
+        self.journal       = ConfigJournal(self)
+
+    def get_button(self, button_id):
+        return next((b for b in self.data['buttons'] if b.get('id') == button_id), None)
+
+    def renumber(self):
+        for i, button in enumerate(self.data['buttons']):
+            button['position'] = i
+
+    def insert_button(self, button_config, position=None):
+        buttons = self.data['buttons']
+        position = max(1, len(buttons) if position is None else min(position, len(buttons)))
+        if not button_config.get('id'):
+            self.next_id += 1
+            button_config['id'] = str(self.next_id)
+        buttons.insert(position, button_config)
+        self.renumber()
+        self.journal.record({"op": "add", "position": position, "button": dict(button_config)})
+
+    def insert_buttons(self, button_configs, position=None):
+        buttons = self.data['buttons']
+        position = max(1, len(buttons) if position is None else min(position, len(buttons)))
+        buttons[position:position] = button_configs
+        self.renumber()
+        self.journal.record({"op": "add_many", "position": position, "buttons": [dict(b) for b in button_configs]})
+
+    def delete_button(self, position):
+        button = self.data['buttons'].pop(position)
+        self.renumber()
+        self.journal.record({"op": "delete", "id": button.get('id')})
+
+    def move_button(self, current_position, new_position):
+        buttons = self.data['buttons']
+        buttons.insert(new_position, buttons.pop(current_position))
+        self.renumber()
+        self.journal.record({"op": "move", "id": buttons[new_position].get('id'), "position": new_position})
+
+    def restore(self, data):
+        self.data = data
+        self.defaults.update(data['buttons'][0])
+        self.journal.record({"op": "restore", "data": data})
+
+    def set_value(self, button_id, key, value):
+        button = self.get_button(button_id)
+        button[key] = value
+        self.journal.record_set(button, (key,))
+
+#############################################################################################################
+def make_data(save_id="s1"):
+    buttons = [{"position": 0, "volume": 50}]
+    buttons += [{"position": i, "id": str(i), "text": f"Sound {i}", "volume": 50} for i in range(1, 6)]
+    return {"Window": {"title": "Test"}, "Journal": {"save_id": save_id}, "buttons": buttons}
+
+#############################################################################################################
+class ConfigJournalTest(unittest.TestCase):
+    """Nachspielen und Verdichten des Änderungsjournals"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.directory.name, 'board.json')
+
+    def tearDown(self):
+        config_writer.flush()
+        self.directory.cleanup()
+
+    #########################################################################################################
+    def reload(self, save_id="s1"):
+        """Lädt den gespeicherten Stand erneut und spielt das Journal nach, wie nach einem Absturz"""
+        config_writer.flush()
+        config = FakeConfig(self.config_file, make_data(save_id))
+        config.journal.replay()
+        config_writer.flush()
+        return config
+
+    #########################################################################################################
+    def read_lines(self, config):
+        with open(config.journal.get_path()) as f:
+            return [json.loads(line) for line in f]
+
+    #########################################################################################################
+    def test_replay_restores_all_operations(self):
+        config = FakeConfig(self.config_file, make_data())
+        config.set_value('2', 'volume', 10)
+        config.set_value('2', 'volume', 20)              # Zusammengefasst mit dem vorigen Eintrag
+        config.set_value('2', 'text', "Neu")
+        config.insert_button({"text": "Eingefügt"}, 3)
+        config.insert_buttons([{"id": "a", "text": "A"}, {"id": "b", "text": "B"}])
+        config.delete_button(1)
+        config.move_button(1, 4)
+        config.data['buttons'][0]['volume'] = 80
+        config.journal.record_set(config.data['buttons'][0], ('volume',))   # Default-Button hat keine ID
+        config_writer.flush()
+
+        lines = self.read_lines(config)
+        self.assertEqual(lines[0], {"op": "base", "save_id": "s1"})
+        self.assertEqual([op['op'] for op in lines[1:]], ['set', 'add', 'add_many', 'delete', 'move'])
+        self.assertEqual(lines[1]['values'], {"volume": 20, "text": "Neu"})
+
+        expected = copy.deepcopy(config.data)
+        expected['buttons'][0]['volume'] = 50            # Nicht protokolliert
+        self.assertEqual(self.reload().data, expected)
+
+    #########################################################################################################
+    def test_compaction(self):
+        config = FakeConfig(self.config_file, make_data())
+        config.journal.COMPACT_OPS = 3
+        config.inherited = {'1': ('text',)}              # Aus der Bibliothek, nicht mitspeichern
+        for i, button_id in enumerate(('1', '2', '3', '4', '5')):
+            config.set_value(button_id, 'volume', i)
+            config_writer.flush()
+
+        lines = self.read_lines(config)
+        self.assertLessEqual(len(lines) - 1, 3)
+        self.assertEqual(lines[0], {"op": "base", "save_id": "s1"})
+        restore = next(op for op in lines if op['op'] == 'restore')
+        self.assertNotIn('text', restore['data']['buttons'][1])
+
+        reloaded = self.reload()
+        self.assertEqual([b['volume'] for b in reloaded.data['buttons'][1:]], [0, 1, 2, 3, 4])
+        self.assertNotIn('text', reloaded.data['buttons'][1])
+        self.assertEqual(reloaded.data['buttons'][2]['text'], "Sound 2")
+
+    #########################################################################################################
+    def test_replay_ignores_other_save_and_broken_line(self):
+        config = FakeConfig(self.config_file, make_data())
+        config.set_value('1', 'volume', 5)
+        config.move_button(1, 2)
+        config_writer.flush()
+        self.assertEqual(self.reload("s2").data, make_data("s2"))   # Journal gehört zu einem anderen Stand
+
+        with open(config.journal.get_path(), 'a') as f:
+            f.write('{"op": "delete", "i')                # Beim Absturz abgebrochene Zeile
+        reloaded = self.reload()
+        self.assertEqual(reloaded.get_button('1')['volume'], 5)
+        self.assertEqual(len(reloaded.data['buttons']), 6)
+        self.assertEqual([op['op'] for op in self.read_lines(reloaded)], ['base', 'restore'])
+
+    #########################################################################################################
+    def test_save_clears_journal(self):
+        config = FakeConfig(self.config_file, make_data())
+        config.set_value('1', 'volume', 5)
+        config_writer.flush()
+        data = make_data("s2")
+        config.journal.begin_save("s2")
+        config.journal.write_config(self.config_file, data)
+        self.assertFalse(os.path.exists(config.journal.get_path()))
+        self.assertEqual(config.journal.saved_id, "s2")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+from config_writer import config_writer
+
+try:
+    from config_manager import ConfigManager
+except ImportError:                                # PyGObject fehlt
+    ConfigManager = None
+
+#############################################################################################################
+@unittest.skipIf(ConfigManager is None, "PyGObject (gi) ist nicht installiert")
+class ButtonIndexTest(unittest.TestCase):
+    """Position und ID-Index bleiben beim Einfügen, Verschieben und Löschen konsistent"""
+
+    def setUp(self):
+        self.config = ConfigManager(None, '')                        # Neues Board, ohne Fenster und Journal
+        while len(self.config.buttonlist) > 1:                       # Beispiel-Button der Standardkonfiguration
+            self.config.delete_button(1)
+        self.config.insert_buttons([{"text": f"S{i}"} for i in range(1, 6)])
+
+    #########################################################################################################
+    def assertConsistent(self):
+        buttonlist = self.config.buttonlist
+        self.assertEqual([button['position'] for button in buttonlist], list(range(len(buttonlist))))
+        self.assertEqual(self.config.buttons_by_id, {button['id']: button for button in buttonlist})
+        for button in buttonlist:
+            self.assertIs(self.config.get_button(button['id']), button)
+            self.assertIs(self.config.get_button_at(button['position']), button)
+
+    #########################################################################################################
+    def texts(self):
+        return [button.get('text') for button in self.config.buttonlist[1:]]
+
+    #########################################################################################################
+    def test_insert(self):
+        self.config.insert_button({"text": "Mitte"}, 3)
+        self.config.insert_button({"text": "Ende"})
+        self.config.insert_button({"text": "Anfang"}, 0)             # Position 0 gehört dem Default-Button
+        self.config.insert_button({"text": "Weit"}, 100)
+        self.assertEqual(self.texts(), ["Anfang", "S1", "S2", "Mitte", "S3", "S4", "S5", "Ende", "Weit"])
+        self.assertConsistent()
+
+    #########################################################################################################
+    def test_insert_keeps_ids_unique(self):
+        existing = self.config.buttonlist[2]
+        copy = self.config.insert_button({"id": existing['id'], "text": "Kopie"}, 1)
+        self.assertNotEqual(copy['id'], existing['id'])
+        self.config.insert_buttons([{"id": existing['id']}, {"id": "neu"}, {}], 2)
+        self.assertIn("neu", self.config.buttons_by_id)
+        self.assertEqual(len(self.config.buttons_by_id), len(self.config.buttonlist))
+        self.assertConsistent()
+
+    #########################################################################################################
+    def test_move(self):
+        self.assertEqual(self.config.move_button(1, 4), 4)
+        self.assertEqual(self.texts(), ["S2", "S3", "S4", "S1", "S5"])
+        self.assertEqual(self.config.move_button(5, 2), 2)
+        self.assertEqual(self.texts(), ["S2", "S5", "S3", "S4", "S1"])
+        self.assertEqual(self.config.move_button(2, 99), 5)          # Ans Ende begrenzt
+        self.assertEqual(self.config.move_button(3, 0), 1)           # Nicht vor den Default-Button
+        self.assertEqual(self.config.move_button(42, 1), 42)         # Unbekannte Position
+        self.assertEqual(self.texts(), ["S4", "S2", "S3", "S1", "S5"])
+        self.assertConsistent()
+
+    #########################################################################################################
+    def test_delete(self):
+        deleted = self.config.get_button_at(2)
+        self.assertTrue(self.config.delete_button(2))
+        self.assertIsNone(self.config.get_button(deleted['id']))
+        self.assertFalse(self.config.delete_button(0))               # Default-Button bleibt
+        self.assertFalse(self.config.delete_button(42))
+        self.assertTrue(self.config.delete_button(len(self.config.buttonlist) - 1))
+        self.assertEqual(self.texts(), ["S1", "S3", "S4"])
+        self.assertConsistent()
+
+    #########################################################################################################
+    def test_load_normalizes_positions_and_ids(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'board.json')
+            with open(path, 'w') as f:
+                json.dump({"buttons": [{"position": 7, "id": "a", "text": "C"}, {"position": 0},
+                                       {"position": 3, "id": "a", "text": "B"}, {"position": 1, "text": "A"}]}, f)
+            config = ConfigManager(None, path)
+            config.insert_button({"text": "D"})
+            config_writer.flush()                                    # Journal schreiben, bevor das Verzeichnis verschwindet
+            self.config = config
+            self.assertEqual(self.texts(), ["A", "B", "C", "D"])
+            self.assertConsistent()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from config_writer import ConfigWriter, atomic_write_json, snapshot_config
+
+#############################################################################################################
+class ConfigWriterTest(unittest.TestCase):
+    """Zusammenfassen von Speicheraufträgen im Hintergrund-Writer"""
+
+    def setUp(self):
+        self.writer = ConfigWriter(delay=0.05, max_delay=0.2)
+        self.writes = []                          # (Pfad, Daten) in der Reihenfolge der Schreibvorgänge
+        self.lock = threading.Lock()
+
+    #########################################################################################################
+    def record(self, path, data):
+        with self.lock:
+            self.writes.append((path, data))
+
+    #########################################################################################################
+    def test_coalesces_jobs_for_same_path(self):
+        results = []
+        for i in range(5):
+            self.writer.submit('a', i, self.record, results.append)
+        self.writer.submit('b', 'x', self.record)
+        self.writer.flush()
+        self.assertEqual(sorted(self.writes), [('a', 4), ('b', 'x')])    # Nur der letzte Stand von a
+        self.assertEqual(results, [None] * 5)                           # Alle Rückrufe, ohne Fehler
+
+    #########################################################################################################
+    def test_waits_for_delay(self):
+        self.writer.submit('a', 1, self.record)
+        time.sleep(0.01)
+        self.assertEqual(self.writes, [])                               # Noch nicht fällig
+        time.sleep(0.3)
+        self.assertEqual(self.writes, [('a', 1)])
+
+    #########################################################################################################
+    def test_max_delay_limits_postponing(self):
+        end = time.monotonic() + 0.6
+        i = 0
+        while time.monotonic() < end:                                   # Aufträge schneller als delay
+            self.writer.submit('a', i, self.record)
+            i += 1
+            time.sleep(0.01)
+        with self.lock:
+            self.assertGreaterEqual(len(self.writes), 1)                # Trotzdem spätestens nach max_delay
+            self.assertLess(len(self.writes), i)
+        self.writer.flush()
+        self.assertEqual(self.writes[-1], ('a', i - 1))
+
+    #########################################################################################################
+    def test_error_reaches_callbacks(self):
+        def fail(path, data):
+            raise OSError("Platte voll")
+        errors = []
+        self.writer.submit('a', 1, fail, errors.append)
+        self.writer.submit('a', 2, fail, errors.append)
+        self.writer.flush()
+        self.assertEqual([str(e) for e in errors], ["Platte voll"] * 2)
+        self.writer.submit('a', 3, self.record)                         # Der Writer läuft weiter
+        self.writer.flush()
+        self.assertEqual(self.writes, [('a', 3)])
+
+    #########################################################################################################
+    def test_atomic_write_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'board.json')
+            atomic_write_json(path, {"a": 1})
+            atomic_write_json(path, {"a": 2})
+            with open(path) as f:
+                self.assertEqual(json.load(f), {"a": 2})
+            self.assertEqual(os.listdir(directory), ['board.json'])     # Keine temporären Dateien übrig
+
+    #########################################################################################################
+    def test_snapshot_config(self):
+        data = {"Window": {"title": "T"}, "buttons": [{"id": "1", "text": "A", "tags": ["x"], "volume": 5}]}
+        snapshot = snapshot_config(data, {"1": ("text",)})
+        data['Window']['title'] = "U"
+        data['buttons'][0]['tags'].append("y")
+        self.assertEqual(snapshot, {"Window": {"title": "T"}, "buttons": [{"id": "1", "tags": ["x"], "volume": 5}]})
+
+if __name__ == '__main__':
+    unittest.main()
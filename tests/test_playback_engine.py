@@ -0,0 +1,224 @@
+import unittest
+from playback_engine import PlaybackEngine
+
+#############################################################################################################
+class FakeSound:
+    """Wie pygame.mixer.Sound, nur die Länge"""
+    def __init__(self, length=1.0):
+        self.length = length
+
+    def get_length(self):
+        return self.length
+
+#############################################################################################################
+class ChannelState:
+    """Zustand eines Mixer-Kanals, geteilt von allen Channel-Objekten mit derselben Nummer"""
+    def __init__(self):
+        self.sound    = None
+        self.volume   = 1.0
+        self.fadeouts = []
+
+#############################################################################################################
+class FakeChannel:
+    """Wie pygame.mixer.Channel: jedes Channel(i) ist ein neues Objekt für denselben Kanal"""
+    def __init__(self, state):
+        self.state = state
+
+    def play(self, sound, loops=0, fade_ms=0):
+        self.state.sound = sound
+
+    def get_busy(self):
+        return self.state.sound is not None
+
+    def get_sound(self):
+        return self.state.sound
+
+    def fadeout(self, fade_ms):
+        self.state.fadeouts.append(fade_ms)
+
+    def stop(self):
+        self.state.sound = None
+
+    def set_volume(self, volume):
+        self.state.volume = volume
+
+    def get_volume(self):
+        return self.state.volume
+
+#############################################################################################################
+class FakeMixer:
+    """Die Teile von pygame.mixer, die die Engine für die Kanalvergabe benutzt"""
+    def __init__(self, num_channels):
+        self.states = [ChannelState() for _ in range(num_channels)]
+
+    def get_num_channels(self):
+        return len(self.states)
+
+    def set_num_channels(self, num_channels):
+        self.states.extend(ChannelState() for _ in range(num_channels - len(self.states)))
+
+    def Channel(self, index):
+        return FakeChannel(self.states[index])
+
+    def end(self, index):
+        """Der Sound auf Kanal index ist zu Ende gespielt"""
+        self.states[index].sound = None
+
+#############################################################################################################
+class PlaybackEngineTest(unittest.TestCase):
+    """Stimmenverwaltung ohne Audiogerät"""
+
+    def setUp(self):
+        self.mixer = FakeMixer(2)
+        self.engine = PlaybackEngine()
+        self.engine.mixer = self.mixer
+        self.engine.configure(max_channels=8)
+        self.clock = 1000.0
+        self.engine.now_ms = lambda: self.clock
+        self.finished = []
+
+    #########################################################################################################
+    def trigger(self, key, sound=None, **kwargs):
+        self.clock += 1                                              # Eindeutige Startzeiten
+        return self.engine.trigger(key, sound or FakeSound(), on_finished=lambda: self.finished.append(key), **kwargs)
+
+    #########################################################################################################
+    def test_trigger_and_poll_retire_finished_voices(self):
+        self.assertIsNotNone(self.trigger('a'))
+        self.trigger('b')
+        self.assertEqual(self.engine.active_count(), 2)
+        self.mixer.end(0)
+        self.assertTrue(self.engine.poll())
+        self.assertEqual(self.finished, ['a'])
+        self.assertFalse(self.engine.is_playing('a'))
+        self.mixer.end(1)
+        self.assertFalse(self.engine.poll())
+        self.assertEqual(self.finished, ['a', 'b'])
+
+    #########################################################################################################
+    def test_retrigger_replaces_voice(self):
+        self.trigger('a', fade_ms=100)
+        self.trigger('a')
+        self.assertEqual(self.engine.active_count(), 1)
+        self.assertEqual(self.mixer.states[0].fadeouts, [100])       # Alte Stimme ausgeblendet
+        self.assertEqual(self.engine.voices['a'].index, 1)
+
+    #########################################################################################################
+    def test_reused_channel_with_shared_sound(self):
+        shared = FakeSound()                                         # Ein Sound aus dem Cache für beide Buttons
+        self.trigger('a', shared)
+        self.mixer.end(0)                                            # a endet, bevor poll() läuft
+        self.mixer.end(1)
+        self.trigger('b', shared, volume=0.5)
+        self.assertEqual(self.engine.voices['b'].index, 0)           # Derselbe Kanal, derselbe Sound
+        self.assertEqual(self.finished, ['a'])
+        self.assertFalse(self.engine.is_playing('a'))
+        self.assertFalse(self.engine.stop('a'))
+        self.engine.set_volume('a', 0.1)
+        self.assertEqual(self.mixer.states[0].fadeouts, [])          # b wird nicht ausgeblendet
+        self.assertEqual(self.mixer.states[0].volume, 0.5)
+
+    #########################################################################################################
+    def test_stale_voice_does_not_touch_channel(self):
+        self.trigger('a', fade_ms=200)
+        self.mixer.states[0].sound = FakeSound()                     # Kanal spielt inzwischen etwas anderes
+        self.assertTrue(self.engine.stop('a'))
+        self.assertEqual(self.mixer.states[0].fadeouts, [])
+
+    #########################################################################################################
+    def test_stop_with_fade(self):
+        self.trigger('a', fade_ms=300)
+        self.assertTrue(self.engine.stop('a'))
+        self.assertEqual(self.mixer.states[0].fadeouts, [300])
+        self.assertFalse(self.engine.is_playing('a'))
+        self.assertFalse(self.engine.stop('a'))
+        self.assertEqual(self.finished, [])                          # stop() meldet kein Ende, stop_all() schon
+        self.trigger('b')
+        self.engine.stop_all()
+        self.assertEqual(self.finished, ['b'])
+
+    #########################################################################################################
+    def test_scheduled_fade_out(self):
+        self.trigger('a', FakeSound(length=2.0), fade_ms=500)        # Fade-Out 500 ms vor dem Ende
+        self.trigger('loop', FakeSound(length=2.0), fade_ms=500, loop=True)
+        self.clock += 1000
+        self.engine.poll()
+        self.assertEqual(self.mixer.states[0].fadeouts, [])
+        self.clock += 500
+        self.engine.poll()
+        self.assertEqual(self.mixer.states[0].fadeouts, [500])
+        self.clock += 5000
+        self.engine.poll()
+        self.assertEqual(self.mixer.states[0].fadeouts, [500])       # Nur einmal
+        self.assertEqual(self.mixer.states[1].fadeouts, [])          # Schleifen werden nicht ausgeblendet
+
+    #########################################################################################################
+    def test_scheduled_ticks(self):
+        timers = []
+        self.engine.scheduler = lambda ms, callback: timers.append((ms, callback)) or len(timers)
+        self.trigger('a')
+        self.trigger('b')
+        self.assertEqual(len(timers), 1)                             # Ein Timer für alle Stimmen
+        ms, tick = timers[0]
+        self.assertEqual(ms, PlaybackEngine.TICK_MS)
+        self.assertTrue(tick())
+        self.mixer.end(0)
+        self.mixer.end(1)
+        self.assertFalse(tick())                                     # Timer endet mit der letzten Stimme
+        self.assertIsNone(self.engine.timer_id)
+        self.trigger('c')
+        self.assertEqual(len(timers), 2)
+
+    #########################################################################################################
+    def test_channel_growth(self):
+        for i in range(3):
+            self.trigger(i)
+        self.assertEqual(self.mixer.get_num_channels(), 4)
+        for i in range(3, 8):
+            self.trigger(i)
+        self.assertEqual(self.mixer.get_num_channels(), 8)
+        self.assertEqual(self.engine.stolen, 0)
+        self.trigger(8)                                              # max_channels erreicht: verdrängen
+        self.assertEqual(self.mixer.get_num_channels(), 8)
+        self.assertEqual(self.engine.stolen, 1)
+        self.assertEqual(self.finished, [0])
+        self.assertEqual(self.engine.voices[8].index, 0)
+
+    #########################################################################################################
+    def fill(self, volumes=(1.0, 1.0), priorities=(0, 0)):
+        """Belegt beide Kanäle, ohne den Pool wachsen zu lassen"""
+        self.engine.configure(max_channels=2)
+        for key, volume, priority in zip(('first', 'second'), volumes, priorities):
+            self.trigger(key, volume=volume, priority=priority)
+
+    #########################################################################################################
+    def test_steal_oldest(self):
+        self.fill()
+        self.trigger('new')
+        self.assertEqual(self.finished, ['first'])
+        self.assertEqual(self.engine.voices['new'].index, 0)
+
+    #########################################################################################################
+    def test_steal_quietest(self):
+        self.engine.configure(policy='quietest')
+        self.fill(volumes=(0.8, 0.2))
+        self.trigger('new')
+        self.assertEqual(self.finished, ['second'])
+
+    #########################################################################################################
+    def test_steal_priority(self):
+        self.engine.configure(policy='priority')
+        self.fill(priorities=(2, 1))
+        self.trigger('new', priority=1)
+        self.assertEqual(self.finished, ['second'])
+        self.assertIsNone(self.trigger('low', priority=0))           # Höhere Prioritäten werden nie verdrängt
+        self.assertEqual(sorted(self.engine.voices), ['first', 'new'])
+        self.assertEqual(self.engine.stolen, 1)
+
+    #########################################################################################################
+    def test_unknown_policy(self):
+        self.engine.configure(policy='random')
+        self.assertEqual(self.engine.policy, 'oldest')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from search_index import SearchIndex, tokenize, button_tokens
+
+#############################################################################################################
+def make_buttons():
+    return [{"position": 0, "text": "Default"},
+            {"position": 1, "id": "a", "text": "Applaus laut", "tags": ["Publikum"], "audio_file": "sfx/applause_01.wav"},
+            {"position": 2, "id": "b", "text": "Donner", "tags": ["Wetter", "laut"]},
+            {"position": 3, "id": "c", "text": "Regen", "tags": ["Wetter"], "image_file": "icons/rain.png"}]
+
+#############################################################################################################
+class SearchIndexTest(unittest.TestCase):
+    """Suche mit Präfixen und Aktualisieren einzelner Buttons"""
+
+    def setUp(self):
+        self.buttons = make_buttons()
+        self.index = SearchIndex()
+        self.index.build(self.buttons)
+
+    #########################################################################################################
+    def assertConsistent(self):
+        """Sortierte Begriffsliste, Postings und Begriffe je Button passen zusammen"""
+        self.assertEqual(self.index.tokens, sorted(self.index.postings))
+        for token, ids in self.index.postings.items():
+            self.assertTrue(ids)
+            for button_id in ids:
+                self.assertIn(token, self.index.by_id[button_id])
+
+    #########################################################################################################
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Sfx/Applause_01-Laut"), ["sfx", "applause", "01", "laut"])
+        self.assertEqual(button_tokens(self.buttons[3]), {"regen", "wetter", "icons", "rain"})
+
+    #########################################################################################################
+    def test_search(self):
+        self.assertEqual(self.index.search("wet"), {"b", "c"})
+        self.assertEqual(self.index.search("laut"), {"a", "b"})
+        self.assertEqual(self.index.search("WETTER la"), {"b"})        # Alle Wörter müssen passen
+        self.assertEqual(self.index.search("applause"), {"a"})         # Dateiname
+        self.assertEqual(self.index.search("sfx"), {"a"})              # Ordner
+        self.assertEqual(self.index.search("xyz"), set())
+        self.assertIsNone(self.index.search(" - "))
+        self.assertNotIn(None, self.index.by_id)                       # Default-Button nicht im Index
+        self.assertConsistent()
+
+    #########################################################################################################
+    def test_update(self):
+        self.buttons[2]['text'] = "Blitz"
+        self.buttons[2]['tags'] = ["Gewitter"]
+        self.index.update(self.buttons[2])
+        self.assertEqual(self.index.search("donner"), set())
+        self.assertEqual(self.index.search("laut"), {"a"})
+        self.assertEqual(self.index.search("wetter"), {"c"})
+        self.assertEqual(self.index.search("gew"), {"b"})
+        self.assertNotIn("donner", self.index.tokens)
+        self.assertConsistent()
+
+        new_button = {"position": 4, "id": "d", "text": "Gewehr"}
+        self.index.update(new_button)                                  # Neu eingefügter Button
+        self.assertEqual(self.index.search("gew"), {"b", "d"})
+        self.index.update(self.buttons[0])                             # Default-Button wird ignoriert
+        self.assertEqual(self.index.search("default"), set())
+        self.assertConsistent()
+
+    #########################################################################################################
+    def test_remove(self):
+        self.index.remove("c")
+        self.assertEqual(self.index.search("wetter"), {"b"})
+        self.assertEqual(self.index.search("rain"), set())
+        self.assertNotIn("regen", self.index.tokens)
+        self.index.remove("c")                                         # Zweimal entfernen schadet nicht
+        self.assertConsistent()
+
+    #########################################################################################################
+    def test_not_built(self):
+        index = SearchIndex()
+        index.update(self.buttons[1])                                  # Vor dem Aufbau keine Einträge
+        index.remove("a")
+        self.assertEqual(index.postings, {})
+
+if __name__ == '__main__':
+    unittest.main()
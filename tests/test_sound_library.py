@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from config_writer import snapshot_config
+from sound_library import SoundLibrary, entry_from_config
+
+try:
+    import config_manager
+except ImportError:                                # PyGObject fehlt, die Tests ohne ConfigManager laufen trotzdem
+    config_manager = None
+
+#############################################################################################################
+class LibraryTestCase(unittest.TestCase):
+    """Temporäres Verzeichnis mit zwei Sounddateien und eigener Bibliothek"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sounds = []
+        for name in ('applaus.wav', 'donner.wav'):
+            path = os.path.join(self.directory.name, name)
+            open(path, 'wb').close()
+            self.sounds.append(path)
+        self.db_path = os.path.join(self.directory.name, 'library.sqlite')
+        self.library = SoundLibrary(self.db_path)
+
+    def tearDown(self):
+        if self.library.connection is not None:
+            self.library.connection.close()
+        self.directory.cleanup()
+
+#############################################################################################################
+class SoundLibraryTest(LibraryTestCase):
+    """Einträge aufnehmen, per library_id auflösen und bereinigen"""
+
+    def test_entry_from_config(self):
+        entry = entry_from_config({"audio_file": "applaus.wav", "image_file": "", "text": "Applaus",
+                                   "volume": 80, "position": 3, "id": "x"}, self.directory.name)
+        self.assertEqual(entry, {"audio_file": self.sounds[0], "text": "Applaus", "volume": 80})
+
+    #########################################################################################################
+    def test_add_and_get(self):
+        library_id = self.library.add({"audio_file": self.sounds[0], "text": "Applaus"})
+        self.assertIsNotNone(library_id)
+        self.assertEqual(self.library.add({"audio_file": self.sounds[0], "text": "Anders"}), library_id)  # Je Datei ein Eintrag
+        self.assertIsNone(self.library.add({"text": "Ohne Datei"}))
+        self.assertEqual(self.library.get(library_id), {"audio_file": self.sounds[0], "text": "Applaus"})
+        self.assertIsNone(self.library.get(library_id + 100))
+
+    #########################################################################################################
+    def test_resolve_from_database(self):
+        first = self.library.add({"audio_file": self.sounds[0], "text": "Applaus"})
+        second = self.library.add({"audio_file": self.sounds[1], "text": "Donner", "tags": ["Wetter"]})
+        other = SoundLibrary(self.db_path)                  # Z.B. ein anderes Board-Fenster, noch nichts geladen
+        try:
+            other.load_many([first, second, 999])
+            self.assertEqual(sorted(other.entries), [first, second])
+            self.assertEqual(other.get(second)['tags'], ["Wetter"])
+            self.assertEqual([library_id for library_id, _ in other.list_entries()], [first, second])
+        finally:
+            other.connection.close()
+
+    #########################################################################################################
+    def test_prune(self):
+        first = self.library.add({"audio_file": self.sounds[0]})
+        second = self.library.add({"audio_file": self.sounds[1]})
+        os.remove(self.sounds[0])
+        self.assertEqual(self.library.prune(), 1)
+        self.assertIsNone(self.library.get(first))
+        self.assertIsNotNone(self.library.get(second))
+
+    #########################################################################################################
+    def test_snapshot_omits_inherited(self):
+        data = {"Window": {}, "buttons": [{"position": 0},
+                                          {"position": 1, "id": "a", "library_id": 1, "text": "Applaus", "volume": 20},
+                                          {"position": 2, "id": "b", "text": "Eigen"}]}
+        snapshot = snapshot_config(data, {"a": {"text"}})
+        self.assertEqual(snapshot['buttons'][1], {"position": 1, "id": "a", "library_id": 1, "volume": 20})
+        self.assertEqual(snapshot['buttons'][2], data['buttons'][2])
+
+#############################################################################################################
+@unittest.skipIf(config_manager is None, "PyGObject (gi) ist nicht installiert")
+class ConfigManagerLibraryTest(LibraryTestCase):
+    """Bibliotheks-Buttons im ConfigManager: Auflösen, Speichern und Drag & Drop ohne übernommene Werte"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(config_manager, 'sound_library', self.library)   # Nicht die Bibliothek des Benutzers
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config = config_manager.ConfigManager(None, '')
+        self.config.get_default_button()['soundpfad_prefix'] = self.directory.name
+        self.config.defaults.update()
+        self.library_id = self.library.add({"audio_file": self.sounds[0], "text": "Applaus", "volume": 80})
+        self.button = self.config.insert_button({"library_id": self.library_id, "volume": 20})
+
+    #########################################################################################################
+    def test_resolve_by_library_id(self):
+        self.config.resolve_library(self.button)
+        self.assertEqual(self.button['text'], "Applaus")
+        self.assertEqual(self.button['volume'], 20)                  # Eigener Wert des Boards hat Vorrang
+        self.assertEqual(self.button['audio_file'], 'applaus.wav')   # Relativ zum Prefix des Boards
+        self.assertEqual(self.config.inherited[self.button['id']], {'audio_file', 'text'})
+
+    #########################################################################################################
+    def test_inherited_keys_not_saved_or_copied(self):
+        self.config.resolve_library(self.button)
+        saved = next(b for b in self.config.snapshot_for_save()['buttons'] if b.get('id') == self.button['id'])
+        self.assertNotIn('text', saved)
+        self.assertNotIn('audio_file', saved)
+        self.assertEqual(saved['volume'], 20)
+
+        portable = self.config.create_portable_config(self.button)
+        self.assertNotIn('text', portable)
+        self.assertEqual(portable['library_id'], self.library_id)
+        self.assertEqual(portable['volume'], 20)
+
+        self.button['text'] = "Eigener Text"
+        self.config.mark_changed(self.button, 'text')               # Geänderter Wert gehört dem Board
+        self.assertEqual(self.config.create_portable_config(self.button)['text'], "Eigener Text")
+
+if __name__ == '__main__':
+    unittest.main()
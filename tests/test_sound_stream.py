@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+from sound_stream import should_stream
+
+#############################################################################################################
+class ShouldStreamTest(unittest.TestCase):
+    """Entscheidung zwischen Streamen und Dekodieren in den Speicher"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'long.ogg')
+        with open(self.path, 'wb') as f:
+            f.write(bytes(2 * 1024 * 1024))                          # 2 MB
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    #########################################################################################################
+    def test_threshold(self):
+        self.assertFalse(should_stream(self.path, {}, 0))            # 0 = aus, auch für große Dateien
+        self.assertFalse(should_stream(self.path, {}, None))
+        self.assertTrue(should_stream(self.path, {}, 1))
+        self.assertFalse(should_stream(self.path, {}, 2))            # Genau an der Schwelle nicht
+        self.assertFalse(should_stream(self.path, {}, 10))
+
+    #########################################################################################################
+    def test_button_option_wins(self):
+        self.assertTrue(should_stream(self.path, {"stream": True}, 0))
+        self.assertFalse(should_stream(self.path, {"stream": False}, 1))
+
+    #########################################################################################################
+    def test_missing_file(self):
+        self.assertFalse(should_stream(os.path.join(self.directory.name, 'missing.ogg'), {}, 1))
+
+if __name__ == '__main__':
+    unittest.main()
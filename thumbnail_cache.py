@@ -0,0 +1,52 @@
+import hashlib
+import os
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import GdkPixbuf, GLib
+
+#############################################################################################################
+class ThumbnailCache:
+    """Erzeugt vorskalierte Hintergrundbilder in Buttongröße.
+
+    Ein Bild wird pro Pfad, Änderungszeit und Zielgröße genau einmal dekodiert und skaliert,
+    als PNG im Cache-Verzeichnis abgelegt und im Speicher vermerkt. So teilen sich alle Buttons
+    und alle späteren Sitzungen dasselbe kleine Bild, statt das Original bei jedem Zeichnen zu skalieren.
+    """
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = os.path.join(GLib.get_user_cache_dir(), 'pySoundboard', 'thumbnails')
+        self.cache_dir  = cache_dir
+        self.thumbnails = {}    # (Pfad, mtime, Breite, Höhe) -> Pfad des Thumbnails
+
+    #########################################################################################################
+    def get(self, image_path, width, height):
+        """Liefert den Pfad eines auf width x height skalierten Bildes, bei Fehlern das Original"""
+        try:
+            real_path = os.path.realpath(image_path)
+            key = (real_path, os.stat(real_path).st_mtime_ns, int(width), int(height))
+        except OSError:
+            return image_path                          # Datei fehlt, GTK meldet das beim Zeichnen selbst
+
+        thumbnail_path = self.thumbnails.get(key)
+        if thumbnail_path is not None:
+            return thumbnail_path
+
+        name = hashlib.sha1(repr(key).encode()).hexdigest() + '.png'
+        thumbnail_path = os.path.join(self.cache_dir, name)
+        if not os.path.exists(thumbnail_path):         # Noch nicht auf der Platte, einmalig erzeugen
+            try:
+                pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(real_path, key[2], key[3], True)
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temp_path = thumbnail_path + '.tmp'
+                pixbuf.savev(temp_path, 'png', [], [])
+                os.replace(temp_path, thumbnail_path)  # Andere Instanzen sehen nie ein halbes Bild
+                print(f"Thumbnail erzeugt: {image_path} -> {thumbnail_path}")
+            except (GLib.Error, OSError) as e:
+                print(f"Fehler beim Erzeugen des Thumbnails für '{image_path}': {e}")
+                return image_path
+
+        self.thumbnails[key] = thumbnail_path
+        return thumbnail_path
+
+# Gemeinsamer Thumbnail-Cache für alle Buttons
+thumbnail_cache = ThumbnailCache()